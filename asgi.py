@@ -0,0 +1,5 @@
+from src.asgi import ThreadedWsgiToAsgi
+from entrypoint import make_app
+
+# views with an async variant run it on the server's event loop
+app = ThreadedWsgiToAsgi(make_app(ASYNC_VIEWS=True))
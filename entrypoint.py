@@ -3,4 +3,16 @@ from os import getenv
 from src.app import create_app
 from src.config import DevConfig, ProdConfig
 
-app = create_app(ProdConfig if getenv('VDASHBOARD_PROD_ENV') else DevConfig)
+
+def make_app(**overrides):
+    """App of the environment's config, ``overrides`` replace some of its settings."""
+    config = ProdConfig if getenv('VDASHBOARD_PROD_ENV') else DevConfig
+    return create_app(type(config.__name__, (config,), overrides) if overrides else config)
+
+
+def __getattr__(name: str):
+    # `app` is built on first access: `python -m src.server` workers only import this module for make_app
+    if name == 'app':
+        globals()['app'] = make_app()
+        return globals()['app']
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -5,13 +5,13 @@ from flask import Flask
 
 from src.config import Config, DevConfig
 from src.extensions.errors import register_exceptions_handles
+from src.extensions.validators import BoundedRequest
 
 
 def register_endpoints(app: Flask):
     from src.endpoints import endpoints
     for endpoint in endpoints:
-        endpoint.url_prefix = urljoin('/api/v1/', endpoint.url_prefix.lstrip('/'))
-        app.register_blueprint(endpoint)
+        app.register_blueprint(endpoint, url_prefix=urljoin('/api/v1/', endpoint.url_prefix.lstrip('/')))
 
 
 def register_extensions(app: Flask):
@@ -20,8 +20,18 @@ def register_extensions(app: Flask):
         module.init_app(app)
 
 
+def shutdown_app(app: Flask):
+    """Finish the background work of ``app`` (tasks, buffered rows) and stop its pools, for exiting workers."""
+    from src.extensions import task_queue, write_behind
+    with app.app_context():
+        task_queue.backend.shutdown()
+        write_behind.shutdown(app)
+        app.extensions['password_hasher'].shutdown()
+
+
 def create_app(config: Type[Config]):
     app = Flask('vdashboard-rest-api')
+    app.request_class = BoundedRequest
     app.config.from_object(config)
 
     register_extensions(app)
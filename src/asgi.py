@@ -0,0 +1,52 @@
+"""Serving the app over ASGI.
+
+The app stays a WSGI app; :class:`ThreadedWsgiToAsgi` runs each request on a worker thread of the event
+loop's executor. ``async def`` views called from there are run by Flask (through asgiref) on the server's
+event loop, so their database and hashing awaits overlap with other requests instead of each request
+spinning up an event loop of its own. ``asgi.py`` sets ``ASYNC_VIEWS``, which serves the async variant of a
+view (``auth.login_async``) in place of the sync one.
+"""
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+
+
+class _ThreadedWsgiToAsgiInstance(WsgiToAsgiInstance):
+    # asgiref runs every WSGI call on one shared thread (thread_sensitive), which serializes all requests.
+    # The loop below is asgiref 3.5.0's ``run_wsgi_app`` and relies on its internals (``build_environ``,
+    # ``start_response``, ``response_start``, ``response_started``, ``response_content_length``,
+    # ``sync_send``), tests/test_asgi.py fails when a different asgiref is installed; re-check on upgrades.
+
+    async def run_wsgi_app(self, body):
+        await sync_to_async(self._run_wsgi_app, thread_sensitive=False)(body)
+
+    def _run_wsgi_app(self, body):
+        """Call the WSGI app and send its response, ``start_response`` is called on this same thread."""
+        environ = self.build_environ(self.scope, body)
+        bytes_sent = 0
+        response = self.wsgi_application(environ, self.start_response)
+        try:
+            for output in response:
+                if not self.response_started:
+                    self.response_started = True
+                    self.sync_send(self.response_start)
+                # never send more than the Content-Length the app announced
+                if self.response_content_length is not None:
+                    output = output[:self.response_content_length - bytes_sent]
+                self.sync_send(dict(type='http.response.body', body=output, more_body=True))
+                bytes_sent += len(output)
+                if bytes_sent == self.response_content_length:
+                    break
+        finally:
+            if hasattr(response, 'close'):
+                response.close()
+        if not self.response_started:
+            self.response_started = True
+            self.sync_send(self.response_start)
+        self.sync_send(dict(type='http.response.body'))
+
+
+class ThreadedWsgiToAsgi(WsgiToAsgi):
+    """``WsgiToAsgi`` running requests concurrently on the executor threads of the event loop."""
+
+    async def __call__(self, scope, receive, send):
+        await _ThreadedWsgiToAsgiInstance(self.wsgi_application)(scope, receive, send)
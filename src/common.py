@@ -1,6 +1,8 @@
-from typing import Union, Dict, Any
+from typing import Union, Dict, Any, Iterable, Callable, Iterator
 
-from flask import make_response, Response
+from flask import Response, current_app, stream_with_context
+
+from src.extensions import json_serializer
 
 
 class HttpMethods:
@@ -22,6 +24,38 @@ def response_template(data: Union[dict, list, str],
     else:
         common_struct['body'] = data
 
-    resp = make_response(common_struct, status_code)
+    resp = json_serializer.response(common_struct, status_code)
+    resp.headers.extend(extra_headers or {})
+    return resp
+
+
+def stream_response_template(rows: Iterable[Any],
+                             status_code: int,
+                             serializer: Callable[[Any], Any] = None,
+                             extra_headers: Dict[str, str] = None,
+                             chunk_size: int = None,
+                             **additional_information: Dict[str, Any]) -> Response:
+    """Streaming variant of :func:`response_template` for large list bodies.
+
+    ``rows`` is consumed lazily (e.g. a ``yield_per`` query) and the envelope is sent as chunked JSON,
+    ``chunk_size`` rows at a time, so memory use does not grow with the number of rows.
+    """
+    dumps = json_serializer.dumps
+    chunk_size = chunk_size or current_app.config.get('STREAM_CHUNK_SIZE', 500)
+    head = dumps(dict(status_code=status_code, additional_information=additional_information))
+
+    def generate() -> Iterator[bytes]:
+        yield head[:-1] + b',"body":['
+        separator, chunk = b'', []
+        for row in rows:
+            chunk.append(dumps(serializer(row) if serializer else row))
+            if len(chunk) >= chunk_size:
+                yield separator + b','.join(chunk)
+                separator, chunk = b',', []
+        if chunk:
+            yield separator + b','.join(chunk)
+        yield b']}'
+
+    resp = current_app.response_class(stream_with_context(generate()), status=status_code, mimetype='application/json')
     resp.headers.extend(extra_headers or {})
     return resp
@@ -3,8 +3,8 @@ import os
 from datetime import timedelta
 
 
-def get_host_uri():
-    hostname = os.getenv('VDASHBOARD_DB_HOST')
+def get_host_uri(hostname: str = None):
+    hostname = hostname or os.getenv('VDASHBOARD_DB_HOST')
     username = os.getenv('VDASHBOARD_DB_USER_NAME')
     password = os.getenv('VDASHBOARD_DB_PASSWORD')
     db_name = os.getenv('VDASHBOARD_DB_NAME')
@@ -12,6 +12,30 @@ def get_host_uri():
     return f'{username}:{password}@{hostname}:{db_port}/{db_name}'
 
 
+def get_replica_binds():
+    """One bind per host of the comma separated ``VDASHBOARD_DB_REPLICA_HOSTS``."""
+    hosts = [host.strip() for host in (os.getenv('VDASHBOARD_DB_REPLICA_HOSTS') or '').split(',') if host.strip()]
+    return {f'replica_{index}': f'postgresql+psycopg2://{get_host_uri(host)}?charset=utf8mb4'
+            for index, host in enumerate(hosts)}
+
+
+def get_engine_options():
+    statement_timeout = int(os.getenv('VDASHBOARD_DB_STATEMENT_TIMEOUT_MS') or 30000)
+    return dict(
+        pool_size=int(os.getenv('VDASHBOARD_DB_POOL_SIZE') or 10),
+        max_overflow=int(os.getenv('VDASHBOARD_DB_POOL_MAX_OVERFLOW') or 10),
+        pool_timeout=float(os.getenv('VDASHBOARD_DB_POOL_TIMEOUT') or 10),
+        pool_recycle=int(os.getenv('VDASHBOARD_DB_POOL_RECYCLE') or 1800),
+        pool_pre_ping=os.getenv('VDASHBOARD_DB_POOL_PRE_PING', '1') != '0',
+        connect_args=dict(options=f'-c statement_timeout={statement_timeout}'),
+    )
+
+
+def get_async_engine_options():
+    statement_timeout = os.getenv('VDASHBOARD_DB_STATEMENT_TIMEOUT_MS') or '30000'
+    return dict(connect_args=dict(server_settings=dict(statement_timeout=statement_timeout)))
+
+
 class Config(object):
     """Base configuration."""
 
@@ -20,9 +44,89 @@ class Config(object):
     APP_DIR = os.path.abspath(os.path.dirname(__file__))
     PROJECT_ROOT = os.path.abspath(os.path.join(APP_DIR, os.pardir))
     BUNDLE_ERRORS = True
+    JSON_PROVIDER = 'auto'
+    STREAM_CHUNK_SIZE = 500
+    # serve the async variants of views (login) through the asyncio engine, set by asgi.py
+    ASYNC_VIEWS = False
+    # /internal/* routes, served to admin users only
+    INTERNAL_ENDPOINTS_ENABLED = os.getenv('VDASHBOARD_INTERNAL_ENDPOINTS_ENABLED', '0') != '0'
+    REQUEST_TIMING_ENABLED = True
+    REQUEST_TIMING_WINDOW = 1000
+    # set in each worker by the prefork server (python -m src.server), read by /internal/workers
+    SERVER_HEALTH_DIR = None
+    # request bodies are refused (413) above this size, leaves room for BULK_MAX_ROWS users
+    MAX_CONTENT_LENGTH = int(os.getenv('VDASHBOARD_MAX_CONTENT_LENGTH') or 2 * 2 ** 20)
+
+    # REQUEST PROFILER
+    PROFILER_ENABLED = os.getenv('VDASHBOARD_PROFILER_ENABLED', '0') != '0'
+    PROFILER_SAMPLE_RATE = float(os.getenv('VDASHBOARD_PROFILER_SAMPLE_RATE') or 0.0)
+    PROFILER_INTERVAL = 0.005
+    PROFILER_TOKEN_MAX_AGE = 3600
+    PROFILER_RESULT_TIMEOUT = 3600
 
     # SQLALCHEMY COMMON
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    BULK_CHUNK_SIZE = 1000
+    BULK_MAX_ROWS = 10000
+
+    # READ REPLICAS, bind names of SQLALCHEMY_BINDS, max lag in seconds
+    SQLALCHEMY_REPLICA_BINDS = ()
+    SQLALCHEMY_REPLICA_MAX_LAG = float(os.getenv('VDASHBOARD_DB_REPLICA_MAX_LAG') or 5)
+    SQLALCHEMY_REPLICA_CHECK_INTERVAL = 5
+
+    # QUERY LOG for the index audit (flask internal index-audit), holds statement parameters
+    QUERY_LOG_PATH = os.getenv('VDASHBOARD_QUERY_LOG_PATH')
+
+    # PASSWORD HASHING
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256'
+    PASSWORD_HASH_ITERATIONS = int(os.getenv('VDASHBOARD_PASSWORD_HASH_ITERATIONS') or 260000)
+    PASSWORD_HASH_SALT_LENGTH = 16
+    PASSWORD_REHASH_ON_LOGIN = True
+    HASHING_EXECUTOR = 'thread'
+    HASHING_WORKERS = os.cpu_count() or 1
+    HASHING_QUEUE_SIZE = 32
+    HASHING_QUEUE_TIMEOUT = 0.5
+    HASHING_RETRY_AFTER = 1
+
+    # JWT STATE
+    JWT_VERIFIED_CACHE_SIZE = 10000
+    JWT_REVOCATION_BLOOM_BITS = 2 ** 20
+    JWT_REVOCATION_BLOOM_HASHES = 7
+    JWT_REVOCATION_SYNC_INTERVAL = 5
+
+    # RATE LIMITING, limits are (requests, window seconds)
+    RATELIMIT_ENABLED = True
+    RATELIMIT_STORAGE = 'auto'
+    RATELIMIT_LOGIN_PER_IP = (30, 60)
+    RATELIMIT_LOGIN_PER_EMAIL = (10, 60)
+
+    # MODEL LOOKUP CACHE
+    LOOKUP_CACHE_ENABLED = True
+    LOOKUP_CACHE_TIMEOUT = 300
+    LOOKUP_CACHE_NEGATIVE_TIMEOUT = 30
+
+    # BACKGROUND TASKS
+    TASKS_BACKEND = 'thread'
+    TASKS_WORKERS = 4
+    TASKS_MAX_RETRIES = 3
+    TASKS_RETRY_BACKOFF = 1.0
+    TASKS_RETRY_BACKOFF_MAX = 60.0
+
+    # WRITE-BEHIND BUFFER for append-only rows (login events)
+    WRITE_BEHIND_BATCH_SIZE = 500
+    WRITE_BEHIND_FLUSH_INTERVAL = 1.0
+    WRITE_BEHIND_MAX_BUFFER = 10000
+
+    # RESPONSE CACHE
+    RESPONSE_CACHE_ENABLED = True
+    RESPONSE_CACHE_TIMEOUT = 30
+
+    # RESPONSE COMPRESSION, br and zstd are used when brotli and zstandard are installed
+    COMPRESSION_ENABLED = True
+    COMPRESSION_ALGORITHMS = ('br', 'zstd', 'gzip', 'deflate')
+    COMPRESSION_LEVELS = dict(br=4, zstd=3, gzip=6, deflate=6)
+    COMPRESSION_MIN_SIZE = int(os.getenv('VDASHBOARD_COMPRESSION_MIN_SIZE') or 1024)
+    COMPRESSION_CACHE_TIMEOUT = 300
 
     CORS_ORIGIN_WHITELIST = [
         'http://0.0.0.0:5000',
@@ -38,9 +142,29 @@ class ProdConfig(Config):
 
     # DB
     SQLALCHEMY_DATABASE_URI = f'postgresql+psycopg2://{get_host_uri()}?charset=utf8mb4'
-
-    # CACHE
-    CACHE_TYPE = 'RedisCache'
+    SQLALCHEMY_ENGINE_OPTIONS = get_engine_options()
+    SQLALCHEMY_BINDS = get_replica_binds()
+    SQLALCHEMY_REPLICA_BINDS = tuple(SQLALCHEMY_BINDS)
+    SQLALCHEMY_ASYNC_DATABASE_URI = f'postgresql+asyncpg://{get_host_uri()}'
+    SQLALCHEMY_ASYNC_ENGINE_OPTIONS = get_async_engine_options()
+
+    # PASSWORD HASHING
+    HASHING_EXECUTOR = os.getenv('VDASHBOARD_HASHING_EXECUTOR', 'process')
+    # set by src.server to the cores per worker, so the pools of all workers together use each core once
+    HASHING_WORKERS = int(os.getenv('VDASHBOARD_HASHING_WORKERS') or Config.HASHING_WORKERS)
+    HASHING_QUEUE_SIZE = int(os.getenv('VDASHBOARD_HASHING_QUEUE_SIZE') or Config.HASHING_QUEUE_SIZE)
+
+    # BACKGROUND TASKS, consumed by `flask internal task-worker`
+    TASKS_BACKEND = 'redis'
+
+    # CACHE, a process-local LRU in front of Redis
+    CACHE_TYPE = 'src.extensions.tiered_cache.TieredCache'
+    TIERED_CACHE_REMOTE = 'flask_caching.backends.RedisCache'
+    TIERED_CACHE_PUBSUB = 'redis'
+    TIERED_CACHE_CHANNEL = 'cache-invalidation'
+    TIERED_CACHE_LOCAL_MAX_ITEMS = int(os.getenv('VDASHBOARD_CACHE_LOCAL_MAX_ITEMS') or 10000)
+    TIERED_CACHE_LOCAL_MAX_BYTES = int(os.getenv('VDASHBOARD_CACHE_LOCAL_MAX_BYTES') or 16 * 2 ** 20)
+    TIERED_CACHE_LOCAL_TIMEOUT = 5
     CACHE_DEFAULT_TIMEOUT = 500
     CACHE_REDIS_HOST = 'redis-container'
     CACHE_REDIS_PORT = '6379'
@@ -64,11 +188,15 @@ class DevConfig(Config):
     DB_PATH = os.path.join(Config.PROJECT_ROOT, DB_NAME)
     SQLALCHEMY_DATABASE_URI = f'sqlite:///{DB_PATH}?check_same_thread=False&?charset=utf8mb4'
     SQLALCHEMY_ECHO = True
+    INTERNAL_ENDPOINTS_ENABLED = True
+    PROFILER_ENABLED = True
 
     # CACHE
     CACHE_TYPE = 'FileSystemCache'
     CACHE_DIR = os.path.join(Config.PROJECT_ROOT, 'debug_cache_store')
     CACHE_DEFAULT_TIMEOUT = 120
+    # otherwise delete_many stops at the first key that is not cached
+    CACHE_IGNORE_ERRORS = True
 
     # JWT
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=5)
@@ -82,14 +210,21 @@ class TestConfig(Config):
     DEBUG = True
 
     # DB
-    BCRYPT_LOG_ROUNDS = 4
     DB_NAME = 'test.dev.db'
     DB_PATH = os.path.join(Config.PROJECT_ROOT, DB_NAME)
     SQLALCHEMY_DATABASE_URI = f'sqlite:///{DB_PATH}?check_same_thread=False&?charset=utf8mb4'
+    INTERNAL_ENDPOINTS_ENABLED = True
+    PROFILER_ENABLED = True
+
+    # PASSWORD HASHING
+    PASSWORD_HASH_ITERATIONS = 1000
+    HASHING_WORKERS = 2
 
     # CACHE
     CACHE_TYPE = 'SimpleCache'
     CACHE_DEFAULT_TIMEOUT = 120
+    # otherwise delete_many stops at the first key that is not cached
+    CACHE_IGNORE_ERRORS = True
 
     # JWT
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=5)
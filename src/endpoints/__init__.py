@@ -1,7 +1,9 @@
 __all__ = ('endpoints',)
 
 from src.endpoints.auth import auth_endpoint
+from src.endpoints.internal import internal_endpoint
 
 endpoints = [
-    auth_endpoint
+    auth_endpoint,
+    internal_endpoint
 ]
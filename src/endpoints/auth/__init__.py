@@ -1,3 +1,4 @@
 __all__ = ('auth_endpoint',)
 
 from src.endpoints.auth.resource import auth_endpoint
+from src.endpoints.auth import commands  # noqa: F401, registers the CLI commands of the blueprint
@@ -0,0 +1,36 @@
+import click
+from flask import current_app
+
+from .model import PasswordPolicy, User, calibrate_iterations, measure_hash_time
+from .resource import auth_endpoint
+
+
+@auth_endpoint.cli.command('calibrate-hash')
+@click.option('--target-ms', type=float, default=250.0, show_default=True,
+              help='Hashing latency budget for one password check.')
+@click.option('--samples', type=int, default=3, show_default=True, help='Measurements per cost, best one is used.')
+def calibrate_hash(target_ms: float, samples: int):
+    """Measure password hashing latency on this host and suggest PASSWORD_HASH_ITERATIONS."""
+    policy = PasswordPolicy.from_config()
+    current_ms = measure_hash_time(policy.algorithm, policy.iterations, samples) * 1000
+    click.echo(f'current policy: {policy.method} -> {current_ms:.1f}ms')
+
+    iterations = calibrate_iterations(target_ms, policy.algorithm, samples)
+    suggested_ms = measure_hash_time(policy.algorithm, iterations, samples) * 1000
+    click.echo(f'suggested for {target_ms:.0f}ms budget: '
+               f'pbkdf2:{policy.algorithm}:{iterations} -> {suggested_ms:.1f}ms')
+    click.echo(f'set VDASHBOARD_PASSWORD_HASH_ITERATIONS={iterations}')
+    if iterations != policy.iterations and current_app.config.get('PASSWORD_REHASH_ON_LOGIN', True):
+        click.echo('existing hashes will be upgraded on the next successful login of each user')
+
+
+@auth_endpoint.cli.command('set-admin')
+@click.argument('email')
+@click.option('--revoke', is_flag=True, help='Take the admin rights away instead of granting them.')
+def set_admin(email: str, revoke: bool):
+    """Grant a user the admin rights required by the user batch and internal endpoints."""
+    user = User.get(email)
+    if user is None:
+        raise click.ClickException(f'No user with email {email!r}')
+    user.update(is_admin=not revoke)
+    click.echo(f'{email} is {"no longer" if revoke else "now"} an admin')
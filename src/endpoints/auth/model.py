@@ -1,16 +1,130 @@
-from werkzeug.security import generate_password_hash, check_password_hash
+import datetime
+import time
+from typing import Dict, Iterable, List, Optional
 
-from src.extensions import database
+from flask import current_app
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash
+
+from src.extensions import database, password_hasher, write_behind
 from src.extensions.mixins import CRUDMixin
 
 
+class PasswordPolicy:
+    """Target password hash algorithm and cost.
+
+    Stored hashes carry their own method (``pbkdf2:<algorithm>:<iterations>$salt$hash``), so a hash made
+    under an older policy keeps verifying and is upgraded by :meth:`User.check_password` on the next
+    successful login.
+    """
+
+    def __init__(self, algorithm: str = 'sha256', iterations: int = DEFAULT_PBKDF2_ITERATIONS, salt_length: int = 16):
+        self.algorithm = algorithm
+        self.iterations = iterations
+        self.salt_length = salt_length
+
+    @classmethod
+    def from_config(cls, config: Dict = None) -> 'PasswordPolicy':
+        config = current_app.config if config is None else config
+        method = config.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256')
+        if not method.startswith('pbkdf2:'):
+            raise ValueError(f'Unsupported password hash method {method!r}, only pbkdf2:<algorithm> is supported')
+        return cls(algorithm=method[len('pbkdf2:'):],
+                   iterations=int(config.get('PASSWORD_HASH_ITERATIONS', DEFAULT_PBKDF2_ITERATIONS)),
+                   salt_length=int(config.get('PASSWORD_HASH_SALT_LENGTH', 16)))
+
+    @property
+    def method(self) -> str:
+        return f'pbkdf2:{self.algorithm}:{self.iterations}'
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """Whether the stored hash was made with a different method, cost or salt length."""
+        if password_hash.count('$') < 2:
+            return True
+        method, salt, _ = password_hash.split('$', 2)
+        return method != self.method or len(salt) != self.salt_length
+
+    def hash(self, password: str) -> str:
+        return password_hasher.generate(password, self.method, self.salt_length)
+
+    async def hash_async(self, password: str) -> str:
+        return await password_hasher.generate_async(password, self.method, self.salt_length)
+
+    def hash_many(self, passwords: Iterable[str]) -> List[str]:
+        return password_hasher.generate_many(passwords, self.method, self.salt_length)
+
+
+def measure_hash_time(algorithm: str, iterations: int, samples: int = 3) -> float:
+    """Best of ``samples`` wall-clock seconds for one hash with the given cost on this host."""
+    method = f'pbkdf2:{algorithm}:{iterations}'
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        generate_password_hash('calibration-password', method)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def calibrate_iterations(target_ms: float,
+                         algorithm: str = 'sha256',
+                         samples: int = 3,
+                         probe_iterations: int = 100000,
+                         step: int = 1000) -> int:
+    """Largest iteration count (a multiple of ``step``) whose hash time stays within ``target_ms``."""
+    per_iteration = measure_hash_time(algorithm, probe_iterations, samples) / probe_iterations
+    iterations = max(step, int(target_ms / 1000 / per_iteration) // step * step)
+    while iterations > step and measure_hash_time(algorithm, iterations, samples) * 1000 > target_ms:
+        iterations -= step
+    return iterations
+
+
 class User(database.Model, CRUDMixin):
-    email = database.Column(database.String, primary_key=True, index=True)
+    email = database.Column(database.String, primary_key=True)
     password_hash = database.Column(database.String, nullable=False)
     display_name = database.Column(database.String(100))
+    is_admin = database.Column(database.Boolean, nullable=False, default=False)
 
-    def set_password(self, password: str):
-        self.password_hash = generate_password_hash(password)
+    def set_password(self, password: str, policy: Optional[PasswordPolicy] = None):
+        self.password_hash = (policy or PasswordPolicy.from_config()).hash(password)
 
     def check_password(self, password: str) -> bool:
-        return check_password_hash(self.password_hash, password)
+        """Verify the password, upgrading a hash made under an outdated policy on success."""
+        if not password_hasher.verify(self.password_hash, password):
+            return False
+
+        policy = PasswordPolicy.from_config()
+        if current_app.config.get('PASSWORD_REHASH_ON_LOGIN', True) and policy.needs_rehash(self.password_hash):
+            self.set_password(password, policy)
+            self.save()
+        return True
+
+    async def check_password_async(self, password: str) -> bool:
+        """``check_password`` for async views, hashing on the pool and saving through the asyncio engine."""
+        if not await password_hasher.verify_async(self.password_hash, password):
+            return False
+
+        policy = PasswordPolicy.from_config()
+        if current_app.config.get('PASSWORD_REHASH_ON_LOGIN', True) and policy.needs_rehash(self.password_hash):
+            await self.update_async(password_hash=await policy.hash_async(password))
+        return True
+
+
+class LoginEvent(database.Model, CRUDMixin):
+    """Append-only record of a login attempt, written in batches through ``write_behind``."""
+
+    SUCCESS = 'success'
+    BAD_PASSWORD = 'bad_password'
+    UNKNOWN_EMAIL = 'unknown_email'
+
+    __table_args__ = (database.Index('ix_login_event_email_created_at', 'email', 'created_at'),)
+
+    id = database.Column(database.Integer, primary_key=True)
+    email = database.Column(database.String, nullable=False)
+    outcome = database.Column(database.String(20), nullable=False)
+    remote_addr = database.Column(database.String(45))
+    created_at = database.Column(database.DateTime, nullable=False)
+
+    @classmethod
+    def record(cls, email: str, outcome: str, remote_addr: Optional[str] = None) -> bool:
+        """Buffer the event, ``False`` when it was dropped because the buffer is full."""
+        return write_behind.append(cls, dict(email=email, outcome=outcome, remote_addr=remote_addr,
+                                             created_at=datetime.datetime.utcnow()))
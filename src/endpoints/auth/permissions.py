@@ -0,0 +1,29 @@
+from functools import wraps
+from http import HTTPStatus
+from typing import Optional
+
+from flask import Response
+from flask_jwt_extended import get_jwt_identity, jwt_required
+
+from src.extensions.errors import error_response
+from .model import User
+
+
+def admin_error() -> Optional[Response]:
+    """403 response unless the identity of the verified token is an admin user."""
+    user = User.get(get_jwt_identity())
+    if user is None or not user.is_admin:
+        return error_response('Admin rights are required', HTTPStatus.FORBIDDEN)
+
+
+def admin_required():
+    """``jwt_required`` that also requires the identity of the token to be an admin user."""
+    def decorator(view):
+        @wraps(view)
+        @jwt_required()
+        def wrapper(*args, **kwargs):
+            return admin_error() or view(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -1,28 +1,167 @@
 from http import HTTPStatus
 
-from flask import Blueprint
-from flask_jwt_extended import create_access_token, create_refresh_token
-from webargs.flaskparser import use_args
+from flask import Blueprint, current_app, request
+from flask_jwt_extended import create_access_token, create_refresh_token, decode_token, get_jwt, jwt_required
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt import PyJWTError
+from sqlalchemy.exc import IntegrityError
 
 from src.common import HttpMethods, response_template
-from src.extensions.errors import auth_error
-from .model import User
-from .schema import UserSchema, LoginSpec
+from src.extensions import database, rate_limiter, response_cache, revocation_store, schema_registry
+from src.extensions.errors import auth_error, error_response
+from src.extensions.parsing import use_args
+from src.extensions.rate_limit import json_field, remote_addr
+from .model import LoginEvent, PasswordPolicy, User
+from .permissions import admin_required
+from .schema import UserSchema, LoginSpec, LogoutSpec, UserListSpec, UserBatchSpec, UserBatchDeleteSpec
 
 auth_endpoint = Blueprint('auth', 'auth', url_prefix='/auth')
 
 
-@auth_endpoint.route('/login', methods=(HttpMethods.POST,))
-@use_args(LoginSpec)
-def login(args):
-    user = User.query.get(args.get('email'))
-    if user is None or not user.check_password(args.get('password')):
-        return auth_error()
+def login_failed(email: str, outcome: str):
+    LoginEvent.record(email, outcome, request.remote_addr)
+    return auth_error()
+
+
+def logged_in(user: User):
+    LoginEvent.record(user.email, LoginEvent.SUCCESS, request.remote_addr)
 
     access_token = create_access_token(user.email)
     refresh_token = create_refresh_token(user.email)
 
-    return response_template(UserSchema().dump(user),
+    return response_template(schema_registry.dump(UserSchema, user),
                              HTTPStatus.OK,
                              access_token=access_token,
                              refresh_token=refresh_token)
+
+
+@auth_endpoint.route('/login', methods=(HttpMethods.POST,))
+@rate_limiter.limit('login',
+                    (remote_addr, 'RATELIMIT_LOGIN_PER_IP'),
+                    (json_field('email'), 'RATELIMIT_LOGIN_PER_EMAIL'))
+@use_args(LoginSpec())
+def login(args):
+    user = User.get(args.get('email'))
+    if user is None:
+        return login_failed(args['email'], LoginEvent.UNKNOWN_EMAIL)
+    if not user.check_password(args.get('password')):
+        return login_failed(args['email'], LoginEvent.BAD_PASSWORD)
+    return logged_in(user)
+
+
+@rate_limiter.limit('login',
+                    (remote_addr, 'RATELIMIT_LOGIN_PER_IP'),
+                    (json_field('email'), 'RATELIMIT_LOGIN_PER_EMAIL'))
+@use_args(LoginSpec())
+async def login_async(args):
+    """``login`` through the asyncio engine and the hashing pool, served instead of it with ``ASYNC_VIEWS``."""
+    user = await User.get_async(args.get('email'))
+    if user is None:
+        return login_failed(args['email'], LoginEvent.UNKNOWN_EMAIL)
+    if not await user.check_password_async(args.get('password')):
+        return login_failed(args['email'], LoginEvent.BAD_PASSWORD)
+    return logged_in(user)
+
+
+@auth_endpoint.record
+def register_async_views(state):
+    # recorded after the login route, so its sync view is registered when this replaces it
+    if state.app.config.get('ASYNC_VIEWS'):
+        state.app.view_functions[f'{state.blueprint.name}.login'] = login_async
+
+
+@auth_endpoint.route('/refresh', methods=(HttpMethods.POST,))
+@jwt_required(refresh=True)
+def refresh():
+    """Exchange a refresh token for a new token pair, the used refresh token is revoked."""
+    token = get_jwt()
+    user = User.get(token['sub'])
+    if user is None:
+        return auth_error()
+    revocation_store.revoke(token['jti'], token.get('exp'))
+
+    return response_template('Tokens refreshed',
+                             HTTPStatus.OK,
+                             access_token=create_access_token(user.email),
+                             refresh_token=create_refresh_token(user.email))
+
+
+@auth_endpoint.route('/logout', methods=(HttpMethods.POST,))
+@jwt_required()
+@use_args(LogoutSpec())
+def logout(args):
+    token = get_jwt()
+    revoked = [token]
+    if args.get('refresh_token'):
+        try:
+            refresh_token = decode_token(args['refresh_token'], allow_expired=True)
+        except (PyJWTError, JWTExtendedException):
+            return error_response('Invalid refresh token', HTTPStatus.BAD_REQUEST)
+        if refresh_token.get('type') != 'refresh' or refresh_token['sub'] != token['sub']:
+            return error_response('Invalid refresh token', HTTPStatus.BAD_REQUEST)
+        revoked.append(refresh_token)
+
+    for claims in revoked:
+        revocation_store.revoke(claims['jti'], claims.get('exp'))
+    return response_template('Logged out', HTTPStatus.OK)
+
+
+@auth_endpoint.route('/users', methods=(HttpMethods.GET,))
+@admin_required()
+@response_cache.cached(User.__tablename__)
+@use_args(UserListSpec(), location='query')
+def list_users(args):
+    # an empty ``?fields=`` selects every field, like leaving it out
+    fields = args.get('fields') or None
+    try:
+        page = User.keyset_page(cursor=args.get('cursor'), limit=args['limit'], fields=fields)
+    except ValueError as e:
+        return error_response(str(e), HTTPStatus.BAD_REQUEST)
+
+    return response_template(schema_registry.dump(UserSchema, page.items, many=True, only=fields),
+                             HTTPStatus.OK,
+                             next_cursor=page.next_cursor)
+
+
+USER_UPSERT_COLUMNS = ('display_name',)
+
+
+def batch_too_large(rows: list):
+    limit = current_app.config['BULK_MAX_ROWS']
+    if len(rows) > limit:
+        return error_response(f'At most {limit} items can be sent in one batch', HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+
+
+@auth_endpoint.route('/users:batch', methods=(HttpMethods.POST,))
+@admin_required()
+@use_args(UserBatchSpec())
+def create_users_batch(args):
+    users = args['users']
+    error = batch_too_large(users)
+    if error is not None:
+        return error
+
+    password_hashes = PasswordPolicy.from_config().hash_many(user['password'] for user in users)
+    rows = [dict(email=user['email'], password_hash=password_hash, display_name=user.get('display_name'))
+            for user, password_hash in zip(users, password_hashes)]
+    try:
+        # upserts rename existing users but never replace their credentials
+        count = (User.bulk_upsert(rows, update_columns=USER_UPSERT_COLUMNS) if args['upsert'] else
+                 User.bulk_create(rows))
+    except IntegrityError:
+        database.session.rollback()
+        return error_response('Some of the users already exist', HTTPStatus.CONFLICT)
+
+    return response_template(dict(count=count), HTTPStatus.CREATED if not args['upsert'] else HTTPStatus.OK)
+
+
+@auth_endpoint.route('/users:batch', methods=(HttpMethods.DELETE,))
+@admin_required()
+@use_args(UserBatchDeleteSpec())
+def delete_users_batch(args):
+    emails = args['emails']
+    error = batch_too_large(emails)
+    if error is not None:
+        return error
+
+    return response_template(dict(count=User.bulk_delete(emails)), HTTPStatus.OK)
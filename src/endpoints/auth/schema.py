@@ -1,33 +1,56 @@
-import re
-
-from marshmallow import fields
+from marshmallow import fields, validate
+from webargs.fields import DelimitedList
 
 from src.extensions import deserializer
+from src.extensions.validators import BoundedString, EMAIL_MAX_LENGTH, LOGIN_PASSWORD_MAX_LENGTH, \
+    PASSWORD_MAX_LENGTH, is_email, is_password
 from .model import User
 
-PASSWORD_VALIDATE_REGEX = re.compile(r'^(?=\S{6,20}$)(?=.*?\d)(?=.*?[a-z])(?=.*?[A-Z])(?=.*?[^A-Za-z\s0-9])')
-EMAIL_VALIDATE_REGEX = re.compile(r'([A-Za-z0-9]+[.-_])*[A-Za-z0-9]+@[A-Za-z0-9-]+(\.[A-Z|a-z]{2,})+')
 
+class LoginSpec(deserializer.Schema):
+    email = BoundedString(EMAIL_MAX_LENGTH, validate=is_email, required=True)
+    password = BoundedString(LOGIN_PASSWORD_MAX_LENGTH, required=True)
 
-def validate_email(email: str) -> bool:
-    return bool(EMAIL_VALIDATE_REGEX.fullmatch(email))
 
+class LogoutSpec(deserializer.Schema):
+    refresh_token = fields.String()
 
-def validate_password(password: str) -> bool:
-    return bool(PASSWORD_VALIDATE_REGEX.match(password))
 
+class RegisterSpec(deserializer.Schema):
+    email = BoundedString(EMAIL_MAX_LENGTH, validate=is_email, required=True)
+    password = BoundedString(PASSWORD_MAX_LENGTH, required=True, validate=is_password)
 
-class LoginSpec(deserializer.Schema):
-    email = fields.String(validate=validate_email, required=True)
-    password = fields.String(required=True)
 
+USER_EXCLUDED_FIELDS = ('password_hash', 'is_admin')
+USER_FIELDS = tuple(column.key for column in User.__table__.columns if column.key not in USER_EXCLUDED_FIELDS)
 
-class RegisterSpec(deserializer.Schema):
-    email = fields.String(validate=validate_email, required=True)
-    password = fields.String(required=True, validate=validate_password)
+
+@deserializer.lazy_schema
+def UserSchema():
+    class UserSchema(deserializer.SQLAlchemyAutoSchema):
+        class Meta:
+            model = User
+            exclude = USER_EXCLUDED_FIELDS
+
+    return UserSchema
+
+
+class UserListSpec(deserializer.Schema):
+    cursor = fields.String()
+    limit = fields.Integer(load_default=50, validate=validate.Range(min=1, max=200))
+    fields = DelimitedList(fields.String(validate=validate.OneOf(USER_FIELDS)))
+
+
+class UserBatchItemSpec(deserializer.Schema):
+    email = BoundedString(EMAIL_MAX_LENGTH, validate=is_email, required=True)
+    password = BoundedString(PASSWORD_MAX_LENGTH, required=True, validate=is_password)
+    display_name = fields.String(validate=validate.Length(max=100))
+
+
+class UserBatchSpec(deserializer.Schema):
+    users = fields.List(fields.Nested(UserBatchItemSpec), required=True)
+    upsert = fields.Boolean(load_default=False)
 
 
-class UserSchema(deserializer.SQLAlchemyAutoSchema):
-    class Meta:
-        model = User
-        exclude = ('password_hash',)
+class UserBatchDeleteSpec(deserializer.Schema):
+    emails = fields.List(BoundedString(EMAIL_MAX_LENGTH), required=True)
@@ -0,0 +1,4 @@
+__all__ = ('internal_endpoint',)
+
+from src.endpoints.internal.resource import internal_endpoint
+from src.endpoints.internal import commands  # noqa: F401, registers the CLI commands of the blueprint
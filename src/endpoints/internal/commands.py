@@ -0,0 +1,64 @@
+import click
+from flask import current_app
+
+from src.extensions import database, migrate, task_queue
+from src.extensions.index_audit import audit, parse_query_log, write_migration
+from src.extensions.tasks import RedisBackend
+from .resource import internal_endpoint
+
+
+def _columns(columns) -> str:
+    return f'({", ".join(columns)})'
+
+
+@internal_endpoint.cli.command('index-audit')
+@click.option('--log', 'log_path', type=click.Path(exists=True, dir_okay=False),
+              help='QUERY_LOG_PATH file or SQLALCHEMY_ECHO output, defaults to QUERY_LOG_PATH.')
+@click.option('--top', type=int, default=20, show_default=True, help='Most executed statements to EXPLAIN.')
+@click.option('--migration', is_flag=True, help='Write an Alembic revision dropping redundant and adding '
+                                                'missing indexes.')
+def index_audit(log_path: str, top: int, migration: bool):
+    """EXPLAIN the hottest logged statements and report sequential scans, redundant and missing indexes."""
+    log_path = log_path or current_app.config.get('QUERY_LOG_PATH')
+    statements = []
+    if log_path:
+        with open(log_path) as log_file:
+            statements = list(parse_query_log(log_file))
+    else:
+        click.echo('no query log given (--log or QUERY_LOG_PATH), checking indexes only')
+
+    with database.engine.connect() as connection:
+        report = audit(connection, database.Model.metadata, statements, top)
+
+    for plan in report.plans:
+        timing = f', {plan.stats.total_ms:.1f}ms total' if plan.stats.total_ms is not None else ''
+        click.echo(f'{plan.stats.count}x{timing}: {" ".join(plan.stats.statement.split())}')
+        if plan.error:
+            click.echo(f'    not planned: {plan.error}')
+        for scan in plan.scans or ():
+            click.echo(f'    sequential scan of {scan.table}: {scan.detail}')
+    for index, covered_by in report.redundant:
+        click.echo(f'redundant index {index.name} on {index.table}{_columns(index.columns)}, '
+                   f'covered by {covered_by.name or "the primary key"}{_columns(covered_by.columns)}')
+    for index, covered_by in report.model_redundant:
+        click.echo(f'model declares redundant index {index.name} on {index.table}{_columns(index.columns)}, '
+                   f'covered by {covered_by.name or "the primary key"}{_columns(covered_by.columns)}')
+    for index in report.missing:
+        click.echo(f'missing index {index.name} on {index.table}{_columns(index.columns)}')
+
+    if migration:
+        path = write_migration(migrate.load(current_app).directory, report)
+        click.echo(f'migration written to {path}' if path else 'nothing to migrate')
+
+
+@internal_endpoint.cli.command('task-worker')
+def task_worker():
+    """Run background tasks from the Redis queue until interrupted."""
+    backend = task_queue.backend
+    if not isinstance(backend, RedisBackend):
+        raise click.ClickException('task-worker needs TASKS_BACKEND "redis", the thread backend runs in the app')
+    click.echo(f'consuming {backend.queue_key}, {len(task_queue.tasks)} tasks registered')
+    try:
+        backend.work()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,76 @@
+from http import HTTPStatus
+
+import click
+from flask import Blueprint, current_app
+from flask_jwt_extended import verify_jwt_in_request
+
+from src.common import HttpMethods, response_template
+from src.endpoints.auth.permissions import admin_error
+from src.extensions import cache, database, request_timer, request_profiler, write_behind
+from src.extensions.errors import error_response, item_not_found_response
+from src.extensions.pool_metrics import pool_status
+from src.extensions.profiler import make_profile_token
+from src.server import read_health
+
+internal_endpoint = Blueprint('internal', 'internal', url_prefix='/internal')
+
+
+@internal_endpoint.before_request
+def internal_guard():
+    """Internal endpoints are hidden unless enabled, and then only served to admin users."""
+    if not current_app.config.get('INTERNAL_ENDPOINTS_ENABLED', False):
+        return error_response('Internal endpoints are disabled', HTTPStatus.NOT_FOUND)
+    verify_jwt_in_request()
+    return admin_error()
+
+
+@internal_endpoint.route('/pool', methods=(HttpMethods.GET,))
+def pool_metrics():
+    binds = [None, *(current_app.config.get('SQLALCHEMY_BINDS') or ())]
+    return response_template({bind or 'default': pool_status(database.get_engine(bind=bind).pool) for bind in binds},
+                             HTTPStatus.OK)
+
+
+@internal_endpoint.route('/replicas', methods=(HttpMethods.GET,))
+def replica_status():
+    replicas = database.replicas
+    return response_template(dict(max_lag=replicas.max_lag, replicas=replicas.status()), HTTPStatus.OK)
+
+
+@internal_endpoint.route('/cache', methods=(HttpMethods.GET,))
+def cache_metrics():
+    backend = cache.cache
+    stats = backend.stats() if hasattr(backend, 'stats') else {}
+    return response_template(dict(backend=type(backend).__name__, **stats), HTTPStatus.OK)
+
+
+@internal_endpoint.route('/write-behind', methods=(HttpMethods.GET,))
+def write_behind_metrics():
+    return response_template(write_behind.stats(), HTTPStatus.OK)
+
+
+@internal_endpoint.route('/workers', methods=(HttpMethods.GET,))
+def worker_health():
+    health_dir = current_app.config.get('SERVER_HEALTH_DIR')
+    if not health_dir:
+        return error_response('Not served by the prefork server (python -m src.server)', HTTPStatus.NOT_FOUND)
+    return response_template(read_health(health_dir), HTTPStatus.OK)
+
+
+@internal_endpoint.route('/timings', methods=(HttpMethods.GET,))
+def request_timings():
+    return response_template(request_timer.histograms(), HTTPStatus.OK)
+
+
+@internal_endpoint.route('/profiles/<profile_id>', methods=(HttpMethods.GET,))
+def request_profile(profile_id: str):
+    profile = request_profiler.get_profile(profile_id)
+    if profile is None:
+        return item_not_found_response('Profile', profile_id)
+    return response_template(profile, HTTPStatus.OK)
+
+
+@internal_endpoint.cli.command('profile-token')
+def profile_token():
+    """Print a signed X-Profile-Token header value for profiling a single request."""
+    click.echo(make_profile_token())
@@ -1,21 +1,61 @@
-__all__ = ('modules', 'database', 'cache', 'migrate', 'deserializer', 'bcrypt_manager', 'jwt_manager')
+__all__ = ('modules', 'database', 'async_database', 'cache', 'migrate', 'deserializer', 'password_hasher',
+           'jwt_manager', 'json_serializer', 'request_timer', 'request_profiler', 'revocation_store', 'rate_limiter',
+           'response_cache', 'schema_registry', 'query_log', 'task_queue', 'write_behind', 'compression')
 
 from flask_caching import Cache
-from flask_jwt_extended import JWTManager
-from flask_marshmallow import Marshmallow
-from flask_migrate import Migrate
-from flask_sqlalchemy import SQLAlchemy
 
-database = SQLAlchemy()
+from src.extensions.async_engine import AsyncDatabase
+from src.extensions.compression import Compression
+from src.extensions.engine import Database
+from src.extensions.hashing import PasswordHasher
+from src.extensions.http_cache import ResponseCache
+from src.extensions.index_audit import QueryLog
+from src.extensions.lazy import LazyMarshmallow, LazyMigrate
+from src.extensions.profiler import RequestProfiler
+from src.extensions.rate_limit import RateLimiter
+from src.extensions.schemas import SchemaRegistry
+from src.extensions.serialization import JSONSerializer
+from src.extensions.tasks import TaskQueue
+from src.extensions.timing import RequestTimer
+from src.extensions.token_state import CachingJWTManager, RevocationStore
+from src.extensions.write_behind import WriteBehind
+
+database = Database()
+async_database = AsyncDatabase()
 cache = Cache()
-migrate = Migrate(db=database)
-deserializer = Marshmallow()
-jwt_manager = JWTManager()
+migrate = LazyMigrate(db=database)
+deserializer = LazyMarshmallow(db=database)
+jwt_manager = CachingJWTManager()
+password_hasher = PasswordHasher()
+json_serializer = JSONSerializer()
+request_timer = RequestTimer()
+request_profiler = RequestProfiler(cache)
+revocation_store = RevocationStore(cache)
+rate_limiter = RateLimiter(cache)
+response_cache = ResponseCache(cache)
+schema_registry = SchemaRegistry()
+query_log = QueryLog()
+task_queue = TaskQueue(cache)
+write_behind = WriteBehind(database)
+compression = Compression(cache)
 
 modules = [
     database,
+    async_database,
     cache,
     migrate,
     deserializer,
-    jwt_manager
+    jwt_manager,
+    password_hasher,
+    json_serializer,
+    request_timer,
+    request_profiler,
+    revocation_store,
+    rate_limiter,
+    response_cache,
+    schema_registry,
+    query_log,
+    task_queue,
+    write_behind,
+    compression
 ]
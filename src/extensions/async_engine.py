@@ -0,0 +1,105 @@
+"""SQLAlchemy asyncio engine for ``async def`` views.
+
+Flask runs an async view to completion on an event loop of its own (a new one per request under WSGI, the
+server loop under ``asgi.py``), so connections must not outlive the loop they were opened on: the engine
+uses ``NullPool`` and every :meth:`AsyncDatabase.session` checks out a fresh connection. The first connection
+of an engine initializes its dialect behind a lock bound to the loop it runs on, so the engine makes that
+connection on a loop of its own before any view uses it.
+
+``session(read_only=True)`` reads from one of the replicas the sync session would use (see :mod:`.replicas`),
+through the asyncio equivalent of its URI.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+from flask import Flask, current_app
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+ASYNC_DRIVERS: Dict[str, str] = {
+    'postgresql': 'postgresql+asyncpg',
+    'postgresql+psycopg2': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+    'sqlite+pysqlite': 'sqlite+aiosqlite',
+}
+# query arguments of the sync URIs the async drivers do not accept
+UNSUPPORTED_QUERY = {'postgresql+asyncpg': ('charset',)}
+
+
+def async_database_uri(uri: str) -> str:
+    """The asyncio driver equivalent of a sync database URI."""
+    url = make_url(uri)
+    drivername = ASYNC_DRIVERS.get(url.drivername)
+    if drivername is None:
+        raise ValueError(f'No asyncio driver known for {url.drivername!r}, set SQLALCHEMY_ASYNC_DATABASE_URI')
+    url = url.set(drivername=drivername).difference_update_query(UNSUPPORTED_QUERY.get(drivername, ()))
+    return url.render_as_string(hide_password=False)
+
+
+async def _first_connect(engine: AsyncEngine):
+    async with engine.connect():
+        pass
+
+
+class AsyncDatabase:
+    """Flask extension holding the asyncio engine of the app, created on first use."""
+
+    def __init__(self, app: Flask = None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        app.config.setdefault('SQLALCHEMY_ASYNC_DATABASE_URI', None)
+        app.config.setdefault('SQLALCHEMY_ASYNC_ENGINE_OPTIONS', {})
+        app.extensions['async_database'] = dict(lock=threading.Lock(), engines={})
+
+    @property
+    def engine(self) -> AsyncEngine:
+        return self.get_engine()
+
+    def get_engine(self, bind: str = None) -> AsyncEngine:
+        """Engine of the default database, or of one of the ``SQLALCHEMY_BINDS``."""
+        state = current_app.extensions['async_database']
+        engine = state['engines'].get(bind)
+        if engine is None:
+            with state['lock']:
+                engine = state['engines'].get(bind)
+                if engine is None:
+                    engine = state['engines'][bind] = self._create_engine(current_app.config, bind)
+        return engine
+
+    @staticmethod
+    def _create_engine(config, bind: Optional[str]) -> AsyncEngine:
+        if bind is not None:
+            uri = async_database_uri(config['SQLALCHEMY_BINDS'][bind])
+        else:
+            uri = config['SQLALCHEMY_ASYNC_DATABASE_URI'] or async_database_uri(config['SQLALCHEMY_DATABASE_URI'])
+        engine = create_async_engine(uri, **dict(config['SQLALCHEMY_ASYNC_ENGINE_OPTIONS'], poolclass=NullPool))
+        # the caller may be inside a running loop, so the first connection gets a thread and loop of its own
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(asyncio.run, _first_connect(engine)).result()
+        return engine
+
+    @staticmethod
+    async def _replica_bind() -> Optional[str]:
+        replicas = current_app.extensions['replicas']
+        if replicas and replicas.check_due():
+            # the health check uses the sync engines, keep it off the event loop
+            await asyncio.get_running_loop().run_in_executor(None, replicas.check)
+        return replicas.choose()
+
+    @asynccontextmanager
+    async def session(self, read_only: bool = False) -> AsyncIterator[AsyncSession]:
+        """Session on the primary, or with ``read_only`` on a usable replica when there is one."""
+        bind = await self._replica_bind() if read_only else None
+        async with AsyncSession(self.get_engine(bind), expire_on_commit=False) as session:
+            yield session
+
+    async def dispose(self):
+        engines = current_app.extensions['async_database']['engines']
+        while engines:
+            await engines.popitem()[1].dispose()
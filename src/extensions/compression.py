@@ -0,0 +1,127 @@
+"""Response compression negotiated from ``Accept-Encoding``.
+
+Responses of a ``COMPRESSION_MIMETYPES`` type and at least ``COMPRESSION_MIN_SIZE`` bytes long are encoded
+with the accepted encoding of highest quality, ties going to the first of ``COMPRESSION_ALGORITHMS``.
+``gzip`` and ``deflate`` are always available, ``br`` and ``zstd`` when ``brotli`` and ``zstandard`` are
+installed. Streamed responses, responses that already have a ``Content-Encoding`` and ``Cache-Control:
+no-transform`` responses are sent as they are.
+
+A strong ``ETag`` becomes ``<etag>-<encoding>`` on the encoded response, and the encoded bytes are cached
+under it: responses answered from the :class:`~src.extensions.http_cache.ResponseCache` are compressed once
+per encoding, not on every hit.
+"""
+import gzip
+import zlib
+from typing import Callable, Dict, Iterable, Optional, Sequence
+
+from flask import Flask, Response, current_app, request
+from flask_caching import Cache
+from werkzeug.datastructures import Accept
+
+from .timing import phase
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+Encoder = Callable[[bytes, int], bytes]
+
+ENCODERS: Dict[str, Encoder] = {
+    'gzip': lambda body, level: gzip.compress(body, level, mtime=0),
+    'deflate': zlib.compress,
+}
+if brotli is not None:
+    ENCODERS['br'] = lambda body, level: brotli.compress(body, quality=level)
+if zstandard is not None:
+    ENCODERS['zstd'] = lambda body, level: zstandard.ZstdCompressor(level=level).compress(body)
+
+DEFAULT_LEVELS = dict(br=4, zstd=3, gzip=6, deflate=6)
+UNCOMPRESSED_STATUS = (204, 206, 304)
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    return f'{etag}-{encoding}'
+
+
+def encoded_etags(etag: str) -> Iterable[str]:
+    """Every ``ETag`` the encoded variants of the representation tagged ``etag`` can be sent with."""
+    return (encoded_etag(etag, encoding) for encoding in ENCODERS)
+
+
+def negotiate(accept: Accept, encodings: Sequence[str]) -> Optional[str]:
+    """The first of ``encodings`` with the highest quality in ``accept``, ``None`` when none is acceptable."""
+    best, best_quality = None, 0
+    for encoding in encodings:
+        quality = accept.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class Compression:
+    """Flask extension compressing response bodies, encoded bytes of ``ETag`` tagged responses kept in ``cache``."""
+
+    def __init__(self, cache: Cache, app: Flask = None):
+        self.cache = cache
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        app.config.setdefault('COMPRESSION_ENABLED', True)
+        app.config.setdefault('COMPRESSION_ALGORITHMS', ('br', 'zstd', 'gzip', 'deflate'))
+        app.config.setdefault('COMPRESSION_LEVELS', DEFAULT_LEVELS)
+        app.config.setdefault('COMPRESSION_MIN_SIZE', 1024)
+        app.config.setdefault('COMPRESSION_MIMETYPES', ('application/json',))
+        app.config.setdefault('COMPRESSION_CACHE_TIMEOUT', 300)
+
+        unknown = set(app.config['COMPRESSION_ALGORITHMS']) - set(DEFAULT_LEVELS)
+        if unknown:
+            raise ValueError(f'Unknown COMPRESSION_ALGORITHMS {sorted(unknown)}, '
+                             f'expected some of {tuple(DEFAULT_LEVELS)}')
+        # the configured encodings whose module is installed, in order of preference
+        app.extensions['compression'] = tuple(name for name in app.config['COMPRESSION_ALGORITHMS']
+                                              if name in ENCODERS)
+        app.after_request(self._compress)
+
+    def _compress(self, response: Response) -> Response:
+        config = current_app.config
+        if (not config['COMPRESSION_ENABLED']
+                or response.status_code < 200 or response.status_code in UNCOMPRESSED_STATUS
+                or response.is_streamed or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or response.cache_control.no_transform
+                or response.mimetype not in config['COMPRESSION_MIMETYPES']
+                or (response.content_length or 0) < config['COMPRESSION_MIN_SIZE']):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = negotiate(request.accept_encodings, current_app.extensions['compression'])
+        if encoding is None:
+            return response
+
+        etag, weak = response.get_etag()
+        with phase('compress'):
+            body = self.encode(response.get_data(), encoding, None if weak else etag)
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        if etag is not None and not weak:
+            response.set_etag(encoded_etag(etag, encoding))
+        return response
+
+    def encode(self, body: bytes, encoding: str, etag: str = None) -> bytes:
+        """``body`` encoded with ``encoding``, cached when the representation has a strong ``etag``."""
+        level = current_app.config['COMPRESSION_LEVELS'].get(encoding, DEFAULT_LEVELS[encoding])
+        if etag is None:
+            return ENCODERS[encoding](body, level)
+        key = f'compressed:{encoded_etag(etag, encoding)}'
+        encoded = self.cache.get(key)
+        if encoded is None:
+            encoded = ENCODERS[encoding](body, level)
+            self.cache.set(key, encoded, timeout=current_app.config['COMPRESSION_CACHE_TIMEOUT'])
+        return encoded
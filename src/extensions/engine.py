@@ -0,0 +1,41 @@
+from flask import Flask, current_app
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import orm
+from sqlalchemy.engine import Engine
+
+from .pool_metrics import instrumented_pool_class
+from .replicas import ReplicaSet, RoutingSession
+
+
+class Database(SQLAlchemy):
+    """``SQLAlchemy`` extension creating engines with instrumented connection pools.
+
+    Sessions route reads to the read replicas listed in ``SQLALCHEMY_REPLICA_BINDS``, see :mod:`.replicas`.
+    """
+
+    def init_app(self, app: Flask):
+        app.config.setdefault('SQLALCHEMY_REPLICA_BINDS', ())
+        app.config.setdefault('SQLALCHEMY_REPLICA_MAX_LAG', 5)
+        app.config.setdefault('SQLALCHEMY_REPLICA_CHECK_INTERVAL', 5)
+        app.config.setdefault('SQLALCHEMY_REPLICA_LAG_QUERY', None)
+        super().init_app(app)
+
+        binds = tuple(app.config['SQLALCHEMY_REPLICA_BINDS'])
+        unknown = set(binds) - set(app.config.get('SQLALCHEMY_BINDS') or ())
+        if unknown:
+            raise ValueError(f'Replica binds {sorted(unknown)} are missing from SQLALCHEMY_BINDS')
+        app.extensions['replicas'] = ReplicaSet(self, app, binds,
+                                                max_lag=app.config['SQLALCHEMY_REPLICA_MAX_LAG'],
+                                                check_interval=app.config['SQLALCHEMY_REPLICA_CHECK_INTERVAL'],
+                                                lag_query=app.config['SQLALCHEMY_REPLICA_LAG_QUERY'])
+
+    @property
+    def replicas(self) -> ReplicaSet:
+        return current_app.extensions['replicas']
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+    def create_engine(self, sa_url, engine_opts) -> Engine:
+        pool_class = engine_opts.get('poolclass') or sa_url.get_dialect().get_pool_class(sa_url)
+        return super().create_engine(sa_url, dict(engine_opts, poolclass=instrumented_pool_class(pool_class)))
@@ -1,25 +1,32 @@
 from http import HTTPStatus
-from typing import Union
+from typing import Union, Dict
 
-from flask import make_response, Response, Flask
+from flask import Response, Flask
 from webargs import ValidationError
-from webargs.flaskparser import parser
-from werkzeug.exceptions import BadRequest
+from werkzeug.exceptions import BadRequest, HTTPException
 
-from src.extensions import jwt_manager
+from src.extensions import jwt_manager, json_serializer, revocation_store
+from src.extensions.parsing import parser
 
 AUTH_ERROR = 'Authentication failed'
 
 
 def error_response(message: Union[str, dict],
                    status_code: int,
+                   extra_headers: Dict[str, str] = None,
                    **additional_information: dict) -> Response:
     """Common error response to ensure that API error output has the same format"""
     common_struct = dict(error=message, status_code=status_code, additional_information=additional_information)
-    resp = make_response(common_struct, status_code)
+    resp = json_serializer.response(common_struct, status_code)
+    resp.headers.extend(extra_headers or {})
     return resp
 
 
+def retry_after_headers(e: HTTPException) -> Dict[str, str]:
+    retry_after = getattr(e, 'retry_after', None)
+    return {'Retry-After': str(retry_after)} if retry_after else {}
+
+
 def item_not_found_response(item_repr: str, searched_id: Union[str, int] = None) -> Response:
     if searched_id is not None:
         item_repr += f'(id: {searched_id!r})'
@@ -43,13 +50,25 @@ def register_exceptions_handles(app: Flask):
     def internal_error(e) -> Response:
         return error_response(str(e), HTTPStatus.INTERNAL_SERVER_ERROR)
 
+    @app.errorhandler(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+    def request_entity_too_large(e) -> Response:
+        return error_response(e.description, HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+
+    @app.errorhandler(HTTPStatus.TOO_MANY_REQUESTS)
+    def too_many_requests(e) -> Response:
+        return error_response(e.description, HTTPStatus.TOO_MANY_REQUESTS, extra_headers=retry_after_headers(e))
+
+    @app.errorhandler(HTTPStatus.SERVICE_UNAVAILABLE)
+    def service_unavailable(e) -> Response:
+        return error_response(e.description, HTTPStatus.SERVICE_UNAVAILABLE, extra_headers=retry_after_headers(e))
+
     @app.errorhandler(HTTPStatus.BAD_REQUEST)
     def bad_request(e) -> Response:
         return error_response(e.response, HTTPStatus.BAD_REQUEST)
 
     @parser.error_handler
     def handle_error(error: ValidationError, req, schema, *, error_status_code, error_headers):
-        error = error.messages.get('json')
+        error = error.messages.get('json') or error.messages.get('query') or error.messages
 
         raise BadRequest('Invalid args were passed', response=error)
 
@@ -64,3 +83,11 @@ def register_exceptions_handles(app: Flask):
     @jwt_manager.unauthorized_loader
     def no_jwt_is_present(*args) -> Response:
         return auth_error()
+
+    @jwt_manager.revoked_token_loader
+    def revoked_token_response(*args) -> Response:
+        return auth_error()
+
+    @jwt_manager.token_in_blocklist_loader
+    def is_token_revoked(jwt_header: dict, jwt_payload: dict) -> bool:
+        return revocation_store.is_revoked(jwt_payload['jti'])
@@ -0,0 +1,151 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional
+
+from flask import Flask, current_app
+from werkzeug.exceptions import ServiceUnavailable
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from .timing import phase
+
+SLOT_POLL_INTERVAL = 0.005
+
+
+class HashingPoolExhausted(ServiceUnavailable):
+    description = 'Password hashing capacity is exhausted, retry later'
+
+
+class HashingPool:
+    """Bounded worker pool running password hashing off the request thread.
+
+    At most ``workers + queue_size`` hashing jobs may be in flight; a caller that can not get a slot
+    within ``queue_timeout`` seconds is rejected with :class:`HashingPoolExhausted` (503 + Retry-After).
+    """
+
+    EXECUTORS = ('inline', 'thread', 'process')
+
+    def __init__(self, executor: str, workers: int, queue_size: int, queue_timeout: float, retry_after: int):
+        if executor not in self.EXECUTORS:
+            raise ValueError(f'Unknown hashing executor {executor!r}, expected one of {self.EXECUTORS}')
+        self.executor_type = executor
+        self.workers = workers
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> Executor:
+        # created lazily so that pre-forking servers do not share worker processes between children
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.executor_type == 'process':
+                        self._executor = ProcessPoolExecutor(self.workers,
+                                                             mp_context=multiprocessing.get_context('spawn'))
+                    else:
+                        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='password-hasher')
+        return self._executor
+
+    def submit(self, func: Callable, *args) -> Future:
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise HashingPoolExhausted(retry_after=self.retry_after)
+        return self._submit_acquired(func, *args)
+
+    def _submit_acquired(self, func: Callable, *args) -> Future:
+        try:
+            future = self.executor.submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, func: Callable, *args):
+        if self.executor_type == 'inline':
+            return func(*args)
+        return self.submit(func, *args).result()
+
+    async def run_async(self, func: Callable, *args):
+        """``run`` for coroutines, waiting for a slot and the result without blocking the event loop."""
+        if self.executor_type == 'inline':
+            return func(*args)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.queue_timeout
+        while not self._slots.acquire(blocking=False):
+            if loop.time() >= deadline:
+                raise HashingPoolExhausted(retry_after=self.retry_after)
+            await asyncio.sleep(SLOT_POLL_INTERVAL)
+        return await asyncio.wrap_future(self._submit_acquired(func, *args))
+
+    def map(self, func: Callable, *iterables: Iterable) -> List:
+        """Run ``func`` over the zipped arguments in parallel, results in input order."""
+        if self.executor_type == 'inline':
+            return [func(*args) for args in zip(*iterables)]
+        futures = []
+        try:
+            for args in zip(*iterables):
+                futures.append(self.submit(func, *args))
+        except HashingPoolExhausted:
+            for future in futures:
+                future.cancel()
+            raise
+        return [future.result() for future in futures]
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+class PasswordHasher:
+    """Flask extension routing password hashing through a per-app :class:`HashingPool`."""
+
+    def __init__(self, app: Flask = None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        app.config.setdefault('HASHING_EXECUTOR', 'thread')
+        app.config.setdefault('HASHING_WORKERS', multiprocessing.cpu_count())
+        app.config.setdefault('HASHING_QUEUE_SIZE', 32)
+        app.config.setdefault('HASHING_QUEUE_TIMEOUT', 0.5)
+        app.config.setdefault('HASHING_RETRY_AFTER', 1)
+
+        app.extensions['password_hasher'] = HashingPool(executor=app.config['HASHING_EXECUTOR'],
+                                                        workers=app.config['HASHING_WORKERS'],
+                                                        queue_size=app.config['HASHING_QUEUE_SIZE'],
+                                                        queue_timeout=app.config['HASHING_QUEUE_TIMEOUT'],
+                                                        retry_after=app.config['HASHING_RETRY_AFTER'])
+
+    @property
+    def pool(self) -> HashingPool:
+        return current_app.extensions['password_hasher']
+
+    def generate(self, password: str, method: str, salt_length: int = 16) -> str:
+        """Hash a password with the given werkzeug method string."""
+        with phase('hash'):
+            return self.pool.run(generate_password_hash, password, method, salt_length)
+
+    def generate_many(self, passwords: Iterable[str], method: str, salt_length: int = 16) -> List[str]:
+        """Hash several passwords in parallel on the pool."""
+        passwords = list(passwords)
+        with phase('hash'):
+            return self.pool.map(generate_password_hash, passwords, [method] * len(passwords),
+                                 [salt_length] * len(passwords))
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        """Check a password against a stored hash."""
+        with phase('hash'):
+            return self.pool.run(check_password_hash, password_hash, password)
+
+    async def generate_async(self, password: str, method: str, salt_length: int = 16) -> str:
+        with phase('hash'):
+            return await self.pool.run_async(generate_password_hash, password, method, salt_length)
+
+    async def verify_async(self, password_hash: str, password: str) -> bool:
+        with phase('hash'):
+            return await self.pool.run_async(check_password_hash, password_hash, password)
@@ -0,0 +1,116 @@
+"""Response caching for GET endpoints.
+
+Rendered responses are stored in the ``cache`` with a strong ``ETag`` (a hash of the body), keyed by path,
+query string, JWT identity and the current version of each tag the endpoint depends on. A request whose
+``If-None-Match`` matches the cached entry gets a ``304`` without running the view; any other hit is
+answered from the stored bytes. Revalidating with the ``ETag`` of a compressed variant (see
+:mod:`src.extensions.compression`) matches too.
+
+Tags are usually table names: ``CRUDMixin`` writes call :meth:`ResponseCache.invalidate` with the
+table of the model, which moves the tag to a new random version so every entry built on the old one
+is never looked up again and expires on its own.
+"""
+import hashlib
+import uuid
+from functools import wraps
+from typing import Dict, Optional, Sequence
+
+from flask import Flask, Response, current_app, request
+from flask_caching import Cache
+from flask_jwt_extended import get_jwt_identity
+from werkzeug.http import quote_etag
+
+from .compression import encoded_etags
+
+CACHEABLE_STATUS = 200
+
+
+def _identity() -> Optional[str]:
+    try:
+        identity = get_jwt_identity()
+    except RuntimeError:
+        return None
+    return None if identity is None else str(identity)
+
+
+def make_etag(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class ResponseCache:
+    """Flask extension caching GET responses in ``cache`` behind strong ETags."""
+
+    def __init__(self, cache: Cache, app: Flask = None):
+        self.cache = cache
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        app.config.setdefault('RESPONSE_CACHE_ENABLED', True)
+        app.config.setdefault('RESPONSE_CACHE_TIMEOUT', 30)
+
+    @staticmethod
+    def _tag_key(tag: str) -> str:
+        return f'response:tag:{tag}'
+
+    def _tag_versions(self, tags: Sequence[str]) -> Dict[str, str]:
+        keys = [self._tag_key(tag) for tag in tags]
+        versions = dict(zip(tags, self.cache.get_many(*keys)))
+        for tag, key in zip(tags, keys):
+            if versions[tag] is None:
+                # a version that was never set (or was evicted) must not match entries built on an older one
+                self.cache.add(key, uuid.uuid4().hex, timeout=0)
+                versions[tag] = self.cache.get(key)
+        return versions
+
+    def _key(self, tags: Sequence[str]) -> str:
+        versions = self._tag_versions(tags)
+        parts = [request.path, request.query_string.decode('latin-1'), _identity() or '',
+                 *(f'{tag}={versions[tag]}' for tag in tags)]
+        return 'response:' + hashlib.blake2b('\n'.join(parts).encode(), digest_size=16).hexdigest()
+
+    def invalidate(self, *tags: str):
+        if current_app.config.get('RESPONSE_CACHE_ENABLED'):
+            self.cache.set_many({self._tag_key(tag): uuid.uuid4().hex for tag in tags}, timeout=0)
+
+    @staticmethod
+    def _conditional(response: Response, etag: str) -> Response:
+        response.set_etag(etag)
+        response.vary.add('Authorization')
+        # clients revalidate with the ETag of the variant they got, compressed ones carry an encoding suffix
+        matched = next((tag for tag in (etag, *encoded_etags(etag)) if request.if_none_match.contains(tag)), None)
+        if matched is not None:
+            headers = dict(ETag=quote_etag(matched), Vary=response.headers['Vary'])
+            response = current_app.response_class(status=304, headers=headers)
+        return response
+
+    def cached(self, *tags: str, timeout: int = None):
+        """View decorator for GET routes, apply it below ``jwt_required`` so the identity is part of the key.
+
+        ``tags`` name what the response is built from (table names for ``CRUDMixin`` models).
+        """
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if request.method != 'GET' or not current_app.config['RESPONSE_CACHE_ENABLED']:
+                    return current_app.ensure_sync(view)(*args, **kwargs)
+
+                key = self._key(tags)
+                entry = self.cache.get(key)
+                if entry is not None:
+                    etag, body, mimetype = entry
+                    return self._conditional(current_app.response_class(body, mimetype=mimetype), etag)
+
+                response = current_app.make_response(current_app.ensure_sync(view)(*args, **kwargs))
+                if response.status_code != CACHEABLE_STATUS or response.is_streamed:
+                    return response
+                body = response.get_data()
+                etag = make_etag(body)
+                self.cache.set(key, (etag, body, response.mimetype),
+                               timeout=timeout if timeout is not None else current_app.config['RESPONSE_CACHE_TIMEOUT'])
+                return self._conditional(response, etag)
+
+            return wrapper
+
+        return decorator
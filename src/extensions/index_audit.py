@@ -0,0 +1,317 @@
+"""Index audit: redundant indexes, and hot statements whose plans scan whole tables.
+
+Statements are read from a query log, either the JSON lines :class:`QueryLog` appends to ``QUERY_LOG_PATH``
+or the ``SQLALCHEMY_ECHO`` output of the engine logger. The most executed ``SELECT`` / ``UPDATE`` /
+``DELETE`` statements are planned with ``EXPLAIN`` (``EXPLAIN QUERY PLAN`` on SQLite) using their logged
+parameters; a sequential scan over a table suggests an index on the columns the statement filters and sorts
+that table by, unless an existing index already leads with them.
+
+An index is redundant when its columns are a leading prefix of another index (the primary key and unique
+constraints included), or when it duplicates a unique one. Fixes for the live database can be written as
+an Alembic revision with :func:`write_migration`; Alembic is only imported then.
+"""
+import ast
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from flask import Flask, current_app, has_app_context
+from sqlalchemy import MetaData, UniqueConstraint, event, inspect
+from sqlalchemy.engine import Connection, Engine
+
+EXPLAINABLE = re.compile(r'^\s*(WITH|SELECT|UPDATE|DELETE)\b', re.IGNORECASE)
+ECHO_LOGGER = 'sqlalchemy.engine.Engine'
+ECHO_PARAMETERS = re.compile(r'^\[[^\]]*\]\s*(.*)$', re.DOTALL)
+ECHO_SKIPPED = {'BEGIN (implicit)', 'COMMIT', 'ROLLBACK'}
+SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?"?(\w+)"?(.*)$')
+
+
+class QueryLog:
+    """Flask extension appending the executed statements to ``QUERY_LOG_PATH``, one JSON object per line.
+
+    Parameters are logged as well, so only enable it where the data may be written to disk.
+    """
+
+    _lock = threading.Lock()
+    _listening = False
+
+    def __init__(self, app: Flask = None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        app.config.setdefault('QUERY_LOG_PATH', None)
+        if app.config['QUERY_LOG_PATH'] and not QueryLog._listening:
+            QueryLog._listening = True
+            event.listen(Engine, 'before_cursor_execute', self._before_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_execute)
+
+    @staticmethod
+    def _before_execute(connection, cursor, statement, parameters, context, executemany):
+        context.query_log_started = time.perf_counter()
+
+    @classmethod
+    def _after_execute(cls, connection, cursor, statement, parameters, context, executemany):
+        path = current_app.config.get('QUERY_LOG_PATH') if has_app_context() else None
+        started = getattr(context, 'query_log_started', None)
+        if not path or started is None:
+            return
+        entry = dict(statement=statement,
+                     parameters=parameters[0] if executemany and parameters else parameters,
+                     duration_ms=round((time.perf_counter() - started) * 1000, 3),
+                     dialect=connection.dialect.name)
+        line = json.dumps(entry, default=str)
+        with cls._lock, open(path, 'a') as log_file:
+            log_file.write(line + '\n')
+
+
+class LoggedStatement(NamedTuple):
+    statement: str
+    parameters: Any
+    duration_ms: Optional[float]
+
+
+def _literal(text: str) -> Any:
+    try:
+        return ast.literal_eval(text.strip()) if text.strip() else ()
+    except (ValueError, SyntaxError):
+        return None
+
+
+def parse_echo_log(lines: Iterable[str]) -> Iterator[LoggedStatement]:
+    """Statements of ``SQLALCHEMY_ECHO`` output, with the parameters logged after each one when readable."""
+    statement: Optional[List[str]] = None
+    for line in lines:
+        line = line.rstrip('\n')
+        marker = line.find(ECHO_LOGGER)
+        if marker < 0:
+            if statement is not None:
+                statement.append(line)
+            continue
+
+        message = line[marker + len(ECHO_LOGGER):].lstrip(': ')
+        parameters = ECHO_PARAMETERS.match(message)
+        if parameters and statement is not None:
+            yield LoggedStatement('\n'.join(statement), _literal(parameters.group(1)), None)
+            statement = None
+        elif not parameters:
+            if statement is not None:
+                yield LoggedStatement('\n'.join(statement), None, None)
+            statement = None if message in ECHO_SKIPPED else [message]
+    if statement is not None:
+        yield LoggedStatement('\n'.join(statement), None, None)
+
+
+def parse_query_log(lines: Iterable[str]) -> Iterator[LoggedStatement]:
+    """Statements of a :class:`QueryLog` file, or of echo output when the lines are not JSON."""
+    lines = iter(lines)
+    first = next(lines, '')
+    if not first.lstrip().startswith('{'):
+        yield from parse_echo_log([first, *lines])
+        return
+    for line in [first, *lines]:
+        if line.strip():
+            entry = json.loads(line)
+            yield LoggedStatement(entry['statement'], entry.get('parameters'), entry.get('duration_ms'))
+
+
+class StatementStats(NamedTuple):
+    statement: str
+    count: int
+    total_ms: Optional[float]
+    parameters: Any
+
+
+def hottest(statements: Iterable[LoggedStatement], top: int) -> List[StatementStats]:
+    """The ``top`` most executed statements, keeping the first readable parameters of each."""
+    counts, totals, parameters = Counter(), {}, {}
+    for logged in statements:
+        counts[logged.statement] += 1
+        if logged.duration_ms is not None:
+            totals[logged.statement] = totals.get(logged.statement, 0.0) + logged.duration_ms
+        if logged.parameters is not None:
+            parameters.setdefault(logged.statement, logged.parameters)
+    return [StatementStats(statement, count, totals.get(statement), parameters.get(statement))
+            for statement, count in counts.most_common(top)]
+
+
+class IndexInfo(NamedTuple):
+    table: str
+    name: Optional[str]
+    columns: Tuple[str, ...]
+    unique: bool
+    primary: bool = False
+
+
+def database_indexes(connection: Connection, tables: Sequence[str]) -> Dict[str, List[IndexInfo]]:
+    """Primary keys, unique constraints and indexes of ``tables`` as they exist in the database."""
+    inspector = inspect(connection)
+    indexes = {}
+    for table in tables:
+        found = []
+        primary_key = inspector.get_pk_constraint(table)
+        if primary_key.get('constrained_columns'):
+            found.append(IndexInfo(table, primary_key.get('name'), tuple(primary_key['constrained_columns']),
+                                   True, True))
+        found += [IndexInfo(table, constraint['name'], tuple(constraint['column_names']), True)
+                  for constraint in inspector.get_unique_constraints(table)]
+        found += [IndexInfo(table, index['name'], tuple(index['column_names']), bool(index['unique']))
+                  for index in inspector.get_indexes(table)
+                  if None not in index['column_names'] and not index.get('duplicates_constraint')]
+        indexes[table] = found
+    return indexes
+
+
+def model_indexes(metadata: MetaData) -> Dict[str, List[IndexInfo]]:
+    """Primary keys, unique constraints and indexes declared by the models."""
+    indexes = {}
+    for table in metadata.sorted_tables:
+        found = []
+        if table.primary_key.columns:
+            found.append(IndexInfo(table.name, table.primary_key.name,
+                                   tuple(column.name for column in table.primary_key.columns), True, True))
+        found += [IndexInfo(table.name, constraint.name, tuple(column.name for column in constraint.columns), True)
+                  for constraint in table.constraints if isinstance(constraint, UniqueConstraint)]
+        found += [IndexInfo(table.name, index.name, tuple(column.name for column in index.columns), index.unique)
+                  for index in table.indexes]
+        indexes[table.name] = found
+    return indexes
+
+
+def redundant_indexes(indexes: Sequence[IndexInfo]) -> List[Tuple[IndexInfo, IndexInfo]]:
+    """``(redundant, covered_by)`` pairs among the indexes of one table."""
+    found = []
+    for index in indexes:
+        if index.primary:
+            continue
+        for other in indexes:
+            if other is index or other.columns[:len(index.columns)] != index.columns:
+                continue
+            same = other.columns == index.columns
+            if index.unique and not (same and other.unique):
+                continue
+            # of two identical indexes only the later one is reported
+            if same and other.unique == index.unique and not other.primary and \
+                    indexes.index(other) > indexes.index(index):
+                continue
+            found.append((index, other))
+            break
+    return found
+
+
+class Scan(NamedTuple):
+    table: str
+    detail: str
+
+
+def sequential_scans(connection: Connection, statement: str, parameters: Any) -> Optional[List[Scan]]:
+    """Whole-table scans in the plan of ``statement``, ``None`` when this dialect is not supported."""
+    parameters = tuple(parameters) if isinstance(parameters, list) else parameters
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        plan = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters or ()).fetchall()
+        return [Scan(match.group(1), row[-1]) for row in plan
+                for match in [SQLITE_SCAN.match(row[-1])] if match and 'USING' not in match.group(2)]
+    if dialect == 'postgresql':
+        plan = connection.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {statement}', parameters or ()).scalar()
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+        scans, nodes = [], [plan[0]['Plan']]
+        while nodes:
+            node = nodes.pop()
+            if node.get('Node Type') == 'Seq Scan':
+                scans.append(Scan(node['Relation Name'], f'Seq Scan, {node.get("Plan Rows")} rows estimated'))
+            nodes += node.get('Plans', [])
+        return scans
+    return None
+
+
+def filter_columns(statement: str, table: str, columns: Sequence[str]) -> List[str]:
+    """Columns of ``table`` the statement filters on (equality ones first) and then sorts by."""
+    reference = rf'(?:"?{re.escape(table)}"?\.)?"?({"|".join(map(re.escape, columns))})"?\b'
+    where = re.search(r'\bWHERE\b(.*?)(?:\bGROUP BY\b|\bORDER BY\b|\bLIMIT\b|$)', statement, re.I | re.S)
+    order_by = re.search(r'\bORDER BY\b(.*?)(?:\bLIMIT\b|\bOFFSET\b|$)', statement, re.I | re.S)
+    equality, ranges = [], []
+    for match in re.finditer(reference + r'\s*(=|IN\b|IS\b|<|>|!=|LIKE\b|BETWEEN\b)?',
+                             where.group(1) if where else '', re.I):
+        (equality if (match.group(2) or '').upper() in ('=', 'IN', 'IS') else ranges).append(match.group(1))
+    sorts = [match.group(1) for match in re.finditer(reference, order_by.group(1) if order_by else '')]
+    ordered = []
+    for column in equality + ranges + sorts:
+        if column not in ordered:
+            ordered.append(column)
+    return ordered
+
+
+class StatementPlan(NamedTuple):
+    stats: StatementStats
+    scans: Optional[List[Scan]]
+    error: Optional[str]
+
+
+class AuditReport(NamedTuple):
+    plans: List[StatementPlan]
+    redundant: List[Tuple[IndexInfo, IndexInfo]]
+    model_redundant: List[Tuple[IndexInfo, IndexInfo]]
+    missing: List[IndexInfo]
+
+
+def audit(connection: Connection, metadata: MetaData, statements: Iterable[LoggedStatement],
+          top: int = 20) -> AuditReport:
+    tables = {table.name: [column.name for column in table.columns] for table in metadata.sorted_tables}
+    existing = database_indexes(connection, [table for table in tables if inspect(connection).has_table(table)])
+
+    plans, missing = [], []
+    for stats in hottest(statements, top):
+        if not EXPLAINABLE.match(stats.statement):
+            continue
+        if stats.parameters is None and ('?' in stats.statement or '%(' in stats.statement):
+            plans.append(StatementPlan(stats, None, 'parameters were not logged'))
+            continue
+        try:
+            scans = sequential_scans(connection, stats.statement, stats.parameters)
+        except Exception as e:  # a statement that cannot be planned here is reported, not fatal
+            plans.append(StatementPlan(stats, None, f'{type(e).__name__}: {e}'))
+            continue
+        plans.append(StatementPlan(stats, scans, None if scans is not None else 'EXPLAIN is not supported'))
+        for scan in scans or ():
+            columns = tuple(filter_columns(stats.statement, scan.table, tables.get(scan.table, ())))
+            if not columns or any(index.columns[0] == columns[0] for index in existing.get(scan.table, ())):
+                continue
+            suggestion = IndexInfo(scan.table, f'ix_{scan.table}_{"_".join(columns)}', columns, False)
+            if suggestion not in missing:
+                missing.append(suggestion)
+
+    redundant = [pair for indexes in existing.values() for pair in redundant_indexes(indexes)]
+    model_redundant = [pair for indexes in model_indexes(metadata).values() for pair in redundant_indexes(indexes)]
+    return AuditReport(plans, redundant, model_redundant, missing)
+
+
+def _create_index(index: IndexInfo) -> str:
+    return f'op.create_index({index.name!r}, {index.table!r}, {list(index.columns)!r}, unique={index.unique})'
+
+
+def _drop_index(index: IndexInfo) -> str:
+    return f'op.drop_index({index.name!r}, table_name={index.table!r})'
+
+
+def write_migration(directory: str, report: AuditReport, message: str = 'index audit') -> Optional[str]:
+    """Write an Alembic revision applying ``report`` to the database, returns its path (``None`` if empty)."""
+    redundant = [index for index, _ in report.redundant if index.name]
+    if not redundant and not report.missing:
+        return None
+
+    from alembic.script import ScriptDirectory
+    from alembic.util import rev_id
+
+    os.makedirs(os.path.join(directory, 'versions'), exist_ok=True)
+    scripts = ScriptDirectory(directory)
+    upgrades = [_drop_index(index) for index in redundant] + [_create_index(index) for index in report.missing]
+    downgrades = ([_drop_index(index) for index in reversed(report.missing)] +
+                  [_create_index(index) for index in reversed(redundant)])
+    script = scripts.generate_revision(rev_id(), message, head='head',
+                                       upgrades='\n    '.join(upgrades), downgrades='\n    '.join(downgrades))
+    return script.path
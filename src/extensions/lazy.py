@@ -0,0 +1,104 @@
+"""Extensions deferring their heavy imports until they are actually used.
+
+Flask-Migrate pulls in Alembic and Flask-Marshmallow pulls in marshmallow-sqlalchemy (plus ``distutils``
+through its version checks); together they are a large share of the app import time, although serving
+requests never needs Alembic and only needs marshmallow-sqlalchemy once a model schema is first used.
+"""
+from typing import Any, Callable, Optional, Type
+
+from flask import Flask
+from marshmallow import Schema
+
+
+class _LazyMigrateConfig:
+    """Placeholder for ``app.extensions['migrate']``, replaced by the real config on first access."""
+
+    def __init__(self, owner: 'LazyMigrate', app: Flask):
+        self._owner = owner
+        self._app = app
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._owner.load(self._app), name)
+
+
+class LazyMigrate:
+    """Drop-in for ``flask_migrate.Migrate`` importing it only when a ``flask db`` command runs."""
+
+    def __init__(self, app: Flask = None, db=None, directory: str = 'migrations', **kwargs):
+        self.db = db
+        self.directory = directory
+        self.kwargs = kwargs
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask, db=None, directory: str = None, **kwargs):
+        self.db = db or self.db
+        self.directory = directory or self.directory
+        self.kwargs.update(kwargs)
+        app.extensions['migrate'] = _LazyMigrateConfig(self, app)
+
+    def load(self, app: Flask):
+        """Initialize Flask-Migrate for ``app`` and return its migrate config."""
+        config = app.extensions.get('migrate')
+        if isinstance(config, _LazyMigrateConfig):
+            from flask_migrate import Migrate
+
+            Migrate(app, self.db, self.directory, **self.kwargs)
+            config = app.extensions['migrate']
+        return config
+
+
+class LazySchema:
+    """Stand-in for a schema class built by ``build`` the first time it is instantiated or inspected."""
+
+    def __init__(self, build: Callable[[], Type[Schema]]):
+        self._build = build
+        self._schema: Optional[Type[Schema]] = None
+
+    @property
+    def schema(self) -> Type[Schema]:
+        if self._schema is None:
+            self._schema = self._build()
+        return self._schema
+
+    def __call__(self, *args, **kwargs) -> Schema:
+        return self.schema(*args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.schema, name)
+
+
+class LazyMarshmallow:
+    """Drop-in for ``flask_marshmallow.Marshmallow`` importing Flask-Marshmallow on first SQLAlchemy schema.
+
+    Plain schemas are ``marshmallow.Schema``; build model schemas inside a :meth:`lazy_schema` function.
+    """
+
+    Schema = Schema
+
+    def __init__(self, app: Flask = None, db=None):
+        self.db = db
+        self._marshmallow = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        app.extensions['flask-marshmallow'] = self
+
+    def _load(self):
+        if self._marshmallow is None:
+            from flask_marshmallow import Marshmallow
+
+            marshmallow = Marshmallow()
+            for schema in (marshmallow.SQLAlchemySchema, marshmallow.SQLAlchemyAutoSchema):
+                schema.OPTIONS_CLASS.session = self.db.session
+            self._marshmallow = marshmallow
+        return self._marshmallow
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._load(), name)
+
+    @staticmethod
+    def lazy_schema(build: Callable[[], Type[Schema]]) -> LazySchema:
+        """Decorator turning a function that defines and returns a schema class into a :class:`LazySchema`."""
+        return LazySchema(build)
@@ -0,0 +1,107 @@
+"""Read-through cache for model lookups by primary key.
+
+Hits are stored as plain column snapshots (so any cache backend can hold them) and re-attached to the
+current session without a database round-trip, unless the session already holds the instance: that one is
+returned as is. Misses are cached too, under a shorter timeout, so repeated lookups of absent keys stop
+reaching the database.
+
+The cache is filled from the primary, never from a read replica: a lagging replica would otherwise keep
+a stale row (or a miss) cached for the whole timeout, long after the replica caught up.
+"""
+from typing import Any, Dict, Iterable, Optional, Type
+
+from flask import current_app
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from . import async_database, cache, database
+
+MISS = '__lookup_miss__'
+
+
+def _identity(pk: Any) -> tuple:
+    return pk if isinstance(pk, tuple) else (pk,)
+
+
+def lookup_key(model: Type[database.Model], pk: Any) -> str:
+    return f'lookup:{model.__tablename__}:' + ':'.join(str(value) for value in _identity(pk))
+
+
+def _snapshot(instance: database.Model) -> Dict[str, Any]:
+    return {attr.key: getattr(instance, attr.key) for attr in inspect(instance).mapper.column_attrs}
+
+
+def _in_session(model: Type[database.Model], pk: Any) -> Optional[database.Model]:
+    # the session copy may carry changes not flushed yet, a snapshot must never overwrite them
+    return database.session.identity_map.get(inspect(model).identity_key_from_primary_key(_identity(pk)))
+
+
+def _restore(model: Type[database.Model], snapshot: Dict[str, Any]) -> database.Model:
+    instance = model(**snapshot)
+    make_transient_to_detached(instance)
+    return database.session.merge(instance, load=False)
+
+
+def enabled() -> bool:
+    return current_app.config.get('LOOKUP_CACHE_ENABLED', False)
+
+
+def cached_get(model: Type[database.Model], pk: Any) -> Optional[database.Model]:
+    """``model.query.get(pk)`` behind the configured ``cache``, misses loaded from the primary."""
+    if not enabled():
+        return model.query.get(pk)
+    instance = _in_session(model, pk)
+    if instance is not None:
+        return instance
+
+    key = lookup_key(model, pk)
+    cached = cache.get(key)
+    if cached == MISS:
+        return None
+    if cached is not None:
+        return _restore(model, cached)
+
+    with database.session().primary_reads():
+        instance = model.query.get(pk)
+    if instance is None:
+        cache.set(key, MISS, timeout=current_app.config.get('LOOKUP_CACHE_NEGATIVE_TIMEOUT'))
+    else:
+        cache.set(key, _snapshot(instance), timeout=current_app.config.get('LOOKUP_CACHE_TIMEOUT'))
+    return instance
+
+
+async def cached_get_async(model: Type[database.Model], pk: Any) -> Optional[database.Model]:
+    """``cached_get`` for coroutines, a miss is loaded through the asyncio engine.
+
+    The instance is returned attached to the (sync) scoped session like a cache hit, without a query. A
+    replica serves the lookup only when the result is not cached.
+    """
+    instance = _in_session(model, pk)
+    if instance is not None:
+        return instance
+
+    key = lookup_key(model, pk)
+    cached = cache.get(key) if enabled() else None
+    if cached == MISS:
+        return None
+    if cached is not None:
+        return _restore(model, cached)
+
+    async with async_database.session(read_only=not enabled()) as session:
+        instance = await session.get(model, pk)
+    snapshot = _snapshot(instance) if instance is not None else None
+    if enabled():
+        cache.set(key, snapshot or MISS, timeout=current_app.config.get(
+            'LOOKUP_CACHE_TIMEOUT' if snapshot else 'LOOKUP_CACHE_NEGATIVE_TIMEOUT'))
+    return _restore(model, snapshot) if snapshot is not None else None
+
+
+def invalidate(model: Type[database.Model], pks: Iterable[Any]):
+    if enabled():
+        cache.delete_many(*(lookup_key(model, pk) for pk in pks))
+
+
+def invalidate_instance(instance: database.Model):
+    state = inspect(instance)
+    identity = state.identity or tuple(state.mapper.primary_key_from_instance(instance))
+    invalidate(type(instance), [identity])
@@ -1,6 +1,110 @@
+import base64
+import datetime
+import decimal
+import json
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence
+
+from flask import current_app
 from flask_sqlalchemy import Model
+from sqlalchemy import event, inspect, tuple_, update
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy.orm.attributes import set_committed_value
+from werkzeug.utils import import_string
+
+from . import async_database, database, lookup_cache, response_cache
+
+
+class KeysetPage(NamedTuple):
+    items: List[Any]
+    next_cursor: Optional[str]
+
+
+def encode_cursor(values: Iterable[Any]) -> str:
+    """Opaque pagination cursor holding the sort key values of the last row of a page."""
+    payload = json.dumps([value.isoformat() if isinstance(value, (datetime.date, datetime.time)) else
+                          str(value) if isinstance(value, decimal.Decimal) else value for value in values])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, columns: List[database.Column]) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except ValueError as e:
+        raise ValueError(f'Malformed cursor {cursor!r}') from e
+    if not isinstance(values, list) or len(values) != len(columns) \
+            or not all(value is None or isinstance(value, (str, int, float)) for value in values):
+        raise ValueError(f'Malformed cursor {cursor!r}')
+
+    decoded = []
+    for column, value in zip(columns, values):
+        python_type = column.type.python_type
+        if value is not None and python_type in (datetime.datetime, datetime.date, datetime.time):
+            value = python_type.fromisoformat(value)
+        elif value is not None and python_type is decimal.Decimal:
+            value = decimal.Decimal(value)
+        decoded.append(value)
+    return decoded
+
+
+def chunked(items: Sequence[Any], size: int) -> Iterator[Sequence[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class PendingInvalidation:
+    """Cache entries of the rows written by the current transaction of a session.
+
+    They are dropped once the transaction commits and forgotten if it rolls back: dropping them any
+    earlier would let a concurrent request cache the old row again for the whole cache timeout.
+    """
+
+    INFO_KEY = 'pending_invalidation'
+
+    def __init__(self):
+        self.keys: Dict[type, set] = {}
+        self.instances: List[Any] = []
+
+    @classmethod
+    def of(cls, session: Session) -> 'PendingInvalidation':
+        return session.info.setdefault(cls.INFO_KEY, cls())
+
+    def add(self, model: type, pks: Iterable[Any]):
+        self.keys.setdefault(model, set()).update(pks)
+
+    def add_instance(self, instance: Any):
+        # primary keys generated on insert are only known once flushed
+        self.instances.append(instance)
 
-from . import database
+    def apply(self):
+        for instance in self.instances:
+            identity = inspect(instance).identity
+            self.add(type(instance), [identity] if identity is not None else [])
+        for model, pks in self.keys.items():
+            lookup_cache.invalidate(model, pks)
+        if self.keys:
+            response_cache.invalidate(*{model.__tablename__ for model in self.keys})
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed(session: Session):
+    # a released savepoint is not committed yet
+    if not session.in_nested_transaction():
+        pending = session.info.pop(PendingInvalidation.INFO_KEY, None)
+        if pending is not None:
+            pending.apply()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back(session: Session):
+    if not session.in_nested_transaction():
+        session.info.pop(PendingInvalidation.INFO_KEY, None)
+
+
+# imported on first upsert, only the dialect of the bound engine is ever needed
+UPSERT_DIALECTS = {
+    'postgresql': 'sqlalchemy.dialects.postgresql.insert',
+    'sqlite': 'sqlalchemy.dialects.sqlite.insert',
+}
 
 
 class CRUDMixin(Model):
@@ -14,15 +118,154 @@ class CRUDMixin(Model):
             return instance
         return instance.save()
 
+    @classmethod
+    def get(cls, pk):
+        """Get record by primary key, served from the lookup cache when possible."""
+        return lookup_cache.cached_get(cls, pk)
+
+    @classmethod
+    async def get_async(cls, pk):
+        """``get`` for async views, a cache miss is loaded through the asyncio engine."""
+        return await lookup_cache.cached_get_async(cls, pk)
+
+    @classmethod
+    def keyset_page(cls,
+                    cursor: str = None,
+                    limit: int = 50,
+                    order_by: str = None,
+                    fields: Iterable[str] = None,
+                    query=None) -> KeysetPage:
+        """Cursor (keyset) pagination over an indexed column, ties broken by the primary key.
+
+        Rows after ``cursor`` are fetched with a ``WHERE (order_by, pk) > (...)`` range scan instead of
+        an offset, so deep pages cost the same as the first one. ``fields`` limits the loaded columns.
+        """
+        mapper = inspect(cls)
+        if len(mapper.primary_key) != 1:
+            raise ValueError(f'{cls.__name__} must have a single column primary key for keyset pagination')
+        primary_key = mapper.primary_key[0]
+        order_column = mapper.columns[order_by] if order_by else primary_key
+        sort_columns = [order_column] if order_column is primary_key else [order_column, primary_key]
+        sort_keys = [mapper.get_property_by_column(column).key for column in sort_columns]
+
+        query = query if query is not None else cls.query
+        if fields:
+            unknown = set(fields) - set(mapper.column_attrs.keys())
+            if unknown:
+                raise ValueError(f'Unknown fields {sorted(unknown)} for {cls.__name__}')
+            query = query.options(load_only(*{*fields, *sort_keys}))
+        if cursor:
+            query = query.filter(tuple_(*sort_columns) > tuple_(*decode_cursor(cursor, sort_columns)))
+
+        items = query.order_by(*sort_columns).limit(limit + 1).all()
+        if len(items) <= limit:
+            return KeysetPage(items, None)
+        items = items[:limit]
+        return KeysetPage(items, encode_cursor(getattr(items[-1], key) for key in sort_keys))
+
+    @classmethod
+    def _bulk_chunk_size(cls, chunk_size: Optional[int]) -> int:
+        return chunk_size or current_app.config.get('BULK_CHUNK_SIZE', 1000)
+
+    @classmethod
+    def _primary_keys(cls, rows: Iterable[Dict[str, Any]]) -> List[tuple]:
+        keys = [column.key for column in inspect(cls).primary_key]
+        # rows relying on a generated key (autoincrement) can not have been cached yet
+        return [tuple(row[key] for key in keys) for row in rows if all(key in row for key in keys)]
+
+    @classmethod
+    def bulk_create(cls, rows: Sequence[Dict[str, Any]], chunk_size: int = None, commit: bool = True) -> int:
+        """Insert rows (dicts keyed by column, all with the same keys) with one executemany per chunk."""
+        for chunk in chunked(rows, cls._bulk_chunk_size(chunk_size)):
+            database.session.execute(cls.__table__.insert(), chunk)
+        PendingInvalidation.of(database.session()).add(cls, cls._primary_keys(rows))
+        if commit:
+            database.session.commit()
+        return len(rows)
+
+    @classmethod
+    def bulk_upsert(cls,
+                    rows: Sequence[Dict[str, Any]],
+                    chunk_size: int = None,
+                    commit: bool = True,
+                    update_columns: Iterable[str] = None) -> int:
+        """Insert rows, updating the ones whose primary key already exists.
+
+        Only ``update_columns`` (every non key column of the rows by default) are overwritten on existing
+        rows, the other columns are written on insert only. Uses ``INSERT ... ON CONFLICT DO UPDATE`` on
+        Postgres and SQLite, and falls back to per-row lookups (still one flush per chunk) on other databases.
+        """
+        if not rows:
+            return 0
+        table = cls.__table__
+        insert = UPSERT_DIALECTS.get(database.session().get_bind(mapper=inspect(cls)).dialect.name)
+        insert = import_string(insert) if insert is not None else None
+        primary_keys = [column.name for column in table.primary_key]
+        updated_keys = [key for key in (rows[0] if update_columns is None else update_columns)
+                        if key not in primary_keys]
+        for chunk in chunked(rows, cls._bulk_chunk_size(chunk_size)):
+            if insert is None:
+                for row in chunk:
+                    existing = database.session.get(cls, tuple(row[key] for key in primary_keys))
+                    if existing is None:
+                        database.session.add(cls(**row))
+                    else:
+                        for key in updated_keys:
+                            setattr(existing, key, row[key])
+                database.session.flush()
+                continue
+            statement = insert(table)
+            updated = {key: statement.excluded[key] for key in updated_keys}
+            statement = (statement.on_conflict_do_update(index_elements=primary_keys, set_=updated) if updated else
+                         statement.on_conflict_do_nothing(index_elements=primary_keys))
+            database.session.execute(statement, chunk)
+        PendingInvalidation.of(database.session()).add(cls, cls._primary_keys(rows))
+        if commit:
+            database.session.commit()
+        return len(rows)
+
+    @classmethod
+    def bulk_delete(cls, pks: Sequence[Any], chunk_size: int = None, commit: bool = True) -> int:
+        """Delete rows by primary key, one ``DELETE ... WHERE pk IN (...)`` per chunk. Returns deleted count."""
+        primary_key = inspect(cls).primary_key
+        if len(primary_key) != 1:
+            raise ValueError(f'{cls.__name__} must have a single column primary key for bulk delete')
+        deleted = 0
+        for chunk in chunked(pks, cls._bulk_chunk_size(chunk_size)):
+            deleted += database.session.execute(cls.__table__.delete().where(primary_key[0].in_(chunk))).rowcount
+        PendingInvalidation.of(database.session()).add(cls, pks)
+        if commit:
+            database.session.commit()
+        return deleted
+
     def update(self, commit=True, **kwargs):
         """Update specific fields of a record."""
         for attr, value in kwargs.items():
             setattr(self, attr, value)
+        PendingInvalidation.of(database.session()).add_instance(self)
         return commit and self.save() or self
 
+    async def update_async(self, **kwargs):
+        """Update specific fields of a record with one ``UPDATE`` through the asyncio engine."""
+        model, mapper = type(self), inspect(self).mapper
+        keys = [mapper.get_property_by_column(column).key for column in mapper.primary_key]
+        statement = (update(model)
+                     .where(*(getattr(model, key) == getattr(self, key) for key in keys))
+                     .values(**kwargs)
+                     .execution_options(synchronize_session=False))
+        async with async_database.session() as session:
+            await session.execute(statement)
+            await session.commit()
+        for attr, value in kwargs.items():
+            set_committed_value(self, attr, value)
+        lookup_cache.invalidate_instance(self)
+        response_cache.invalidate(self.__tablename__)
+        return self
+
     def save(self, commit=True):
         """Save the record."""
         database.session.add(self)
+        PendingInvalidation.of(database.session()).add_instance(self)
         if commit:
             database.session.commit()
         return self
@@ -30,6 +273,7 @@ class CRUDMixin(Model):
     def delete(self, commit=True):
         """Remove the record from the database."""
         database.session.delete(self)
+        PendingInvalidation.of(database.session()).add_instance(self)
         return commit and database.session.commit()
 
 
@@ -48,4 +292,4 @@ class SurrogatePK(object):
         """Get record by ID."""
         if any((isinstance(record_id, (str, bytes)) and record_id.isdigit(),
                 isinstance(record_id, (int, float)))):
-            return cls.query.get(int(record_id))
+            return lookup_cache.cached_get(cls, int(record_id))
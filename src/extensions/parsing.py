@@ -0,0 +1,37 @@
+"""Application-wide webargs parser, use its ``use_args`` in endpoints."""
+import inspect
+from functools import wraps
+
+from webargs.flaskparser import FlaskParser
+
+from .timing import phase
+
+
+class Parser(FlaskParser):
+    """``FlaskParser`` recording the time spent parsing and validating request arguments."""
+
+    def parse(self, *args, **kwargs):
+        with phase('args'):
+            return super().parse(*args, **kwargs)
+
+    def use_args(self, *args, **kwargs):
+        """``use_args`` also accepting ``async def`` views, their arguments are still parsed synchronously."""
+        decorator = super().use_args(*args, **kwargs)
+
+        def async_aware_decorator(func):
+            wrapped = decorator(func)
+            if not inspect.iscoroutinefunction(func):
+                return wrapped
+
+            @wraps(wrapped)
+            async def wrapper(*view_args, **view_kwargs):
+                return await wrapped(*view_args, **view_kwargs)
+
+            return wrapper
+
+        return async_aware_decorator
+
+
+parser = Parser()
+use_args = parser.use_args
+use_kwargs = parser.use_kwargs
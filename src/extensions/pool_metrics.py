@@ -0,0 +1,126 @@
+"""Connection pool instrumentation.
+
+Every engine pool is created as an instrumented subclass of the pool class SQLAlchemy would pick anyway,
+recording how long checkouts wait for a connection, checkout timeouts, and in-use / overflow counts.
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Type
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import Pool
+
+
+class PoolStats:
+    """Per-pool counters, safe to update from request threads."""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=window)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self._waits.append(seconds)
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def record_checkout(self):
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def record_checkin(self):
+        with self._lock:
+            self.in_use = max(0, self.in_use - 1)
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def record_invalidation(self):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._waits)
+            waited = len(waits)
+
+            def wait_percentile(pct: float) -> float:
+                return round(waits[min(waited - 1, int(pct / 100 * waited))] * 1000, 3) if waited else 0.0
+
+            return dict(checkouts=self.checkouts,
+                        timeouts=self.timeouts,
+                        connects=self.connects,
+                        invalidations=self.invalidations,
+                        in_use=self.in_use,
+                        peak_in_use=self.peak_in_use,
+                        wait_ms=dict(total=round(self.wait_total * 1000, 3),
+                                     max=round(self.wait_max * 1000, 3),
+                                     p50=wait_percentile(50),
+                                     p99=wait_percentile(99)))
+
+
+class InstrumentedPoolMixin:
+    """Times ``_do_get`` (the part of a checkout that may wait on a full pool) and counts pool events."""
+
+    stats: PoolStats
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+        event.listen(self, 'checkout', lambda *_: self.stats.record_checkout())
+        event.listen(self, 'checkin', lambda *_: self.stats.record_checkin())
+        event.listen(self, 'connect', lambda *_: self.stats.record_connect())
+        event.listen(self, 'invalidate', lambda *_: self.stats.record_invalidation())
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_timeout()
+            raise
+        finally:
+            self.stats.record_wait(time.perf_counter() - started)
+
+
+_instrumented_classes: Dict[Type[Pool], Type[Pool]] = {}
+
+
+def instrumented_pool_class(pool_class: Type[Pool]) -> Type[Pool]:
+    if issubclass(pool_class, InstrumentedPoolMixin):
+        return pool_class
+    if pool_class not in _instrumented_classes:
+        _instrumented_classes[pool_class] = type(f'Instrumented{pool_class.__name__}',
+                                                 (InstrumentedPoolMixin, pool_class),
+                                                 dict(base_pool_class=pool_class))
+    return _instrumented_classes[pool_class]
+
+
+def pool_status(pool: Pool) -> Dict[str, Any]:
+    status = dict(pool_class=getattr(pool, 'base_pool_class', type(pool)).__name__)
+    for name in ('size', 'checkedout', 'overflow', 'checkedin'):
+        method = getattr(pool, name, None)
+        if callable(method):
+            status[name] = method()
+    timeout = getattr(pool, 'timeout', None)
+    if callable(timeout):
+        status['timeout'] = timeout()
+    if isinstance(pool, InstrumentedPoolMixin):
+        status.update(pool.stats.snapshot())
+    return status
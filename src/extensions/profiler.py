@@ -0,0 +1,134 @@
+"""Opt-in sampling profiler for single requests.
+
+A request is profiled when it is picked by ``PROFILER_SAMPLE_RATE`` or carries an ``X-Profile-Token``
+header signed with ``SECRET_KEY`` (see :func:`make_profile_token`). A background thread samples the
+request thread's stack every ``PROFILER_INTERVAL`` seconds; the collapsed stacks (``a;b;c <count>``
+lines, the flamegraph input format) are stored in the ``cache`` at the end of the request, under the id
+returned in the ``X-Profile-Id`` response header. Requests that are not picked only pay for the rate and header check.
+"""
+import random
+import sys
+import threading
+import uuid
+from collections import Counter
+from typing import Optional
+
+from flask import Flask, Response, current_app, g, request
+from flask_caching import Cache
+from itsdangerous import BadSignature, TimestampSigner
+
+PROFILE_TOKEN_HEADER = 'X-Profile-Token'
+PROFILE_ID_HEADER = 'X-Profile-Id'
+PROFILE_TOKEN_SALT = 'request-profiler'
+
+
+def _signer() -> TimestampSigner:
+    return TimestampSigner(current_app.config['SECRET_KEY'], salt=PROFILE_TOKEN_SALT)
+
+
+def make_profile_token() -> str:
+    """Token for the ``X-Profile-Token`` header, valid for ``PROFILER_TOKEN_MAX_AGE`` seconds."""
+    return _signer().sign(uuid.uuid4().hex).decode()
+
+
+def has_profile_token() -> bool:
+    """Whether the request carries a valid ``X-Profile-Token``, which only internal callers are given."""
+    token = request.headers.get(PROFILE_TOKEN_HEADER)
+    if token is None:
+        return False
+    try:
+        _signer().unsign(token, max_age=current_app.config['PROFILER_TOKEN_MAX_AGE'])
+        return True
+    except BadSignature:
+        return False
+
+
+def profile_key(profile_id: str) -> str:
+    return f'profile:{profile_id}'
+
+
+class StackSampler(threading.Thread):
+    """Samples the stack of one thread until stopped, counting identical stacks."""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name='request-profiler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    def sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f'{code.co_name} ({code.co_filename}:{code.co_firstlineno})')
+            frame = frame.f_back
+        if stack:
+            self.stacks[';'.join(reversed(stack))] += 1
+
+    def run(self):
+        self.sample()
+        while not self._stopped.wait(self.interval):
+            self.sample()
+
+    def stop(self) -> str:
+        self._stopped.set()
+        self.join()
+        return '\n'.join(f'{stack} {count}' for stack, count in self.stacks.most_common())
+
+
+class RequestProfiler:
+    """Flask extension running picked requests under a :class:`StackSampler`, results go to ``cache``."""
+
+    def __init__(self, cache: Cache, app: Flask = None):
+        self.cache = cache
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        app.config.setdefault('PROFILER_ENABLED', False)
+        app.config.setdefault('PROFILER_SAMPLE_RATE', 0.0)
+        app.config.setdefault('PROFILER_INTERVAL', 0.005)
+        app.config.setdefault('PROFILER_TOKEN_MAX_AGE', 3600)
+        app.config.setdefault('PROFILER_RESULT_TIMEOUT', 3600)
+
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._stop)
+
+    @staticmethod
+    def _picked() -> bool:
+        config = current_app.config
+        if not config['PROFILER_ENABLED']:
+            return False
+        if PROFILE_TOKEN_HEADER in request.headers:
+            return has_profile_token()
+        return config['PROFILER_SAMPLE_RATE'] > 0 and random.random() < config['PROFILER_SAMPLE_RATE']
+
+    def _start(self):
+        if self._picked():
+            g._profiler = StackSampler(threading.get_ident(), current_app.config['PROFILER_INTERVAL'])
+            g._profiler.start()
+
+    @staticmethod
+    def _finish(response: Response) -> Response:
+        if '_profiler' in g:
+            g._profile_id = uuid.uuid4().hex
+            response.headers[PROFILE_ID_HEADER] = g._profile_id
+        return response
+
+    def _stop(self, exc: Optional[BaseException]):
+        # teardown runs even when the view or an after_request hook raised, so the sampler never outlives
+        # its request; the profile is only stored for requests that produced a response
+        sampler: Optional[StackSampler] = g.pop('_profiler', None)
+        if sampler is None:
+            return
+        stacks = sampler.stop()
+        profile_id = g.pop('_profile_id', None)
+        if profile_id is not None:
+            self.cache.set(profile_key(profile_id), dict(endpoint=request.endpoint, path=request.path, stacks=stacks),
+                           timeout=current_app.config['PROFILER_RESULT_TIMEOUT'])
+
+    def get_profile(self, profile_id: str) -> Optional[dict]:
+        return self.cache.get(profile_key(profile_id))
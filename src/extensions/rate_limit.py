@@ -0,0 +1,178 @@
+"""Request rate limiting.
+
+Limits are sliding windows approximated from two fixed-window counters: the count of the previous window,
+weighted by how much of it still overlaps the sliding window, plus the count of the current one. With a
+Redis ``cache`` backend the check-and-increment is a single Lua script, so all workers share the counters
+atomically; with any other backend (dev, tests) the counters are kept in process memory.
+
+Rejected requests raise :class:`~werkzeug.exceptions.TooManyRequests` with ``retry_after`` set, before the
+view (and its argument parsing) runs.
+"""
+import math
+import threading
+import time
+from functools import wraps
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+from flask import Flask, current_app, request
+from flask_caching import Cache
+from werkzeug.exceptions import TooManyRequests
+
+KeyFunc = Callable[[], Optional[str]]
+
+SLIDING_WINDOW_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+if previous * tonumber(ARGV[1]) + current >= tonumber(ARGV[2]) then
+    return 0
+end
+if redis.call('INCR', KEYS[1]) == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+end
+return 1
+"""
+
+
+def _window(window: int, now: float) -> Tuple[int, float]:
+    """Index of the fixed window ``now`` falls in and the weight of the previous window."""
+    index = int(now // window)
+    return index, 1 - (now - index * window) / window
+
+
+def _retry_after(window: int, now: float) -> int:
+    return max(1, math.ceil((int(now // window) + 1) * window - now))
+
+
+class MemoryBackend:
+    """Per-process counters, for development and tests.
+
+    Counters are keyed by ``(key, window seconds, window index)``. Expired ones are dropped at most once
+    every ``cleanup_interval`` seconds, each against the window size it was counted in.
+    """
+
+    def __init__(self, cleanup_interval: float = 60):
+        self.cleanup_interval = cleanup_interval
+        self._counters: Dict[Tuple[str, int, int], int] = {}
+        self._cleaned_at = float('-inf')
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, limit: int, window: int, now: float) -> bool:
+        index, weight = _window(window, now)
+        with self._lock:
+            current = self._counters.get((key, window, index), 0)
+            if self._counters.get((key, window, index - 1), 0) * weight + current >= limit:
+                return False
+            self._counters[(key, window, index)] = current + 1
+            if now - self._cleaned_at >= self.cleanup_interval:
+                self._cleaned_at = now
+                self._expire(now)
+        return True
+
+    def _expire(self, now: float):
+        # a counter only matters while its window is the current or the previous one
+        for stale in [counter for counter in self._counters if counter[2] < now // counter[1] - 1]:
+            del self._counters[stale]
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+
+
+class RedisBackend:
+    """Counters shared through the Redis client of the ``cache`` backend."""
+
+    def __init__(self, client, key_prefix: str = ''):
+        self.client = client
+        self.key_prefix = key_prefix
+        self._script = client.register_script(SLIDING_WINDOW_SCRIPT)
+
+    def hit(self, key: str, limit: int, window: int, now: float) -> bool:
+        index, weight = _window(window, now)
+        keys = [f'{self.key_prefix}ratelimit:{key}:{index}', f'{self.key_prefix}ratelimit:{key}:{index - 1}']
+        return bool(self._script(keys=keys, args=[weight, limit, 2 * window]))
+
+    def reset(self):
+        pass
+
+
+def remote_addr() -> Optional[str]:
+    return f'ip:{request.remote_addr}'
+
+
+def json_field(name: str) -> KeyFunc:
+    """Key on a field of the JSON body, read without validating it (``use_args`` still does that)."""
+
+    def key() -> Optional[str]:
+        body = request.get_json(silent=True)
+        value = body.get(name) if isinstance(body, dict) else None
+        return f'{name}:{value.strip().lower()}' if isinstance(value, str) and value else None
+
+    return key
+
+
+class RateLimiter:
+    """Flask extension applying per-key request limits, counters kept in ``cache`` when it is Redis."""
+
+    def __init__(self, cache: Cache, app: Flask = None):
+        self.cache = cache
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        app.config.setdefault('RATELIMIT_ENABLED', True)
+        app.config.setdefault('RATELIMIT_STORAGE', 'auto')
+
+        storage = app.config['RATELIMIT_STORAGE']
+        if storage not in ('auto', 'redis', 'memory'):
+            raise ValueError(f'Unknown RATELIMIT_STORAGE {storage!r}, expected "auto", "redis" or "memory"')
+        app.extensions['rate_limiter'] = self._backend(app, storage)
+
+    def _backend(self, app: Flask, storage: str):
+        if storage == 'memory':
+            return MemoryBackend()
+        backend = app.extensions.get('cache', {}).get(self.cache)
+        backend = getattr(backend, 'remote', backend)
+        client = getattr(backend, '_write_client', None)
+        if client is not None:
+            return RedisBackend(client, getattr(backend, 'key_prefix', ''))
+        if storage == 'redis':
+            raise RuntimeError('RATELIMIT_STORAGE is set to "redis" but the cache backend is not Redis')
+        return MemoryBackend()
+
+    @property
+    def backend(self):
+        return current_app.extensions['rate_limiter']
+
+    def hit(self, scope: str, limits: Sequence[Tuple[KeyFunc, str]]):
+        """Count the current request against each ``(key function, config name)`` limit of ``scope``.
+
+        Config values are ``(limit, window seconds)`` pairs; a key function returning ``None`` skips its
+        limit. Raises ``TooManyRequests`` on the first limit that is exceeded.
+        """
+        config = current_app.config
+        if not config['RATELIMIT_ENABLED']:
+            return
+        now = time.time()
+        for key_func, config_name in limits:
+            key = key_func()
+            if key is None:
+                continue
+            limit, window = config[config_name]
+            if not self.backend.hit(f'{scope}:{key}', limit, window, now):
+                raise TooManyRequests(retry_after=_retry_after(window, now))
+
+    def limit(self, scope: str, *limits: Tuple[KeyFunc, str]):
+        """View decorator, apply it above ``use_args`` so rejected requests are never parsed."""
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                self.hit(scope, limits)
+                return current_app.ensure_sync(view)(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
@@ -0,0 +1,160 @@
+"""Read replica routing for the ``database`` session.
+
+Binds named in ``SQLALCHEMY_REPLICA_BINDS`` (entries of ``SQLALCHEMY_BINDS``) serve the plain ``SELECT``s
+of models on the default bind. Everything else goes to the primary: flushes, ``INSERT`` / ``UPDATE`` /
+``DELETE``, ``SELECT ... FOR UPDATE``, textual SQL and raw connections. A session that sent anything to the
+primary keeps reading from it, so a request reads its own writes. A session reads from one replica, picked
+at random among the healthy ones lagging at most ``SQLALCHEMY_REPLICA_MAX_LAG`` seconds, or from the
+primary when there is none.
+
+Health and lag are checked every ``SQLALCHEMY_REPLICA_CHECK_INTERVAL`` seconds by the first request that
+finds the last check outdated, and a replica whose connection fails in between is left out until the next
+check. Reads from a replica can miss writes other requests made up to ``SQLALCHEMY_REPLICA_MAX_LAG``
+seconds before.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Sequence
+
+from flask import Flask
+from flask_sqlalchemy import SignallingSession
+from sqlalchemy import event, exc, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql import Select
+
+# seconds the replica is behind the primary, 0 when it replayed everything it received
+LAG_QUERIES: Dict[str, str] = {
+    'postgresql': 'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+                  'ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END',
+}
+HEALTH_QUERY = 'SELECT 0'
+
+
+class ReplicaStatus:
+
+    def __init__(self, bind: str):
+        self.bind = bind
+        self.healthy = True
+        self.lag = 0.0
+        self.error: Optional[str] = None
+
+    def mark_down(self, error: BaseException):
+        self.healthy = False
+        self.error = f'{type(error).__name__}: {error}'
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(healthy=self.healthy, lag=self.lag, error=self.error)
+
+
+class ReplicaSet:
+    """Health and replication lag of the replica binds of one app."""
+
+    def __init__(self, db, app: Flask, binds: Sequence[str], max_lag: float, check_interval: float,
+                 lag_query: str = None):
+        self.db = db
+        self.app = app
+        self.replicas = {bind: ReplicaStatus(bind) for bind in binds}
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.lag_query = lag_query
+        self.checked_at = float('-inf')
+        self._lock = threading.Lock()
+        self._watched = set()
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def engine(self, bind: str) -> Engine:
+        engine = self.db.get_engine(self.app, bind=bind)
+        if bind not in self._watched:
+            self._watched.add(bind)
+            event.listen(engine, 'handle_error', lambda context: self._on_error(bind, context))
+        return engine
+
+    def _on_error(self, bind: str, context):
+        # connection is None when the error happened while connecting
+        if context.is_disconnect or context.connection is None:
+            self.replicas[bind].mark_down(context.original_exception)
+
+    def check_due(self) -> bool:
+        return time.monotonic() - self.checked_at >= self.check_interval
+
+    def check(self, force: bool = False):
+        """Refresh health and lag of every replica, unless it was done recently or is in progress."""
+        if not (force or self.check_due()) or not self._lock.acquire(blocking=False):
+            return
+        try:
+            self.checked_at = time.monotonic()
+            for bind, status in self.replicas.items():
+                engine = self.engine(bind)
+                query = self.lag_query or LAG_QUERIES.get(engine.dialect.name, HEALTH_QUERY)
+                try:
+                    with engine.connect() as connection:
+                        status.lag = float(connection.execute(text(query)).scalar() or 0)
+                except exc.SQLAlchemyError as e:
+                    status.mark_down(e)
+                else:
+                    status.healthy, status.error = True, None
+        finally:
+            self._lock.release()
+
+    def choose(self) -> Optional[str]:
+        """Bind name of a usable replica, ``None`` when reads have to go to the primary."""
+        candidates = [bind for bind, status in self.replicas.items()
+                      if status.healthy and status.lag <= self.max_lag]
+        return random.choice(candidates) if candidates else None
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        return {bind: status.as_dict() for bind, status in self.replicas.items()}
+
+
+def is_read(clause) -> bool:
+    return isinstance(clause, Select) and clause._for_update_arg is None
+
+
+class RoutingSession(SignallingSession):
+    """``SignallingSession`` sending the reads of default bind models to a replica."""
+
+    def __init__(self, db, **options):
+        super().__init__(db, **options)
+        self.replica_set: ReplicaSet = self.app.extensions['replicas']
+        self.on_primary = not self.replica_set
+        # depth of nested primary_reads blocks, kept apart from on_primary so writes in a block stick
+        self._primary_reads = 0
+        self._replica_engine: Optional[Engine] = None
+
+    def use_primary(self):
+        """Send every following statement of the session to the primary."""
+        self.on_primary = True
+
+    @contextmanager
+    def primary_reads(self):
+        """Send the reads of the block to the primary, the session goes back to its replica afterwards."""
+        self._primary_reads += 1
+        try:
+            yield self
+        finally:
+            self._primary_reads -= 1
+
+    def _replica(self) -> Optional[Engine]:
+        if self._replica_engine is None:
+            self.replica_set.check()
+            bind = self.replica_set.choose()
+            if bind is None:
+                self.on_primary = True
+                return None
+            self._replica_engine = self.replica_set.engine(bind)
+        return self._replica_engine
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        bind = super().get_bind(mapper, clause)
+        if self.on_primary or bind is not self.bind:
+            return bind
+        if self._flushing or not is_read(clause):
+            self.on_primary = True
+            return bind
+        if self._primary_reads:
+            return bind
+        return self._replica() or bind
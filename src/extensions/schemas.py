@@ -0,0 +1,114 @@
+"""Shared schema instances and a fast dump path for plain model rows.
+
+Schema instances are built once per app and options (``only``, ``many``, ...) and reused across requests;
+marshmallow schemas hold no per-call state when dumping. For schemas without dump hooks whose fields are
+all pass-through types (strings, numbers, booleans), :meth:`SchemaRegistry.dump` reads the attributes
+directly instead of going through marshmallow's per-field machinery; any value of an unexpected type is
+still handed to its field, so the output is always identical to ``schema.dump``.
+"""
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Type, Union
+
+from flask import Flask, current_app
+from marshmallow import Schema, fields
+
+from .lazy import LazySchema
+from .timing import phase
+
+SchemaType = Union[Type[Schema], LazySchema]
+
+# field classes whose serialize() returns values of these types unchanged
+PASS_THROUGH_FIELDS: Dict[Type[fields.Field], Tuple[type, ...]] = {
+    fields.String: (str,),
+    fields.Integer: (int,),
+    fields.Float: (float,),
+    fields.Boolean: (bool,),
+    fields.Raw: (str, int, float, bool),
+}
+DUMP_HOOKS = ('pre_dump', 'post_dump')
+
+
+class CompiledDumper:
+    """Dumps objects with the fields of ``schema`` by plain attribute access."""
+
+    def __init__(self, schema: Schema):
+        self.schema = schema
+        self.fields: List[Tuple[str, Callable[[Any], Any], fields.Field, Tuple[type, ...], str]] = [
+            (field.data_key if field.data_key is not None else name,
+             attrgetter(field.attribute or name),
+             field,
+             PASS_THROUGH_FIELDS[type(field)],
+             name)
+            for name, field in schema.dump_fields.items()
+        ]
+
+    @classmethod
+    def compile(cls, schema: Schema) -> Optional['CompiledDumper']:
+        """Dumper for ``schema``, or ``None`` when it has hooks or fields that transform values."""
+        if any(key[0] in DUMP_HOOKS and hooks for key, hooks in schema._hooks.items()):
+            return None
+        if any(type(field) not in PASS_THROUGH_FIELDS or field.attribute and '.' in field.attribute
+               for field in schema.dump_fields.values()):
+            return None
+        return cls(schema)
+
+    def dump_one(self, obj: Any) -> Dict[str, Any]:
+        data = {}
+        for key, getter, field, types, name in self.fields:
+            value = getter(obj)
+            if value is not None and type(value) not in types:
+                value = field.serialize(name, obj, accessor=self.schema.get_attribute)
+            data[key] = value
+        return data
+
+    def dump(self, obj: Any, many: bool = False) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        return [self.dump_one(item) for item in obj] if many else self.dump_one(obj)
+
+
+class SchemaRegistry:
+    """Flask extension caching schema instances and their compiled dumpers per app."""
+
+    def __init__(self, app: Flask = None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        app.config.setdefault('SCHEMA_FAST_DUMP', True)
+        app.extensions['schema_registry'] = {}
+
+    @staticmethod
+    def _entry(schema_type: SchemaType,
+               options: Tuple[Tuple[str, Any], ...]) -> Tuple[Schema, Optional[CompiledDumper]]:
+        registry = current_app.extensions['schema_registry']
+        entry = registry.get((schema_type, options))
+        if entry is None:
+            schema = schema_type(**dict(options))
+            dumper = CompiledDumper.compile(schema) if current_app.config['SCHEMA_FAST_DUMP'] else None
+            entry = registry.setdefault((schema_type, options), (schema, dumper))
+        return entry
+
+    @staticmethod
+    def _only(schema_type: SchemaType, only: Sequence[str]) -> Tuple[str, ...]:
+        # ``only`` usually comes from the client, repeated or made up names must not add registry entries
+        names = set(only)
+        unknown = {name for name in names if name.split('.', 1)[0] not in schema_type._declared_fields}
+        if unknown:
+            raise ValueError(f'Unknown fields {sorted(unknown)} for {schema_type.__name__}')
+        return tuple(sorted(names))
+
+    def get(self, schema_type: SchemaType, only: Optional[Sequence[str]] = None, **options) -> Schema:
+        """Shared instance of ``schema_type`` built with ``options``.
+
+        ``only`` is order and duplicate insensitive, unknown field names raise ``ValueError``.
+        """
+        if only is not None:
+            options['only'] = self._only(schema_type, only)
+        return self._entry(schema_type, tuple(sorted(options.items())))[0]
+
+    def dump(self, schema_type: SchemaType, obj: Union[Any, Iterable[Any]], many: bool = False,
+             only: Optional[Sequence[str]] = None) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        """``schema_type(only=only).dump(obj, many=many)`` through a shared instance and the fast path."""
+        options = (('only', self._only(schema_type, only)),) if only is not None else ()
+        schema, dumper = self._entry(schema_type, options)
+        with phase('serialize'):
+            return dumper.dump(obj, many=many) if dumper is not None else schema.dump(obj, many=many)
@@ -0,0 +1,116 @@
+"""Pluggable JSON serialization for API responses.
+
+``response_template`` and ``error_response`` serialize through the provider selected by ``JSON_PROVIDER``:
+``orjson`` when the package is installed, the stdlib ``json`` module otherwise. Both providers encode the
+types SQLAlchemy models commonly carry (datetimes as ISO 8601, UUIDs and Decimals as strings) identically.
+"""
+import abc
+import dataclasses
+import datetime
+import decimal
+import enum
+import json
+import uuid
+from typing import Any, Dict, Type
+
+from flask import Flask, Response, current_app
+from flask.json import JSONEncoder
+
+from .timing import phase
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def default(o: Any) -> Any:
+    """Encode the non-JSON types both providers support."""
+    if isinstance(o, (datetime.datetime, datetime.date, datetime.time)):
+        return o.isoformat()
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if isinstance(o, enum.Enum):
+        return o.value
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+
+class ModelJSONEncoder(JSONEncoder):
+    """``app.json_encoder`` matching the providers, so ``jsonify`` output stays consistent with them."""
+
+    def default(self, o: Any) -> Any:
+        return default(o)
+
+
+class JSONProvider(abc.ABC):
+    name: str = None
+
+    def __init__(self, sort_keys: bool = False):
+        self.sort_keys = sort_keys
+
+    @abc.abstractmethod
+    def dumps(self, obj: Any) -> bytes:
+        """``obj`` encoded as UTF-8 JSON."""
+
+
+class StdlibJSONProvider(JSONProvider):
+    name = 'stdlib'
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, default=default, sort_keys=self.sort_keys,
+                          separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+class OrjsonProvider(JSONProvider):
+    name = 'orjson'
+
+    def __init__(self, sort_keys: bool = False):
+        super().__init__(sort_keys)
+        if orjson is None:
+            raise RuntimeError('JSON_PROVIDER is set to "orjson" but orjson is not installed')
+        self.option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, default=default, option=self.option)
+
+
+PROVIDERS: Dict[str, Type[JSONProvider]] = {
+    StdlibJSONProvider.name: StdlibJSONProvider,
+    OrjsonProvider.name: OrjsonProvider,
+}
+
+
+class JSONSerializer:
+    """Flask extension selecting the JSON provider for API responses."""
+
+    def __init__(self, app: Flask = None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        app.config.setdefault('JSON_PROVIDER', 'auto')
+
+        name = app.config['JSON_PROVIDER']
+        if name == 'auto':
+            name = OrjsonProvider.name if orjson is not None else StdlibJSONProvider.name
+        if name not in PROVIDERS:
+            raise ValueError(f'Unknown JSON_PROVIDER {name!r}, expected "auto" or one of {tuple(PROVIDERS)}')
+
+        app.extensions['json_provider'] = PROVIDERS[name](sort_keys=app.config.get('JSON_SORT_KEYS', True))
+        app.json_encoder = ModelJSONEncoder
+
+    @property
+    def provider(self) -> JSONProvider:
+        return current_app.extensions['json_provider']
+
+    def dumps(self, obj: Any) -> bytes:
+        return self.provider.dumps(obj)
+
+    def response(self, obj: Any, status_code: int) -> Response:
+        with phase('serialize'):
+            body = self.dumps(obj)
+        return current_app.response_class(body, status=status_code, mimetype='application/json')
@@ -0,0 +1,249 @@
+"""Background tasks for side effects that do not have to finish inside the request.
+
+Functions decorated with :meth:`TaskQueue.task` are enqueued with ``.delay(*args, **kwargs)`` and run later
+in an app context of their own, so they can use ``database`` like a view does. ``TASKS_BACKEND`` picks where
+they run:
+
+* ``thread``: a pool of ``TASKS_WORKERS`` threads of the enqueuing process (development, tests).
+* ``redis``: a list on the Redis server of the ``cache``, consumed by ``flask internal task-worker``
+  processes. Retries wait in a sorted set until they are due, malformed messages are moved to a ``:dead`` list.
+* ``auto``: ``redis`` when the cache backend is Redis, ``thread`` otherwise.
+
+A task raising an exception is retried up to ``retries`` times (``TASKS_MAX_RETRIES`` by default), the n-th
+retry ``backoff * 2 ** (n - 1)`` seconds later and at most ``TASKS_RETRY_BACKOFF_MAX``. Arguments are JSON
+encoded when the task is enqueued, whatever the backend. A task running when its worker process dies is lost.
+"""
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import update_wrapper
+from logging import Logger
+from typing import Any, Callable, Dict, Optional
+
+from flask import Flask, current_app
+from flask_caching import Cache
+
+MOVE_DUE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, message in ipairs(due) do
+    redis.call('ZREM', KEYS[1], message)
+    redis.call('LPUSH', KEYS[2], message)
+end
+return #due
+"""
+MOVE_DUE_BATCH = 100
+
+Runner = Callable[[str], None]
+
+
+class ThreadBackend:
+    """Runs tasks on a thread pool of this process, retries are scheduled with timers."""
+
+    def __init__(self, run: Runner, workers: int):
+        self._run = run
+        self.workers = workers
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._idle = threading.Condition()
+
+    @property
+    def executor(self) -> Executor:
+        # created lazily so that pre-forking servers do not share worker threads between children
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='task-worker')
+        return self._executor
+
+    def push(self, message: str, delay: float = 0.0):
+        with self._idle:
+            self._pending += 1
+        if delay > 0:
+            timer = threading.Timer(delay, self._submit, (message,))
+            timer.daemon = True
+            timer.start()
+        else:
+            self._submit(message)
+
+    def _submit(self, message: str):
+        self.executor.submit(self._work, message)
+
+    def _work(self, message: str):
+        try:
+            self._run(message)
+        finally:
+            with self._idle:
+                self._pending -= 1
+                self._idle.notify_all()
+
+    def join(self, timeout: float = None) -> bool:
+        """Wait until every enqueued task (retries included) finished, ``False`` on timeout."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+class RedisBackend:
+    """Queue shared through the Redis client of the ``cache`` backend."""
+
+    def __init__(self, client, run: Runner, key_prefix: str = '', queue: str = 'tasks', logger: Logger = None):
+        self.client = client
+        self._run = run
+        self.logger = logger or logging.getLogger(__name__)
+        self.queue_key = f'{key_prefix}{queue}'
+        self.scheduled_key = f'{key_prefix}{queue}:scheduled'
+        self.dead_key = f'{key_prefix}{queue}:dead'
+        self._move_due = client.register_script(MOVE_DUE_SCRIPT)
+
+    def push(self, message: str, delay: float = 0.0):
+        if delay > 0:
+            self.client.zadd(self.scheduled_key, {message: time.time() + delay})
+        else:
+            self.client.lpush(self.queue_key, message)
+
+    def work(self, stop: threading.Event = None, poll_timeout: int = 1):
+        """Consume the queue until ``stop`` is set, moving due retries onto it between polls.
+
+        A message that can not be run (not JSON, missing fields) is logged and moved to the ``:dead`` list
+        instead of stopping the worker.
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            self._move_due(keys=[self.scheduled_key, self.queue_key], args=[time.time(), MOVE_DUE_BATCH])
+            item = self.client.brpop(self.queue_key, timeout=poll_timeout)
+            if item is not None:
+                message = item[1]
+                try:
+                    self._run(message.decode() if isinstance(message, bytes) else message)
+                except Exception:
+                    self.logger.exception('Moving job %r to %s', message, self.dead_key)
+                    self.client.lpush(self.dead_key, message)
+
+    def join(self, timeout: float = None) -> bool:
+        return False
+
+    def shutdown(self):
+        pass
+
+
+class Task:
+    """A function that can also be enqueued, ``task(...)`` still calls it synchronously."""
+
+    def __init__(self, queue: 'TaskQueue', func: Callable, name: str, retries: Optional[int],
+                 backoff: Optional[float]):
+        self.queue = queue
+        self.func = func
+        self.name = name
+        self.retries = retries
+        self.backoff = backoff
+        update_wrapper(self, func)
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs) -> str:
+        """Enqueue a call of the task, returns the job id."""
+        return self.queue.enqueue(self, args, kwargs)
+
+
+class TaskQueue:
+    """Flask extension running :class:`Task` functions in the background."""
+
+    BACKENDS = ('auto', 'thread', 'redis')
+
+    def __init__(self, cache: Cache, app: Flask = None):
+        self.cache = cache
+        self.tasks: Dict[str, Task] = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        app.config.setdefault('TASKS_BACKEND', 'auto')
+        app.config.setdefault('TASKS_WORKERS', 4)
+        app.config.setdefault('TASKS_QUEUE', 'tasks')
+        app.config.setdefault('TASKS_MAX_RETRIES', 3)
+        app.config.setdefault('TASKS_RETRY_BACKOFF', 1.0)
+        app.config.setdefault('TASKS_RETRY_BACKOFF_MAX', 60.0)
+
+        backend = app.config['TASKS_BACKEND']
+        if backend not in self.BACKENDS:
+            raise ValueError(f'Unknown TASKS_BACKEND {backend!r}, expected one of {self.BACKENDS}')
+        app.extensions['task_queue'] = self._backend(app, backend)
+
+    def _backend(self, app: Flask, backend: str):
+        def run(message: str):
+            self.execute(app, message)
+
+        if backend != 'thread':
+            cache_backend = app.extensions.get('cache', {}).get(self.cache)
+            cache_backend = getattr(cache_backend, 'remote', cache_backend)
+            client = getattr(cache_backend, '_write_client', None)
+            if client is not None:
+                return RedisBackend(client, run, getattr(cache_backend, 'key_prefix', ''), app.config['TASKS_QUEUE'],
+                                    app.logger)
+            if backend == 'redis':
+                raise RuntimeError('TASKS_BACKEND is set to "redis" but the cache backend is not Redis')
+        return ThreadBackend(run, app.config['TASKS_WORKERS'])
+
+    @property
+    def backend(self):
+        return current_app.extensions['task_queue']
+
+    def task(self, func: Callable = None, *, name: str = None, retries: int = None, backoff: float = None):
+        """Decorator registering a task, usable bare or with options::
+
+            @task_queue.task(retries=5)
+            def send_report(email): ...
+
+            send_report.delay('someone@example.com')
+        """
+
+        def decorator(func: Callable) -> Task:
+            task = Task(self, func, name or f'{func.__module__}.{func.__qualname__}', retries, backoff)
+            if self.tasks.get(task.name, task).func is not func:
+                raise ValueError(f'A different task is already registered as {task.name!r}')
+            self.tasks[task.name] = task
+            return task
+
+        return decorator(func) if func is not None else decorator
+
+    def enqueue(self, task: Task, args: tuple = (), kwargs: Dict[str, Any] = None) -> str:
+        job_id = uuid.uuid4().hex
+        message = json.dumps(dict(id=job_id, task=task.name, args=list(args), kwargs=kwargs or {}, attempt=0))
+        self.backend.push(message)
+        return job_id
+
+    def execute(self, app: Flask, message: str):
+        """Run one job in an app context of ``app``, scheduling a retry when it fails."""
+        job = json.loads(message)
+        task = self.tasks.get(job['task'])
+        if task is None:
+            app.logger.error('Dropping job %s of unknown task %s', job['id'], job['task'])
+            return
+        try:
+            with app.app_context():
+                task.func(*job['args'], **job['kwargs'])
+        except Exception:
+            config = app.config
+            attempt = job['attempt'] + 1
+            retries = task.retries if task.retries is not None else config['TASKS_MAX_RETRIES']
+            if attempt > retries:
+                app.logger.exception('Task %s (job %s) failed after %d attempts', task.name, job['id'], attempt)
+                return
+            backoff = task.backoff if task.backoff is not None else config['TASKS_RETRY_BACKOFF']
+            delay = min(backoff * 2 ** (attempt - 1), config['TASKS_RETRY_BACKOFF_MAX'])
+            app.logger.warning('Task %s (job %s) failed, retry %d of %d in %.2fs', task.name, job['id'],
+                               attempt, retries, delay, exc_info=True)
+            app.extensions['task_queue'].push(json.dumps(dict(job, attempt=attempt)), delay)
+
+    def join(self, timeout: float = None) -> bool:
+        """Wait for the thread backend to run every enqueued task, for tests and graceful shutdowns."""
+        return self.backend.join(timeout)
@@ -0,0 +1,282 @@
+"""Two-tier Flask-Caching backend: a bounded in-process LRU in front of a shared (Redis) cache.
+
+Select it with ``CACHE_TYPE = 'src.extensions.tiered_cache.TieredCache'``. Reads are served from the local
+tier when possible and fill it from the remote one; writes go to the remote tier, drop the local copy and
+publish the keys on an invalidation channel so other workers drop theirs too. Local entries also expire
+after ``TIERED_CACHE_LOCAL_TIMEOUT`` seconds, which bounds staleness if an invalidation message is lost.
+
+Local entries are kept pickled, so the tier is bounded by size as well as by count, and callers can never
+mutate a cached value in place.
+"""
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from flask_caching.backends.base import BaseCache
+from werkzeug.utils import import_string
+
+InvalidationCallback = Callable[[Any], None]
+ALL_KEYS = '*'
+
+
+class LocalPubSub:
+    """In-process invalidation channel, every subscriber of a channel name gets every message."""
+
+    _subscribers: Dict[str, List[InvalidationCallback]] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, channel: str):
+        self.channel = channel
+
+    def subscribe(self, callback: InvalidationCallback):
+        with self._lock:
+            self._subscribers.setdefault(self.channel, []).append(callback)
+
+    def publish(self, message: Any):
+        with self._lock:
+            subscribers = list(self._subscribers.get(self.channel, ()))
+        for callback in subscribers:
+            callback(message)
+
+    def close(self):
+        with self._lock:
+            self._subscribers.pop(self.channel, None)
+
+
+class RedisPubSub:
+    """Invalidation channel on Redis pub/sub, listened to by a daemon thread started in each process."""
+
+    def __init__(self, client, channel: str):
+        self.client = client
+        self.channel = channel
+        self._callbacks: List[InvalidationCallback] = []
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _listen(self, pubsub):
+        for message in pubsub.listen():
+            if message.get('type') == 'message':
+                data = pickle.loads(message['data'])
+                for callback in self._callbacks:
+                    callback(data)
+
+    def _ensure_listener(self):
+        # the listener thread does not survive a fork, every worker process starts its own
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                threading.Thread(target=self._listen, args=(pubsub,), name='cache-invalidation', daemon=True).start()
+                self._pid = os.getpid()
+
+    def subscribe(self, callback: InvalidationCallback):
+        self._callbacks.append(callback)
+        self._ensure_listener()
+
+    def publish(self, message: Any):
+        self._ensure_listener()
+        self.client.publish(self.channel, pickle.dumps(message, pickle.HIGHEST_PROTOCOL))
+
+    def close(self):
+        pass
+
+
+class LocalTier:
+    """Thread-safe LRU of pickled values bounded by entry count and total size."""
+
+    def __init__(self, max_items: int, max_bytes: int):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.evictions = 0
+        self._entries: 'OrderedDict[str, Tuple[bytes, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, data: bytes, timeout: float):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (data, time.monotonic() + timeout)
+            self.size += len(data)
+            while len(self._entries) > self.max_items or self.size > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _pop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[0])
+
+    def discard(self, keys: Iterable[str]):
+        with self._lock:
+            for key in keys:
+                self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class TieredCache(BaseCache):
+    """``BaseCache`` reading through a :class:`LocalTier` into ``remote``, invalidated through ``pubsub``."""
+
+    def __init__(self, remote: BaseCache, pubsub, local_max_items: int = 10000,
+                 local_max_bytes: int = 16 * 2 ** 20, local_timeout: float = 5, default_timeout: int = 300):
+        super().__init__(default_timeout)
+        self.remote = remote
+        self.local = LocalTier(local_max_items, local_max_bytes)
+        self.local_timeout = local_timeout
+        self.pubsub = pubsub
+        self.origin = uuid.uuid4().hex
+        self.counters = dict(local_hits=0, local_misses=0, remote_hits=0, remote_misses=0, invalidations=0)
+        self._counters_lock = threading.Lock()
+        pubsub.subscribe(self._on_invalidation)
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        remote_class = import_string(config.get('TIERED_CACHE_REMOTE', 'flask_caching.backends.RedisCache'))
+        remote = remote_class.factory(app, config, args, dict(kwargs))
+
+        channel = (config.get('CACHE_KEY_PREFIX') or '') + config.get('TIERED_CACHE_CHANNEL', 'cache-invalidation')
+        pubsub_type = config.get('TIERED_CACHE_PUBSUB', 'redis')
+        if pubsub_type == 'redis':
+            pubsub = RedisPubSub(remote._write_client, channel)
+        elif pubsub_type == 'local':
+            pubsub = LocalPubSub(channel)
+        else:
+            raise ValueError(f'Unknown TIERED_CACHE_PUBSUB {pubsub_type!r}, expected "redis" or "local"')
+
+        return cls(remote, pubsub,
+                   local_max_items=config.get('TIERED_CACHE_LOCAL_MAX_ITEMS', 10000),
+                   local_max_bytes=config.get('TIERED_CACHE_LOCAL_MAX_BYTES', 16 * 2 ** 20),
+                   local_timeout=config.get('TIERED_CACHE_LOCAL_TIMEOUT', 5),
+                   default_timeout=kwargs.get('default_timeout', 300))
+
+    def _count(self, **increments: int):
+        with self._counters_lock:
+            for name, value in increments.items():
+                self.counters[name] += value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._counters_lock:
+            counters = dict(self.counters)
+        return dict(counters, local_items=len(self.local), local_bytes=self.local.size,
+                    local_evictions=self.local.evictions)
+
+    def _on_invalidation(self, message):
+        origin, keys = message
+        if origin == self.origin:
+            return
+        self._count(invalidations=1)
+        self._drop(keys)
+
+    def _drop(self, keys):
+        if keys == ALL_KEYS:
+            self.local.clear()
+        else:
+            self.local.discard(keys)
+
+    def _invalidate(self, keys):
+        self._drop(keys)
+        self.pubsub.publish([self.origin, keys])
+
+    def _fill(self, key: str, value: Any):
+        self.local.set(key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self.local_timeout)
+
+    def get(self, key):
+        data = self.local.get(key)
+        if data is not None:
+            self._count(local_hits=1)
+            return pickle.loads(data)
+        value = self.remote.get(key)
+        if value is None:
+            self._count(local_misses=1, remote_misses=1)
+        else:
+            self._count(local_misses=1, remote_hits=1)
+            self._fill(key, value)
+        return value
+
+    def get_many(self, *keys):
+        values, missing = {}, []
+        for key in keys:
+            data = self.local.get(key)
+            if data is None:
+                missing.append(key)
+            else:
+                values[key] = pickle.loads(data)
+        remote_hits = 0
+        if missing:
+            for key, value in zip(missing, self.remote.get_many(*missing)):
+                values[key] = value
+                if value is not None:
+                    remote_hits += 1
+                    self._fill(key, value)
+        self._count(local_hits=len(keys) - len(missing), local_misses=len(missing),
+                    remote_hits=remote_hits, remote_misses=len(missing) - remote_hits)
+        return [values[key] for key in keys]
+
+    def has(self, key):
+        return self.local.get(key) is not None or self.remote.has(key)
+
+    def set(self, key, value, timeout=None):
+        result = self.remote.set(key, value, self._normalize_timeout(timeout))
+        self._invalidate([key])
+        return result
+
+    def add(self, key, value, timeout=None):
+        added = self.remote.add(key, value, self._normalize_timeout(timeout))
+        if added:
+            self._invalidate([key])
+        return added
+
+    def set_many(self, mapping, timeout=None):
+        result = self.remote.set_many(mapping, self._normalize_timeout(timeout))
+        self._invalidate(list(mapping))
+        return result
+
+    def delete(self, key):
+        result = self.remote.delete(key)
+        self._invalidate([key])
+        return result
+
+    def delete_many(self, *keys):
+        result = self.remote.delete_many(*keys)
+        self._invalidate(list(keys))
+        return result
+
+    def inc(self, key, delta=1):
+        result = self.remote.inc(key, delta)
+        self._invalidate([key])
+        return result
+
+    def dec(self, key, delta=1):
+        result = self.remote.dec(key, delta)
+        self._invalidate([key])
+        return result
+
+    def clear(self):
+        result = self.remote.clear()
+        self._invalidate(ALL_KEYS)
+        return result
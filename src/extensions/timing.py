@@ -0,0 +1,164 @@
+"""Per-request phase timing.
+
+Time spent in argument parsing, database queries, password hashing and serialization is accumulated per
+request and kept in rolling per-endpoint latency histograms. It is also sent back in a ``Server-Timing``
+header when the app runs in debug mode or the caller is internal (it sent a valid ``X-Profile-Token``, see
+:mod:`.profiler`), since phase timings tell outsiders e.g. whether an email has an account.
+"""
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, Tuple
+
+from flask import Flask, Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .profiler import has_profile_token
+
+PHASES = ('args', 'db', 'hash', 'serialize', 'compress')
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def _timings() -> Dict[str, float]:
+    return g.get('_phase_timings') if has_request_context() else None
+
+
+def record(name: str, seconds: float):
+    """Add ``seconds`` to phase ``name`` of the current request, if it is being timed."""
+    timings = _timings()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+        if name == 'db':
+            g._db_queries = g.get('_db_queries', 0) + 1
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    if _timings() is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - started)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_query_started', {})[id(cursor)] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _query_finished(conn, cursor)
+
+
+def _handle_error(context):
+    # after_cursor_execute is not called for failed statements
+    cursor = context.cursor or getattr(context.execution_context, 'cursor', None)
+    if context.connection is not None and cursor is not None:
+        _query_finished(context.connection, cursor)
+
+
+def _query_finished(conn, cursor):
+    started = conn.info.get('_query_started', {}).pop(id(cursor), None)
+    if started is not None:
+        record('db', time.perf_counter() - started)
+
+
+class EndpointHistogram:
+    """Rolling window of the last ``window`` request timings of one endpoint."""
+
+    def __init__(self, window: int):
+        self._samples: Deque[Tuple[float, Dict[str, float]]] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, total: float, phases: Dict[str, float]):
+        with self._lock:
+            self._samples.append((total, phases))
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = list(self._samples)
+        totals = sorted(total * 1000 for total, _ in samples)
+        count = len(totals)
+
+        def percentile(pct: float) -> float:
+            return round(totals[min(count - 1, int(pct / 100 * count))], 3) if count else 0.0
+
+        buckets, index = {}, 0
+        for bound in BUCKETS_MS:
+            while index < count and totals[index] <= bound:
+                index += 1
+            buckets[f'le_{bound}'] = index
+        buckets['le_inf'] = count
+
+        phase_means = defaultdict(float)
+        for _, phases in samples:
+            for name, seconds in phases.items():
+                phase_means[name] += seconds * 1000 / count
+        return dict(count=count,
+                    p50_ms=percentile(50),
+                    p90_ms=percentile(90),
+                    p99_ms=percentile(99),
+                    max_ms=round(totals[-1], 3) if count else 0.0,
+                    buckets=buckets,
+                    phase_mean_ms={name: round(value, 3) for name, value in phase_means.items()})
+
+
+class RequestTimer:
+    """Flask extension timing request phases and collecting per-endpoint histograms."""
+
+    def __init__(self, app: Flask = None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        app.config.setdefault('REQUEST_TIMING_ENABLED', True)
+        app.config.setdefault('REQUEST_TIMING_WINDOW', 1000)
+
+        app.extensions['request_timer'] = self
+        app.extensions['request_timer_histograms'] = {}
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+            event.listen(Engine, 'handle_error', _handle_error)
+
+        app.before_request(self._start)
+        app.after_request(self._finish)
+
+    @staticmethod
+    def _start():
+        if current_app.config['REQUEST_TIMING_ENABLED']:
+            g._request_started = time.perf_counter()
+            g._phase_timings = {}
+
+    @staticmethod
+    def _finish(response: Response) -> Response:
+        timings = _timings()
+        if timings is None:
+            return response
+        total = time.perf_counter() - g._request_started
+
+        if current_app.debug or has_profile_token():
+            metrics = []
+            for name in PHASES:
+                if name in timings:
+                    description = f';desc="{g.get("_db_queries", 0)} queries"' if name == 'db' else ''
+                    metrics.append(f'{name};dur={timings[name] * 1000:.3f}{description}')
+            metrics.append(f'total;dur={total * 1000:.3f}')
+            response.headers['Server-Timing'] = ', '.join(metrics)
+
+        histograms = current_app.extensions['request_timer_histograms']
+        endpoint = request.endpoint or 'unmatched'
+        histogram = histograms.get(endpoint)
+        if histogram is None:
+            histogram = histograms.setdefault(endpoint, EndpointHistogram(current_app.config['REQUEST_TIMING_WINDOW']))
+        histogram.add(total, dict(timings))
+        return response
+
+    @staticmethod
+    def histograms() -> Dict[str, Dict[str, Any]]:
+        return {endpoint: histogram.summary()
+                for endpoint, histogram in sorted(current_app.extensions['request_timer_histograms'].items())}
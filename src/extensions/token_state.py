@@ -0,0 +1,220 @@
+"""JWT verification cache and token revocation.
+
+Verified tokens are kept in a bounded in-process LRU until they expire, so repeated requests with the
+same bearer token skip signature verification. Revoked token ids (``jti``) live in the ``cache``
+(Redis in production) until the token would have expired anyway.
+
+With a Redis ``cache`` backend each process keeps a bloom filter of revoked ids in front of it, so
+checking a token that was never revoked does not leave the process. Revocations set the bits of a
+bitmap on the Redis server with one Lua script (``SETBIT``, atomic across workers), and the bitmaps are
+merged into the local filters every ``JWT_REVOCATION_SYNC_INTERVAL`` seconds, so a revocation made by
+another worker is seen within that interval. They are bucketed in generations as long as the longest
+token lifetime: a token revoked in one generation has expired by the end of the next one, so only the
+current and the previous generation are ever checked and the filters do not fill up over time. Other
+backends can not update the shared bitmap atomically, so every check reads the ``cache``.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from flask import Flask, current_app
+from flask_caching import Cache
+from flask_jwt_extended import JWTManager
+
+BLOOM_SETBIT_SCRIPT = """
+for i = 2, #ARGV do
+    redis.call('SETBIT', KEYS[1], ARGV[i], 1)
+end
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of decoded claims of already verified tokens, entries dropped at token expiry."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, encoded_token: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            claims = self._entries.get(encoded_token)
+            if claims is None:
+                return None
+            if 'exp' in claims and claims['exp'] <= time.time():
+                del self._entries[encoded_token]
+                return None
+            self._entries.move_to_end(encoded_token)
+            return dict(claims)
+
+    def put(self, encoded_token: str, claims: Dict[str, Any]):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[encoded_token] = dict(claims)
+            self._entries.move_to_end(encoded_token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class BloomFilter:
+    """Bloom filter whose bits are laid out like a Redis bitmap (bit 0 is the high bit of the first byte)."""
+
+    def __init__(self, size_bits: int, hashes: int, data: bytes = None):
+        self.size_bits = size_bits
+        self.hashes = hashes
+        self.bits = bytearray(data) if data is not None else bytearray((size_bits + 7) // 8)
+
+    def positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size_bits for i in range(self.hashes))
+
+    def add(self, item: str):
+        for position in self.positions(item):
+            self.bits[position >> 3] |= 0x80 >> (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (0x80 >> (position & 7)) for position in self.positions(item))
+
+    def merge(self, data: bytes):
+        # Redis bitmaps end at their highest set bit, shorter data is zero padded
+        if data is not None and len(data) <= len(self.bits):
+            data = data.ljust(len(self.bits), b'\0')
+            merged = int.from_bytes(self.bits, 'little') | int.from_bytes(data, 'little')
+            self.bits = bytearray(merged.to_bytes(len(self.bits), 'little'))
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.bits)
+
+
+class _RevocationState:
+
+    def __init__(self, size_bits: int, hashes: int, generation_seconds: int, sync_interval: float,
+                 client=None, key_prefix: str = ''):
+        self.size_bits = size_bits
+        self.hashes = hashes
+        self.generation_seconds = generation_seconds
+        self.sync_interval = sync_interval
+        self.blooms: Dict[int, BloomFilter] = {}
+        self.synced_at = float('-inf')
+        self.lock = threading.Lock()
+        self.client = client
+        self.key_prefix = key_prefix
+        self.setbit = client.register_script(BLOOM_SETBIT_SCRIPT) if client is not None else None
+
+    def generation(self, timestamp: float = None) -> int:
+        return int((time.time() if timestamp is None else timestamp) // self.generation_seconds)
+
+    def bloom(self, generation: int) -> BloomFilter:
+        bloom = self.blooms.get(generation)
+        if bloom is None:
+            bloom = self.blooms[generation] = BloomFilter(self.size_bits, self.hashes)
+            for stale in [known for known in self.blooms if known < generation - 1]:
+                del self.blooms[stale]
+        return bloom
+
+
+class RevocationStore:
+    """Flask extension storing revoked token ids in ``cache`` behind local bloom filters."""
+
+    def __init__(self, cache: Cache, app: Flask = None):
+        self.cache = cache
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        app.config.setdefault('JWT_REVOCATION_BLOOM_BITS', 2 ** 20)
+        app.config.setdefault('JWT_REVOCATION_BLOOM_HASHES', 7)
+        app.config.setdefault('JWT_REVOCATION_SYNC_INTERVAL', 5)
+
+        lifetimes = [lifetime.total_seconds() for lifetime in (app.config.get('JWT_ACCESS_TOKEN_EXPIRES'),
+                                                               app.config.get('JWT_REFRESH_TOKEN_EXPIRES'))
+                     if isinstance(lifetime, timedelta)]
+        backend = app.extensions.get('cache', {}).get(self.cache)
+        backend = getattr(backend, 'remote', backend)
+        app.extensions['revocation_store'] = _RevocationState(app.config['JWT_REVOCATION_BLOOM_BITS'],
+                                                              app.config['JWT_REVOCATION_BLOOM_HASHES'],
+                                                              int(max(lifetimes, default=86400)),
+                                                              app.config['JWT_REVOCATION_SYNC_INTERVAL'],
+                                                              getattr(backend, '_write_client', None),
+                                                              getattr(backend, 'key_prefix', ''))
+
+    @property
+    def state(self) -> _RevocationState:
+        return current_app.extensions['revocation_store']
+
+    @staticmethod
+    def _revoked_key(jti: str) -> str:
+        return f'revoked:jti:{jti}'
+
+    @staticmethod
+    def _bloom_key(state: _RevocationState, generation: int) -> str:
+        return f'{state.key_prefix}revoked:bloom:{generation}'
+
+    def _sync(self, state: _RevocationState, force: bool = False):
+        # one thread per interval reads Redis, without the lock so checks of other threads never wait on it
+        now = time.monotonic()
+        with state.lock:
+            if not force and now - state.synced_at < state.sync_interval:
+                return
+            state.synced_at = now
+        current = state.generation()
+        shared = state.client.mget([self._bloom_key(state, current - 1), self._bloom_key(state, current)])
+        with state.lock:
+            for generation, data in zip((current - 1, current), shared):
+                state.bloom(generation).merge(data)
+
+    def revoke(self, jti: str, expires_at: float = None):
+        """Revoke a token id until ``expires_at`` (unix time, the token ``exp``)."""
+        state = self.state
+        now = time.time()
+        ttl = max(1, int((expires_at or now + state.generation_seconds) - now))
+        self.cache.set(self._revoked_key(jti), True, timeout=ttl)
+        if state.client is None:
+            return
+
+        generation = state.generation(now)
+        with state.lock:
+            bloom = state.bloom(generation)
+            bloom.add(jti)
+        state.setbit(keys=[self._bloom_key(state, generation)],
+                     args=[2 * state.generation_seconds, *bloom.positions(jti)])
+
+    def is_revoked(self, jti: str) -> bool:
+        state = self.state
+        if state.client is not None:
+            self._sync(state)
+            current = state.generation()
+            with state.lock:
+                if not any(jti in state.bloom(generation) for generation in (current - 1, current)):
+                    return False
+        return bool(self.cache.get(self._revoked_key(jti)))
+
+
+class CachingJWTManager(JWTManager):
+    """``JWTManager`` skipping signature verification for tokens verified before and not expired yet."""
+
+    def init_app(self, app: Flask):
+        super().init_app(app)
+        app.config.setdefault('JWT_VERIFIED_CACHE_SIZE', 10000)
+        app.extensions['jwt_verified_cache'] = VerifiedTokenCache(app.config['JWT_VERIFIED_CACHE_SIZE'])
+
+    def _decode_jwt_from_config(self, encoded_token, csrf_value=None, allow_expired=False):
+        if csrf_value is not None or allow_expired:
+            return super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+
+        verified = current_app.extensions['jwt_verified_cache']
+        claims = verified.get(encoded_token)
+        if claims is None:
+            claims = super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+            verified.put(encoded_token, claims)
+        return claims
@@ -0,0 +1,105 @@
+"""Linear-time validation of user supplied strings, and a size-capped request body.
+
+Validators here make a bounded number of passes over their input with ``str`` methods instead of
+backtracking regular expressions, so their cost grows with the length of the value and nothing else.
+Fields take :class:`BoundedString` to reject oversized values before any validator runs on them, and
+:class:`BoundedRequest` refuses bodies over ``MAX_CONTENT_LENGTH`` before they are read.
+"""
+import io
+from typing import IO
+
+from flask import Request
+from marshmallow import fields
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.utils import cached_property
+from werkzeug.wsgi import get_input_stream
+
+# RFC 5321 limit of a forward path
+EMAIL_MAX_LENGTH = 254
+PASSWORD_MIN_LENGTH = 6
+PASSWORD_MAX_LENGTH = 20
+# passwords given at login are not checked against the policy, only capped
+LOGIN_PASSWORD_MAX_LENGTH = 128
+
+
+def _is_alnum(value: str) -> bool:
+    return value.isascii() and value.isalnum()
+
+
+def is_email(value: str) -> bool:
+    """``local@domain.tld``: the local part is ASCII letters and digits, single ``.``, ``-`` or ``_`` between
+    them; the domain is one label of letters, digits and ``-`` followed by dot-separated letter-only labels
+    of at least two characters."""
+    if len(value) > EMAIL_MAX_LENGTH:
+        return False
+    local, at, domain = value.partition('@')
+    if not at:
+        return False
+    # runs of letters and digits between single separators, whichever they are
+    if not all(_is_alnum(part) for part in local.replace('-', '.').replace('_', '.').split('.')):
+        return False
+    host, *suffixes = domain.split('.')
+    return (bool(suffixes)
+            and _is_alnum(host.replace('-', '0'))
+            and all(len(label) >= 2 and label.isascii() and label.isalpha() for label in suffixes))
+
+
+def is_password(value: str) -> bool:
+    """6 to 20 characters without whitespace, with a digit, a lowercase and an uppercase ASCII letter and
+    a character that is neither of those."""
+    if not PASSWORD_MIN_LENGTH <= len(value) <= PASSWORD_MAX_LENGTH:
+        return False
+    digit = lower = upper = other = False
+    for char in value:
+        if 'a' <= char <= 'z':
+            lower = True
+        elif 'A' <= char <= 'Z':
+            upper = True
+        elif '0' <= char <= '9':
+            digit = True
+        elif char.isspace():
+            return False
+        else:
+            other = True
+            digit = digit or char.isdecimal()
+    return digit and lower and upper and other
+
+
+class BoundedString(fields.String):
+    """``String`` rejecting values longer than ``max_length`` before its validators see them."""
+
+    default_error_messages = {'too_long': 'Longer than maximum length {max_length}.'}
+
+    def __init__(self, max_length: int, **kwargs):
+        super().__init__(**kwargs)
+        self.max_length = max_length
+
+    def _deserialize(self, value, attr, data, **kwargs):
+        if isinstance(value, str) and len(value) > self.max_length:
+            raise self.make_error('too_long', max_length=self.max_length)
+        return super()._deserialize(value, attr, data, **kwargs)
+
+
+class BoundedRequest(Request):
+    """``Request`` applying ``MAX_CONTENT_LENGTH`` to every body it reads.
+
+    Werkzeug 2.0 only checks the limit when parsing form data, ``get_json`` and ``get_data`` read bodies
+    of any size.
+    """
+
+    @cached_property
+    def stream(self) -> IO[bytes]:
+        limit = self.max_content_length
+        if limit is None:
+            return super().stream
+        if self.content_length is not None:
+            if self.content_length > limit:
+                raise RequestEntityTooLarge()
+            return super().stream
+        if not self.environ.get('wsgi.input_terminated'):
+            return super().stream
+        # chunked body of a server handling the framing: read no more than one byte past the limit
+        data = get_input_stream(self.environ).read(limit + 1)
+        if len(data) > limit:
+            raise RequestEntityTooLarge()
+        return io.BytesIO(data)
@@ -0,0 +1,146 @@
+"""Write-behind buffer for append-only rows (audit and event logs).
+
+:meth:`WriteBehind.append` only puts the row in a per-process buffer; a background thread inserts buffered
+rows with executemany ``INSERT``s, at most ``WRITE_BEHIND_BATCH_SIZE`` per statement, once a batch is full
+or every ``WRITE_BEHIND_FLUSH_INTERVAL`` seconds, and the buffer is flushed again when the process exits.
+The buffer holds at most ``WRITE_BEHIND_MAX_BUFFER`` rows: beyond that rows are dropped and counted rather
+than making requests wait, and so are the rows of a batch whose insert fails.
+"""
+import atexit
+import os
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple, Type
+
+from flask import Flask, current_app
+from sqlalchemy.exc import SQLAlchemyError
+
+
+class _BufferState:
+
+    def __init__(self, batch_size: int, flush_interval: float, max_size: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self.rows: Deque[Tuple[Type, Dict[str, Any]]] = deque()
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopping = False
+        self.thread: Optional[threading.Thread] = None
+        self.pid: Optional[int] = None
+        self.exit_hook = False
+        self.dropped = 0
+        self.failed = 0
+        self.written = 0
+
+
+class WriteBehind:
+    """Flask extension inserting rows of append-only models in batches, off the request path."""
+
+    def __init__(self, db, app: Flask = None):
+        self.db = db
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        app.config.setdefault('WRITE_BEHIND_BATCH_SIZE', 500)
+        app.config.setdefault('WRITE_BEHIND_FLUSH_INTERVAL', 1.0)
+        app.config.setdefault('WRITE_BEHIND_MAX_BUFFER', 10000)
+        app.extensions['write_behind'] = _BufferState(app.config['WRITE_BEHIND_BATCH_SIZE'],
+                                                      app.config['WRITE_BEHIND_FLUSH_INTERVAL'],
+                                                      app.config['WRITE_BEHIND_MAX_BUFFER'])
+
+    @staticmethod
+    def _state(app: Flask = None) -> _BufferState:
+        return (app or current_app).extensions['write_behind']
+
+    def append(self, model: Type, row: Dict[str, Any]) -> bool:
+        """Buffer a row (a dict of columns) of ``model``, ``False`` when the buffer is full and it was dropped."""
+        app = current_app._get_current_object()
+        state = self._state(app)
+        self._ensure_flusher(app, state)
+        with state.lock:
+            if len(state.rows) >= state.max_size:
+                state.dropped += 1
+                return False
+            state.rows.append((model, row))
+            full = len(state.rows) >= state.batch_size
+        if full:
+            state.wakeup.set()
+        return True
+
+    def _ensure_flusher(self, app: Flask, state: _BufferState):
+        # started lazily, and again in a forked child: rows copied from the parent are the parent's to write
+        if state.pid == os.getpid():
+            return
+        with state.lock:
+            if state.pid == os.getpid():
+                return
+            if state.pid is not None:
+                state.rows.clear()
+                state.wakeup = threading.Event()
+            state.pid = os.getpid()
+            state.stopping = False
+            state.thread = threading.Thread(target=self._run, args=(app, state), name='write-behind', daemon=True)
+            state.thread.start()
+            register_exit_hook, state.exit_hook = not state.exit_hook, True
+        if register_exit_hook:
+            atexit.register(self.shutdown, app)
+
+    def _run(self, app: Flask, state: _BufferState):
+        while not state.stopping:
+            state.wakeup.wait(state.flush_interval)
+            state.wakeup.clear()
+            self.flush(app)
+
+    def flush(self, app: Flask = None) -> int:
+        """Insert every buffered row, one statement per batch, returns the number of rows written."""
+        app = app or current_app._get_current_object()
+        state = self._state(app)
+        written = 0
+        with state.flush_lock:
+            while True:
+                with state.lock:
+                    batch = [state.rows.popleft() for _ in range(min(state.batch_size, len(state.rows)))]
+                if not batch:
+                    return written
+                written += self._write(app, state, batch)
+
+    def _write(self, app: Flask, state: _BufferState, batch: List[Tuple[Type, Dict[str, Any]]]) -> int:
+        by_model: Dict[Type, List[Dict[str, Any]]] = {}
+        for model, row in batch:
+            by_model.setdefault(model, []).append(row)
+        with app.app_context():
+            try:
+                # plain inserts, nobody caches append-only rows so there is nothing to invalidate
+                for model, rows in by_model.items():
+                    self.db.session.execute(model.__table__.insert(), rows)
+                self.db.session.commit()
+            except SQLAlchemyError:
+                self.db.session.rollback()
+                app.logger.exception('Dropping %d buffered rows that could not be written', len(batch))
+                with state.lock:
+                    state.failed += len(batch)
+                return 0
+        with state.lock:
+            state.written += len(batch)
+        return len(batch)
+
+    def shutdown(self, app: Flask = None):
+        """Stop the flusher thread of this process and write what is left in the buffer."""
+        app = app or current_app._get_current_object()
+        state = self._state(app)
+        thread = state.thread
+        if thread is not None and state.pid == os.getpid():
+            state.stopping = True
+            state.wakeup.set()
+            thread.join()
+            # the next append starts a new flusher, keeping what is buffered
+            state.thread, state.pid = None, None
+        self.flush(app)
+
+    def stats(self, app: Flask = None) -> Dict[str, int]:
+        state = self._state(app)
+        with state.lock:
+            return dict(buffered=len(state.rows), written=state.written, dropped=state.dropped, failed=state.failed)
@@ -0,0 +1,467 @@
+"""Pre-forking HTTP server for the WSGI app.
+
+    python -m src.server --bind 0.0.0.0:8000 --workers 4 --max-requests 10000
+
+The master process opens the listening socket and forks ``--workers`` processes accepting on it, each serving
+requests on threads. The master never imports the app: every worker imports ``--factory`` (``module:callable``
+returning a WSGI app, ``entrypoint:make_app`` by default) and builds its app after the fork, so database
+pools, caches and background threads belong to one process, and the workers of a reload run the code that is
+on disk at that time.
+
+Signals to the master:
+
+* ``HUP``: reload without downtime. A new generation of workers is started and the old one is stopped once
+  all of them are ready; if the new generation fails to boot, the old one keeps serving.
+* ``TERM`` / ``INT``: graceful shutdown, workers stop accepting and finish the requests in flight.
+* ``QUIT``: immediate shutdown.
+
+A stopping worker calls ``--shutdown`` (``module:callable``, ``src.app:shutdown_app`` by default) with its app
+once the requests in flight are answered, so the app flushes its buffers and stops its pools before the
+process exits. Unless ``VDASHBOARD_HASHING_WORKERS`` is set, the cores are split between the password hashing
+pools of the workers instead of each pool starting one process per core.
+
+A worker stops gracefully after ``--max-requests`` requests, plus up to ``--max-requests-jitter`` so that
+workers do not all restart together, and is replaced. Every worker writes its health (status, requests
+served and in flight, peak RSS) to a file of ``--health-dir`` every ``--heartbeat`` seconds, which
+``/internal/workers`` lists; the master kills and replaces a worker whose heartbeat is older than ``--timeout``.
+"""
+import argparse
+import errno
+import importlib
+import json
+import logging
+import os
+import random
+import resource
+import secrets
+import select
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from werkzeug.serving import ThreadedWSGIServer, WSGIRequestHandler
+from werkzeug.wsgi import ClosingIterator
+
+logger = logging.getLogger(__name__)
+
+WORKER_BOOT_ERROR = 3
+BOOT_RETRY_DELAY = 1.0
+LISTEN_BACKLOG = 2048
+# workers of one server must sign and verify tokens with the same key
+SECRET_KEY_ENV = 'VDASHBOARD_SECRET_KEY'
+HASHING_WORKERS_ENV = 'VDASHBOARD_HASHING_WORKERS'
+
+
+def load_factory(spec: str) -> Callable[[], Callable]:
+    """Import ``module:callable``."""
+    module_name, _, attribute = spec.partition(':')
+    if not module_name or not attribute:
+        raise ValueError(f'Expected "module:callable", got {spec!r}')
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def parse_bind(bind: str) -> Tuple[str, int]:
+    host, _, port = bind.rpartition(':')
+    return host.strip('[]') or '127.0.0.1', int(port)
+
+
+def health_path(directory: str, pid: int) -> str:
+    return os.path.join(directory, f'{pid}.json')
+
+
+def read_health(directory: str) -> List[Dict[str, Any]]:
+    """Health of every worker reporting to ``directory``, with the age of its last heartbeat in seconds."""
+    workers, now = [], time.time()
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as health_file:
+                health = json.load(health_file)
+        except (OSError, ValueError):
+            # removed by its worker exiting, or being replaced
+            continue
+        health['heartbeat_age'] = round(now - health['updated'], 3)
+        workers.append(health)
+    return workers
+
+
+class _WorkerServer(ThreadedWSGIServer):
+    # request threads are joined by server_close, a graceful stop waits for the requests in flight
+    daemon_threads = False
+    stopping = False
+
+
+class WorkerProcess:
+    """The serving side of a forked worker: builds the app and serves it until stopped."""
+
+    def __init__(self, factory: str, listener: socket.socket, generation: int, health_dir: str,
+                 max_requests: int = 0, client_timeout: float = 30.0, heartbeat: float = 1.0,
+                 shutdown: str = None):
+        self.factory = factory
+        self.shutdown = shutdown
+        self.listener = listener
+        self.generation = generation
+        self.health_dir = health_dir
+        self.max_requests = max_requests
+        self.client_timeout = client_timeout
+        self.heartbeat = heartbeat
+        self.started = time.time()
+        self.status = 'booting'
+        self.requests = 0
+        self.in_flight = 0
+        self.server: Optional[_WorkerServer] = None
+        self._lock = threading.Lock()
+        self._health_lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def run(self) -> int:
+        try:
+            app = load_factory(self.factory)()
+        except Exception:
+            logger.exception('Worker %d failed to boot', os.getpid())
+            return WORKER_BOOT_ERROR
+        if hasattr(app, 'config'):
+            app.config['SERVER_HEALTH_DIR'] = self.health_dir
+
+        # a socket timeout on connections, a slow client cannot hold a request thread forever
+        handler = type('RequestHandler', (WSGIRequestHandler,), dict(timeout=self.client_timeout))
+        host = self.listener.getsockname()[0]
+        self.server = _WorkerServer(host, 0, self._counting(app), handler=handler, fd=self.listener.fileno())
+        signal.signal(signal.SIGTERM, lambda *_: self.stop())
+        self.write_health('ready')
+        threading.Thread(target=self._beat, name='worker-heartbeat', daemon=True).start()
+        try:
+            self.server.serve_forever()
+        finally:
+            self._stopped.set()
+            self._shutdown(app)
+            try:
+                os.remove(health_path(self.health_dir, os.getpid()))
+            except FileNotFoundError:
+                pass
+        return 0
+
+    def _shutdown(self, app: Callable):
+        # the worker leaves through os._exit, which runs no atexit handler
+        if not self.shutdown:
+            return
+        try:
+            load_factory(self.shutdown)(app)
+        except Exception:
+            logger.exception('Worker %d failed to shut its app down', os.getpid())
+
+    def _counting(self, app: Callable) -> Callable:
+        def counted(environ, start_response):
+            with self._lock:
+                self.requests += 1
+                self.in_flight += 1
+                recycle = self.max_requests and self.requests >= self.max_requests
+            if recycle:
+                logger.info('Worker %d served %d requests, recycling', os.getpid(), self.requests)
+                self.stop()
+            try:
+                return ClosingIterator(app(environ, start_response), self._finished)
+            except BaseException:
+                self._finished()
+                raise
+
+        return counted
+
+    def _finished(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def stop(self):
+        """Stop accepting, ``serve_forever`` returns once the requests in flight are answered."""
+        if self.server is None or self.server.stopping:
+            return
+        self.server.stopping = True
+        self.write_health('stopping')
+        # shutdown() waits for the serve_forever loop, which may be the thread running this signal handler
+        threading.Thread(target=self.server.shutdown, name='worker-shutdown', daemon=True).start()
+
+    def _beat(self):
+        while not self._stopped.wait(self.heartbeat):
+            self.write_health()
+
+    def write_health(self, status: str = None):
+        with self._lock:
+            self.status = status or self.status
+            health = dict(pid=os.getpid(), generation=self.generation, status=self.status, started=self.started,
+                          updated=time.time(), requests=self.requests, in_flight=self.in_flight,
+                          max_requests=self.max_requests,
+                          # kilobytes on Linux
+                          max_rss=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+        path = health_path(self.health_dir, os.getpid())
+        with self._health_lock:
+            with open(f'{path}.tmp', 'w') as health_file:
+                json.dump(health, health_file)
+            os.replace(f'{path}.tmp', path)
+
+
+class WorkerRecord:
+    """What the master knows of one of its workers."""
+
+    def __init__(self, pid: int, generation: int):
+        self.pid = pid
+        self.generation = generation
+        self.ready = False
+        self.heartbeat = time.monotonic()
+        self.terminated: Optional[float] = None
+
+
+class PreforkServer:
+    """The master process: forks workers, keeps their number up and handles reloads and shutdowns."""
+
+    def __init__(self, factory: str, bind: str = '127.0.0.1:8000', workers: int = None, max_requests: int = 0,
+                 max_requests_jitter: int = 0, timeout: float = 30.0, graceful_timeout: float = 30.0,
+                 client_timeout: float = 30.0, heartbeat: float = 1.0, health_dir: str = None,
+                 shutdown: str = 'src.app:shutdown_app'):
+        self.factory = factory
+        self.shutdown = shutdown
+        self.address = parse_bind(bind)
+        self.worker_count = workers or os.cpu_count() or 1
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.timeout = timeout
+        self.graceful_timeout = graceful_timeout
+        self.client_timeout = client_timeout
+        self.heartbeat = heartbeat
+        self.health_dir = health_dir
+        self.workers: Dict[int, WorkerRecord] = {}
+        self.generation = 1
+        self.stopping = False
+        self.exit_code = 0
+        self.retry_boot_at = 0.0
+        self.listener: Optional[socket.socket] = None
+        self._signals: List[int] = []
+        self._wakeup: Tuple[int, int] = (-1, -1)
+
+    def run(self) -> int:
+        """Serve until a shutdown signal, returns the exit code of the master."""
+        owns_health_dir = self.health_dir is None
+        if owns_health_dir:
+            self.health_dir = tempfile.mkdtemp(prefix='vdashboard-workers-')
+        if SECRET_KEY_ENV not in os.environ:
+            logger.warning('%s is not set, using a random key for this run', SECRET_KEY_ENV)
+            os.environ[SECRET_KEY_ENV] = secrets.token_hex(32)
+        if HASHING_WORKERS_ENV not in os.environ:
+            # every worker has a hashing pool, together they use each core once
+            os.environ[HASHING_WORKERS_ENV] = str(max(1, (os.cpu_count() or 1) // self.worker_count))
+
+        family = socket.AF_INET6 if ':' in self.address[0] else socket.AF_INET
+        self.listener = socket.create_server(self.address, family=family, backlog=LISTEN_BACKLOG)
+        host, port = self.listener.getsockname()[:2]
+        logger.info('Listening at http://%s:%d (master %d, %d workers)', host, port, os.getpid(), self.worker_count)
+        self._install_signals()
+        try:
+            while True:
+                self._handle_signals()
+                self._reap()
+                self._check_workers()
+                if self.stopping and not self.workers:
+                    break
+                if not self.stopping:
+                    self._spawn_missing()
+                self._sleep()
+        finally:
+            self.listener.close()
+            for fd in self._wakeup:
+                os.close(fd)
+            if owns_health_dir:
+                shutil.rmtree(self.health_dir, ignore_errors=True)
+        logger.info('Master %d exiting', os.getpid())
+        return self.exit_code
+
+    def _install_signals(self):
+        read_fd, write_fd = os.pipe()
+        os.set_blocking(read_fd, False)
+        os.set_blocking(write_fd, False)
+        self._wakeup = (read_fd, write_fd)
+        signal.set_wakeup_fd(write_fd)
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGQUIT, signal.SIGCHLD):
+            signal.signal(signum, self._signals_handler)
+
+    def _signals_handler(self, signum, frame):
+        self._signals.append(signum)
+
+    def _sleep(self):
+        try:
+            readable, _, _ = select.select([self._wakeup[0]], [], [], min(self.heartbeat, 1.0))
+        except InterruptedError:
+            return
+        if readable:
+            try:
+                while os.read(self._wakeup[0], 512):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def _handle_signals(self):
+        while self._signals:
+            signum = self._signals.pop(0)
+            if signum == signal.SIGHUP and not self.stopping:
+                self.generation += 1
+                logger.info('Reloading, starting worker generation %d', self.generation)
+            elif signum in (signal.SIGTERM, signal.SIGINT):
+                self.stop()
+            elif signum == signal.SIGQUIT:
+                self.stop(graceful=False)
+
+    def stop(self, graceful: bool = True):
+        if not self.stopping:
+            logger.info('Shutting down%s', '' if graceful else ' now')
+        self.stopping = True
+        for worker in list(self.workers.values()):
+            self._terminate(worker, signal.SIGTERM if graceful else signal.SIGKILL)
+
+    def _terminate(self, worker: WorkerRecord, signum: int = signal.SIGTERM):
+        if signum == signal.SIGTERM and worker.terminated is not None:
+            return
+        worker.terminated = worker.terminated or time.monotonic()
+        try:
+            os.kill(worker.pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def _reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            worker = self.workers.pop(pid, None)
+            try:
+                os.remove(health_path(self.health_dir, pid))
+            except FileNotFoundError:
+                pass
+            if worker is not None:
+                self._worker_exited(worker, os.waitstatus_to_exitcode(status))
+
+    def _worker_exited(self, worker: WorkerRecord, code: int):
+        if code != WORKER_BOOT_ERROR or self.stopping:
+            log = logger.info if code == 0 or worker.terminated else logger.warning
+            log('Worker %d (generation %d) exited with %d', worker.pid, worker.generation, code)
+            return
+        fallback = [other for other in self.workers.values() if other.generation < worker.generation and other.ready]
+        if worker.generation == self.generation and fallback:
+            self.generation = max(other.generation for other in fallback)
+            logger.error('Worker generation %d failed to boot, keeping generation %d', worker.generation,
+                         self.generation)
+            for other in list(self.workers.values()):
+                if other.generation > self.generation:
+                    self._terminate(other)
+        elif any(other.ready for other in self.workers.values()):
+            logger.error('Worker %d failed to boot, retrying', worker.pid)
+            self.retry_boot_at = time.monotonic() + BOOT_RETRY_DELAY
+        else:
+            logger.error('Worker %d failed to boot, shutting down', worker.pid)
+            self.exit_code = 1
+            self.stop()
+
+    def _check_workers(self):
+        now = time.monotonic()
+        for worker in list(self.workers.values()):
+            try:
+                with open(health_path(self.health_dir, worker.pid)) as health_file:
+                    health = json.load(health_file)
+            except (OSError, ValueError):
+                health = None
+            if health is not None:
+                worker.ready = worker.ready or health['status'] != 'booting'
+                worker.heartbeat = max(worker.heartbeat, now - (time.time() - health['updated']))
+                if health['status'] == 'stopping' and worker.terminated is None:
+                    # recycling on its own: replaced right away, killed if it does not finish in time
+                    worker.terminated = now
+            if worker.terminated is not None:
+                if now - worker.terminated > self.graceful_timeout:
+                    logger.warning('Worker %d did not stop in %.0fs, killing it', worker.pid, self.graceful_timeout)
+                    self._terminate(worker, signal.SIGKILL)
+            elif now - worker.heartbeat > self.timeout:
+                logger.error('Worker %d missed its heartbeat for %.0fs, killing it', worker.pid, self.timeout)
+                self._terminate(worker, signal.SIGKILL)
+
+        current = [worker for worker in self.workers.values() if worker.generation == self.generation]
+        if len(current) >= self.worker_count and all(worker.ready for worker in current):
+            for worker in list(self.workers.values()):
+                if worker.generation != self.generation and worker.terminated is None:
+                    self._terminate(worker)
+
+    def _spawn_missing(self):
+        if time.monotonic() < self.retry_boot_at:
+            return
+        current = sum(1 for worker in self.workers.values()
+                      if worker.generation == self.generation and worker.terminated is None)
+        for _ in range(self.worker_count - current):
+            self._spawn()
+
+    def _spawn(self):
+        max_requests = self.max_requests and self.max_requests + random.randint(0, self.max_requests_jitter)
+        process = WorkerProcess(self.factory, self.listener, self.generation, self.health_dir, max_requests,
+                                self.client_timeout, self.heartbeat, self.shutdown)
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = WorkerRecord(pid, self.generation)
+            return
+
+        code = 1
+        try:
+            self._reset_child_signals()
+            code = process.run()
+        except BaseException:
+            logger.exception('Worker %d crashed', os.getpid())
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+
+    def _reset_child_signals(self):
+        signal.set_wakeup_fd(-1)
+        for fd in self._wakeup:
+            os.close(fd)
+        for signum in (signal.SIGHUP, signal.SIGINT):
+            signal.signal(signum, signal.SIG_IGN)
+        for signum in (signal.SIGTERM, signal.SIGQUIT, signal.SIGCHLD):
+            signal.signal(signum, signal.SIG_DFL)
+
+
+def main(argv: List[str] = None) -> int:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--factory', default='entrypoint:make_app',
+                            help='module:callable returning the WSGI app, called in each worker')
+    arg_parser.add_argument('--bind', default='127.0.0.1:8000', help='host:port, port 0 picks a free one')
+    arg_parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    arg_parser.add_argument('--max-requests', type=int, default=0, help='recycle workers after this many requests')
+    arg_parser.add_argument('--max-requests-jitter', type=int, default=0)
+    arg_parser.add_argument('--timeout', type=float, default=30.0, help='seconds without heartbeat before a kill')
+    arg_parser.add_argument('--graceful-timeout', type=float, default=30.0)
+    arg_parser.add_argument('--client-timeout', type=float, default=30.0, help='socket timeout of client connections')
+    arg_parser.add_argument('--heartbeat', type=float, default=1.0)
+    arg_parser.add_argument('--health-dir', help='where workers report their health, a temporary directory by default')
+    arg_parser.add_argument('--shutdown', default='src.app:shutdown_app',
+                            help='module:callable called with the app when a worker stops, empty for none')
+    args = arg_parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s] [%(process)d] %(levelname)s %(message)s')
+    server = PreforkServer(args.factory, args.bind, args.workers, args.max_requests, args.max_requests_jitter,
+                           args.timeout, args.graceful_timeout, args.client_timeout, args.heartbeat, args.health_dir,
+                           args.shutdown)
+    try:
+        return server.run()
+    except OSError as e:
+        if e.errno != errno.EADDRINUSE:
+            raise
+        logger.error('Cannot listen on %s: %s', args.bind, e)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
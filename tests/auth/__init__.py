@@ -3,7 +3,7 @@ from unittest import TestCase
 
 from src.app import create_app
 from src.config import TestConfig
-from src.extensions import database
+from src.extensions import database, write_behind
 
 
 class AuthBase(TestCase):
@@ -21,5 +21,6 @@ class AuthBase(TestCase):
     def tearDownClass(cls) -> None:
         super().tearDownClass()
         with cls.app.app_context():
+            write_behind.shutdown()
             database.drop_all()
             os.remove(TestConfig.DB_PATH)
@@ -0,0 +1,110 @@
+import os
+import time
+from unittest import TestCase
+
+from sqlalchemy import event
+
+from src.app import create_app
+from src.config import TestConfig
+from src.endpoints.auth.model import LoginEvent, User
+from src.extensions import cache, database, response_cache, write_behind
+
+
+def login_event_config(**overrides):
+    attrs = dict(RATELIMIT_ENABLED=False, WRITE_BEHIND_BATCH_SIZE=100, WRITE_BEHIND_FLUSH_INTERVAL=60)
+    attrs.update(overrides)
+    return type('LoginEventConfig', (TestConfig,), attrs)
+
+
+class TestLoginEvents(TestCase):
+
+    def create_app(self, **overrides):
+        self.app = create_app(login_event_config(**overrides))
+        with self.app.app_context():
+            database.create_all()
+        return self.app
+
+    def tearDown(self) -> None:
+        with self.app.app_context():
+            write_behind.shutdown()
+            database.drop_all()
+        os.remove(TestConfig.DB_PATH)
+
+    def record(self, count: int) -> list:
+        with self.app.app_context():
+            return [LoginEvent.record(f'user{i}@test.test', LoginEvent.SUCCESS) for i in range(count)]
+
+    def inserted_batches(self) -> list:
+        batches = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith('INSERT INTO login_event'):
+                batches.append(len(parameters) if executemany else 1)
+
+        with self.app.app_context():
+            event.listen(database.engine, 'before_cursor_execute', before_cursor_execute)
+        self.addCleanup(lambda: event.remove(database.get_engine(self.app), 'before_cursor_execute',
+                                             before_cursor_execute))
+        return batches
+
+    def test_login_outcomes(self):
+        app = self.create_app()
+        with app.app_context():
+            user = User(email='events@test.test', display_name='events')
+            user.set_password('#1Password')
+            user.save()
+        client = app.test_client()
+        for password, email in (('#1Password', 'events@test.test'), ('wrong', 'events@test.test'),
+                                ('#1Password', 'nobody@test.test')):
+            client.post('/api/v1/auth/login', json=dict(email=email, password=password))
+
+        self.assertEqual(write_behind.flush(app), 3)
+        with app.app_context():
+            events = LoginEvent.query.order_by(LoginEvent.id).all()
+            self.assertEqual([(e.email, e.outcome, e.remote_addr) for e in events],
+                             [('events@test.test', LoginEvent.SUCCESS, '127.0.0.1'),
+                              ('events@test.test', LoginEvent.BAD_PASSWORD, '127.0.0.1'),
+                              ('nobody@test.test', LoginEvent.UNKNOWN_EMAIL, '127.0.0.1')])
+
+    def test_flush_inserts_one_statement_per_batch(self):
+        self.create_app()
+        batches = self.inserted_batches()
+        self.record(7)
+        self.assertEqual(write_behind.flush(self.app), 7)
+        self.assertEqual(batches, [7])
+
+    def test_flush_leaves_caches_alone(self):
+        self.create_app()
+        self.record(3)
+        self.assertEqual(write_behind.flush(self.app), 3)
+        with self.app.app_context():
+            self.assertIsNone(cache.get(response_cache._tag_key(LoginEvent.__tablename__)))
+
+    def test_flush_splits_batches(self):
+        self.create_app(WRITE_BEHIND_BATCH_SIZE=3)
+        batches = self.inserted_batches()
+        self.record(7)
+        write_behind.flush(self.app)
+        self.assertEqual(sum(batches), 7)
+        self.assertLessEqual(max(batches), 3)
+        self.assertEqual(batches[0], 3)
+        with self.app.app_context():
+            self.assertEqual(LoginEvent.query.count(), 7)
+
+    def test_full_buffer_drops_and_counts(self):
+        self.create_app(WRITE_BEHIND_MAX_BUFFER=5)
+        self.assertEqual(self.record(8), [True] * 5 + [False] * 3)
+        with self.app.app_context():
+            self.assertEqual(write_behind.stats(), dict(buffered=5, written=0, dropped=3, failed=0))
+            write_behind.flush()
+            self.assertEqual(write_behind.stats(), dict(buffered=0, written=5, dropped=3, failed=0))
+
+    def test_flushes_on_interval(self):
+        self.create_app(WRITE_BEHIND_FLUSH_INTERVAL=0.05)
+        self.record(2)
+        deadline = time.monotonic() + 5
+        with self.app.app_context():
+            while LoginEvent.query.count() < 2 and time.monotonic() < deadline:
+                database.session.remove()
+                time.sleep(0.02)
+            self.assertEqual(LoginEvent.query.count(), 2)
@@ -0,0 +1,41 @@
+from http import HTTPStatus
+
+from src.endpoints.auth.model import PasswordPolicy, User
+from . import AuthBase
+
+
+class TestPasswordPolicy(AuthBase):
+    email = 'policy@test.test'
+    password = '#1Test1234'
+
+    def test_needs_rehash(self):
+        policy = PasswordPolicy(iterations=1000, salt_length=16)
+        with self.app.app_context():
+            self.assertFalse(policy.needs_rehash(policy.hash(self.password)))
+            self.assertTrue(policy.needs_rehash(PasswordPolicy(iterations=500).hash(self.password)))
+            sha512 = PasswordPolicy(algorithm='sha512', iterations=1000)
+            self.assertTrue(policy.needs_rehash(sha512.hash(self.password)))
+            self.assertTrue(policy.needs_rehash(PasswordPolicy(iterations=1000, salt_length=8).hash(self.password)))
+            self.assertTrue(policy.needs_rehash('sha256$salt$legacy'))
+
+    def test_outdated_hash_is_upgraded_on_login(self):
+        with self.app.app_context():
+            user = User.create(save=False, email=self.email)
+            user.set_password(self.password, PasswordPolicy(iterations=500))
+            user.save()
+            outdated_hash = user.password_hash
+
+        response = self.client.post('/api/v1/auth/login', json=dict(email=self.email, password=self.password))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+        with self.app.app_context():
+            upgraded_hash = User.query.get(self.email).password_hash
+            self.assertNotEqual(outdated_hash, upgraded_hash)
+            self.assertTrue(upgraded_hash.startswith('pbkdf2:sha256:1000$'))
+            self.assertTrue(User.query.get(self.email).check_password(self.password))
+
+    def test_calibrate_command(self):
+        result = self.app.test_cli_runner().invoke(args=['auth', 'calibrate-hash',
+                                                         '--target-ms', '5', '--samples', '1'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('VDASHBOARD_PASSWORD_HASH_ITERATIONS=', result.output)
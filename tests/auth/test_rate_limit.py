@@ -0,0 +1,81 @@
+from http import HTTPStatus
+from unittest import TestCase
+
+from src.extensions.rate_limit import MemoryBackend
+from . import AuthBase
+
+
+class TestLoginRateLimit(AuthBase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.app.config.update(RATELIMIT_LOGIN_PER_IP=(6, 60), RATELIMIT_LOGIN_PER_EMAIL=(3, 60))
+        self.app.extensions['rate_limiter'].reset()
+
+    def login(self, email: str, **kwargs):
+        return self.client.post('/api/v1/auth/login', json=dict(email=email, password='#1Test1234'), **kwargs)
+
+    def test_email_limit(self):
+        for _ in range(3):
+            self.assertEqual(self.login('victim@test.test').status_code, HTTPStatus.UNAUTHORIZED)
+
+        response = self.login('Victim@test.test ', environ_base=dict(REMOTE_ADDR='10.0.0.2'))
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertGreaterEqual(int(response.headers['Retry-After']), 1)
+        self.assertEqual(response.get_json()['status_code'], HTTPStatus.TOO_MANY_REQUESTS)
+
+        self.assertEqual(self.login('other@test.test').status_code, HTTPStatus.UNAUTHORIZED)
+
+    def test_ip_limit_rejects_before_parsing(self):
+        for i in range(6):
+            self.assertEqual(self.login(f'user{i}@test.test').status_code, HTTPStatus.UNAUTHORIZED)
+
+        response = self.client.post('/api/v1/auth/login', json=dict(email='not an email'))
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertNotIn('db', response.headers.get('Server-Timing', ''))
+        self.assertNotIn('args', response.headers.get('Server-Timing', ''))
+
+        response = self.login('user0@test.test', environ_base=dict(REMOTE_ADDR='10.0.0.3'))
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+
+    def test_disabled(self):
+        self.app.config['RATELIMIT_ENABLED'] = False
+        try:
+            for _ in range(5):
+                self.assertEqual(self.login('victim@test.test').status_code, HTTPStatus.UNAUTHORIZED)
+        finally:
+            self.app.config['RATELIMIT_ENABLED'] = True
+
+
+class TestMemoryBackend(TestCase):
+
+    def test_sliding_window(self):
+        backend = MemoryBackend()
+        self.assertTrue(all(backend.hit('key', 4, 10, 100.0 + i) for i in range(4)))
+        self.assertFalse(backend.hit('key', 4, 10, 109.0))
+
+        # a quarter into the next window, three quarters of the previous count still apply
+        self.assertTrue(backend.hit('key', 4, 10, 112.5))
+        self.assertFalse(backend.hit('key', 4, 10, 112.5))
+        self.assertTrue(backend.hit('key', 4, 10, 119.0))
+        self.assertTrue(backend.hit('other', 4, 10, 112.5))
+
+    def test_limits_with_different_windows(self):
+        backend = MemoryBackend()
+        for i in range(3):
+            self.assertTrue(backend.hit('email', 3, 3600, 100000.0 + i))
+            self.assertTrue(backend.hit('ip', 100, 1, 100000.0 + i))
+        self.assertFalse(backend.hit('email', 3, 3600, 100003.0))
+        self.assertTrue(backend.hit('email', 3, 60, 100003.0))
+
+    def test_expired_counters_are_dropped(self):
+        backend = MemoryBackend(cleanup_interval=10)
+        backend.hit('hour', 3, 3600, 100000.0)
+        backend.hit('second', 3, 1, 100000.0)
+        backend.hit('second', 3, 1, 100005.0)
+        self.assertEqual(len(backend), 3)
+
+        backend.hit('second', 3, 1, 100010.0)
+        self.assertEqual(len(backend), 2)
+        backend.hit('second', 3, 1, 100000.0 + 2 * 3600)
+        self.assertEqual(len(backend), 1)
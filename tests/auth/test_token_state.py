@@ -0,0 +1,145 @@
+from http import HTTPStatus
+
+from src.endpoints.auth.model import User
+from src.extensions import revocation_store
+from src.extensions.token_state import BloomFilter, VerifiedTokenCache
+from . import AuthBase
+
+
+class BitmapClient:
+    """Stand-in for the Redis client of the revocation store, serving fixed bloom bitmaps."""
+
+    def __init__(self, bitmap: bytes):
+        self.bitmap = bitmap
+        self.state = None
+        self.locked_during_mget = []
+
+    def register_script(self, script):
+        return lambda keys, args: None
+
+    def mget(self, keys):
+        self.locked_during_mget.append(self.state.lock.locked())
+        return [None, self.bitmap]
+
+
+class TestTokenState(AuthBase):
+    email = 'tokens@test.test'
+    password = '#1Test1234'
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        with cls.app.app_context():
+            user = User.create(save=False, email=cls.email, is_admin=True)
+            user.set_password(cls.password)
+            user.save()
+
+    def login(self) -> dict:
+        response = self.client.post('/api/v1/auth/login', json=dict(email=self.email, password=self.password))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return response.get_json()['additional_information']
+
+    def get_users(self, access_token: str):
+        return self.client.get('/api/v1/auth/users', headers=dict(Authorization=f'Bearer {access_token}'))
+
+    def post_with(self, path: str, token: str, **payload):
+        return self.client.post(f'/api/v1/auth/{path}', json=payload, headers=dict(Authorization=f'Bearer {token}'))
+
+    def test_logout_revokes_tokens(self):
+        tokens = self.login()
+        self.assertEqual(self.get_users(tokens['access_token']).status_code, HTTPStatus.OK)
+
+        response = self.post_with('logout', tokens['access_token'], refresh_token=tokens['refresh_token'])
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(self.get_users(tokens['access_token']).status_code, HTTPStatus.UNAUTHORIZED)
+        self.assertEqual(self.post_with('refresh', tokens['refresh_token']).status_code, HTTPStatus.UNAUTHORIZED)
+
+    def test_logout_rejects_foreign_refresh_token(self):
+        tokens = self.login()
+        response = self.post_with('logout', tokens['access_token'], refresh_token=tokens['access_token'])
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        response = self.post_with('logout', tokens['access_token'], refresh_token='not.a.token')
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_refresh_rotation(self):
+        tokens = self.login()
+        self.assertEqual(self.post_with('refresh', tokens['access_token']).status_code, HTTPStatus.UNAUTHORIZED)
+
+        response = self.post_with('refresh', tokens['refresh_token'])
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        rotated = response.get_json()['additional_information']
+        self.assertEqual(self.get_users(rotated['access_token']).status_code, HTTPStatus.OK)
+
+        self.assertEqual(self.post_with('refresh', tokens['refresh_token']).status_code, HTTPStatus.UNAUTHORIZED)
+        self.assertEqual(self.post_with('refresh', rotated['refresh_token']).status_code, HTTPStatus.OK)
+
+    def test_verified_token_cache(self):
+        tokens = self.login()
+        verified: VerifiedTokenCache = self.app.extensions['jwt_verified_cache']
+        self.assertIsNone(verified.get(tokens['access_token']))
+        self.assertEqual(self.get_users(tokens['access_token']).status_code, HTTPStatus.OK)
+        self.assertEqual(verified.get(tokens['access_token'])['sub'], self.email)
+        self.assertEqual(self.get_users(tokens['access_token']).status_code, HTTPStatus.OK)
+
+        header, payload, signature = tokens['access_token'].split('.')
+        tampered = '.'.join((header, payload, signature[::-1]))
+        self.assertEqual(self.get_users(tampered).status_code, HTTPStatus.UNAUTHORIZED)
+
+        small = VerifiedTokenCache(maxsize=2)
+        for token in ('a', 'b', 'c'):
+            small.put(token, dict(sub=token))
+        self.assertEqual(len(small), 2)
+        self.assertIsNone(small.get('a'))
+        small.put('expired', dict(sub='expired', exp=0))
+        self.assertIsNone(small.get('expired'))
+
+    def test_revocation_seen_by_other_workers(self):
+        with self.app.app_context():
+            revocation_store.revoke('revoked-jti')
+            worker_state = self.app.extensions['revocation_store']
+
+            self.app.extensions['revocation_store'] = type(worker_state)(
+                worker_state.size_bits, worker_state.hashes, worker_state.generation_seconds, 60)
+            try:
+                self.assertTrue(revocation_store.is_revoked('revoked-jti'))
+                self.assertFalse(revocation_store.is_revoked('other-jti'))
+            finally:
+                self.app.extensions['revocation_store'] = worker_state
+
+    def test_sync_reads_redis_outside_the_lock(self):
+        with self.app.app_context():
+            worker_state = self.app.extensions['revocation_store']
+            shared = BloomFilter(worker_state.size_bits, worker_state.hashes)
+            shared.add('shared-jti')
+            client = BitmapClient(shared.to_bytes())
+            client.state = type(worker_state)(worker_state.size_bits, worker_state.hashes,
+                                              worker_state.generation_seconds, 60, client)
+            self.app.extensions['revocation_store'] = client.state
+            try:
+                revocation_store.cache.set('revoked:jti:shared-jti', True)
+                self.assertTrue(revocation_store.is_revoked('shared-jti'))
+                self.assertFalse(revocation_store.is_revoked('other-jti'))
+                self.assertEqual(client.locked_during_mget, [False])
+            finally:
+                self.app.extensions['revocation_store'] = worker_state
+
+    def test_bloom_filter(self):
+        bloom, other = BloomFilter(4096, 5), BloomFilter(4096, 5)
+        bloom.add('first')
+        other.add('second')
+        self.assertIn('first', bloom)
+        self.assertNotIn('second', bloom)
+        bloom.merge(other.to_bytes())
+        self.assertIn('second', bloom)
+
+    def test_bloom_filter_reads_redis_bitmaps(self):
+        bloom = BloomFilter(4096, 5)
+        positions = list(bloom.positions('revoked'))
+        # what SETBIT leaves on the server: offset 0 is the high bit, the string ends at the highest set bit
+        bitmap = bytearray(max(positions) // 8 + 1)
+        for position in positions:
+            bitmap[position // 8] |= 1 << (7 - position % 8)
+        bloom.merge(bytes(bitmap))
+        self.assertIn('revoked', bloom)
+        self.assertNotIn('other', bloom)
+        self.assertEqual(bloom.to_bytes().rstrip(b'\0'), bytes(bitmap))
@@ -0,0 +1,99 @@
+from http import HTTPStatus
+
+from flask_jwt_extended import create_access_token
+
+from src.endpoints.auth.model import User
+from . import AuthBase
+
+
+class TestUsersBatch(AuthBase):
+    password = '#1Test1234'
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        with cls.app.app_context():
+            User.create(email='admin@test.test', password_hash='x', is_admin=True)
+            User.create(email='user@test.test', password_hash='x')
+            cls.headers = dict(Authorization=f'Bearer {create_access_token("admin@test.test")}')
+            cls.user_headers = dict(Authorization=f'Bearer {create_access_token("user@test.test")}')
+
+    def post_batch(self, users, upsert=False, headers=None):
+        return self.client.post('/api/v1/auth/users:batch', json=dict(users=users, upsert=upsert),
+                                headers=headers or self.headers)
+
+    def test_bulk_methods_chunk(self):
+        rows = [dict(email=f'bulk{i}@test.test', password_hash='hash', display_name=None) for i in range(5)]
+        with self.app.app_context():
+            self.assertIsNone(User.get('bulk0@test.test'))
+            self.assertEqual(User.bulk_create(rows, chunk_size=2), 5)
+            self.assertIsNotNone(User.get('bulk0@test.test'))
+
+            rows[0]['display_name'] = 'renamed'
+            rows.append(dict(email='bulk5@test.test', password_hash='hash', display_name='new'))
+            self.assertEqual(User.bulk_upsert(rows, chunk_size=4), 6)
+            self.assertEqual(User.get('bulk0@test.test').display_name, 'renamed')
+            self.assertEqual(User.query.filter(User.email.like('bulk%')).count(), 6)
+
+            self.assertEqual(User.bulk_delete([row['email'] for row in rows] + ['absent@test.test'], chunk_size=4), 6)
+            self.assertIsNone(User.get('bulk0@test.test'))
+
+    def test_batch_endpoint(self):
+        users = [dict(email=f'batch{i}@test.test', password=self.password, display_name=f'batch{i}') for i in range(3)]
+        response = self.post_batch(users)
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        self.assertEqual(response.get_json()['body'], dict(count=3))
+
+        login = self.client.post('/api/v1/auth/login', json=dict(email='batch1@test.test', password=self.password))
+        self.assertEqual(login.status_code, HTTPStatus.OK)
+
+        self.assertEqual(self.post_batch(users[:1]).status_code, HTTPStatus.CONFLICT)
+        users[0]['display_name'] = 'renamed'
+        self.assertEqual(self.post_batch(users[:1], upsert=True).status_code, HTTPStatus.OK)
+        with self.app.app_context():
+            self.assertEqual(User.get('batch0@test.test').display_name, 'renamed')
+
+        response = self.client.delete('/api/v1/auth/users:batch', headers=self.headers,
+                                      json=dict(emails=[user['email'] for user in users]))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.get_json()['body'], dict(count=3))
+
+    def test_batch_validation(self):
+        response = self.post_batch([dict(email='batch@test.test', password='weak')])
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_batch_requires_admin(self):
+        users = [dict(email='takeover@test.test', password=self.password)]
+        self.assertEqual(self.post_batch(users, headers=self.user_headers).status_code, HTTPStatus.FORBIDDEN)
+        response = self.client.delete('/api/v1/auth/users:batch', headers=self.user_headers,
+                                      json=dict(emails=['admin@test.test']))
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        with self.app.app_context():
+            self.assertIsNone(User.get('takeover@test.test'))
+            self.assertIsNotNone(User.get('admin@test.test'))
+
+    def test_upsert_keeps_passwords(self):
+        self.assertEqual(self.post_batch([dict(email='kept@test.test', password=self.password)]).status_code,
+                         HTTPStatus.CREATED)
+        response = self.post_batch([dict(email='kept@test.test', password='#2Other5678', display_name='kept')],
+                                   upsert=True)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        with self.app.app_context():
+            self.assertEqual(User.get('kept@test.test').display_name, 'kept')
+
+        login = self.client.post('/api/v1/auth/login', json=dict(email='kept@test.test', password='#2Other5678'))
+        self.assertEqual(login.status_code, HTTPStatus.UNAUTHORIZED)
+        login = self.client.post('/api/v1/auth/login', json=dict(email='kept@test.test', password=self.password))
+        self.assertEqual(login.status_code, HTTPStatus.OK)
+
+    def test_set_admin_command(self):
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=['auth', 'set-admin', 'user@test.test'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        with self.app.app_context():
+            self.assertTrue(User.get('user@test.test').is_admin)
+        result = runner.invoke(args=['auth', 'set-admin', 'user@test.test', '--revoke'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        with self.app.app_context():
+            self.assertFalse(User.get('user@test.test').is_admin)
+        self.assertNotEqual(runner.invoke(args=['auth', 'set-admin', 'absent@test.test']).exit_code, 0)
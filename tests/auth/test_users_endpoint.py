@@ -0,0 +1,68 @@
+import base64
+import json
+from http import HTTPStatus
+
+from flask_jwt_extended import create_access_token
+
+from src.endpoints.auth.model import User
+from src.extensions import database
+from . import AuthBase
+
+
+class TestUsersEndpoint(AuthBase):
+    emails = sorted(f'user{i}@test.test' for i in range(7))
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        with cls.app.app_context():
+            database.session.add_all(User(email=email, password_hash='hash', display_name=email.split('@')[0],
+                                          is_admin=email == cls.emails[0])
+                                     for email in cls.emails)
+            database.session.commit()
+            cls.headers = dict(Authorization=f'Bearer {create_access_token(cls.emails[0])}')
+            cls.user_headers = dict(Authorization=f'Bearer {create_access_token(cls.emails[1])}')
+
+    def get_page(self, **params):
+        return self.client.get('/api/v1/auth/users', query_string=params, headers=self.headers)
+
+    def test_requires_token(self):
+        response = self.client.get('/api/v1/auth/users')
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+
+    def test_requires_admin(self):
+        response = self.client.get('/api/v1/auth/users', headers=self.user_headers)
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+    def test_keyset_pages(self):
+        seen, cursor = [], None
+        while True:
+            response = self.get_page(limit=3, **(dict(cursor=cursor) if cursor else {}))
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            response_dict = response.get_json()
+            seen.extend(user['email'] for user in response_dict['body'])
+            cursor = response_dict['additional_information']['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(seen, self.emails)
+
+    def test_sparse_fields(self):
+        response = self.get_page(limit=2, fields='display_name')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.get_json()['body'], [dict(display_name='user0'), dict(display_name='user1')])
+
+    def test_empty_fields_selects_all(self):
+        response = self.get_page(limit=1, fields='')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.get_json()['body'][0]['email'], self.emails[0])
+        self.assertEqual(response.get_json()['body'], self.get_page(limit=1).get_json()['body'])
+
+    def test_invalid_args(self):
+        self.assertEqual(self.get_page(fields='password_hash').status_code, HTTPStatus.BAD_REQUEST)
+        self.assertEqual(self.get_page(limit=0).status_code, HTTPStatus.BAD_REQUEST)
+        self.assertEqual(self.get_page(cursor='not-a-cursor').status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_cursor_values_must_be_scalars(self):
+        for values in ([{'email': 'x'}], [['x']]):
+            cursor = base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+            self.assertEqual(self.get_page(cursor=cursor).status_code, HTTPStatus.BAD_REQUEST)
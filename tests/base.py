@@ -1,20 +1,66 @@
+import json
 import os
-from typing import Union
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
 from unittest import TestCase
 
 from flask import Response
+from flask_jwt_extended import create_access_token
 
 from src.app import create_app
-from src.config import TestConfig
-from src.extensions import database
+from src.config import Config, TestConfig
+from src.endpoints.auth.model import User
+from src.extensions import database, write_behind
+
+
+def admin_headers(email: str = 'admin@test.test') -> dict:
+    """Authorization header of an admin user, created in the current app context when missing."""
+    if User.get(email) is None:
+        User.create(email=email, password_hash='x', is_admin=True)
+    return dict(Authorization=f'Bearer {create_access_token(email)}')
+
+
+async def asgi_request(app, method: str, path: str, json_body: Any = None,
+                       headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+    """Call an ASGI ``app`` in-process with one HTTP request, returns ``(status, headers, body)``.
+
+    Response header names are lower-cased.
+    """
+    body = json.dumps(json_body).encode() if json_body is not None else b''
+    headers = dict(headers or {}, **{'Content-Length': str(len(body))})
+    if json_body is not None:
+        headers['Content-Type'] = 'application/json'
+    raw_headers = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers.items()]
+    path, _, query = path.partition('?')
+    scope = dict(type='http', asgi=dict(version='3.0'), http_version='1.1', method=method, scheme='http',
+                 path=path, raw_path=path.encode(), query_string=query.encode(), root_path='',
+                 headers=raw_headers, client=('127.0.0.1', 0), server=('testserver', 80))
+    sent: List[dict] = []
+    received = False
+
+    async def receive():
+        nonlocal received
+        if received:
+            return dict(type='http.disconnect')
+        received = True
+        return dict(type='http.request', body=body, more_body=False)
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    start = next(message for message in sent if message['type'] == 'http.response.start')
+    response_headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in start['headers']}
+    body = b''.join(message.get('body', b'') for message in sent if message['type'] == 'http.response.body')
+    return start['status'], response_headers, body
 
 
 class BaseTest(TestCase):
+    config: Type[Config] = TestConfig
 
     @classmethod
     def setUpClass(cls) -> None:
         super().setUpClass()
-        cls.app = create_app(TestConfig)
+        cls.app = create_app(cls.config)
         cls.client = cls.app.test_client()
 
         with cls.app.app_context():
@@ -24,6 +70,7 @@ class BaseTest(TestCase):
     def tearDownClass(cls) -> None:
         super().tearDownClass()
         with cls.app.app_context():
+            write_behind.shutdown()
             database.drop_all()
             os.remove(TestConfig.DB_PATH)
 
@@ -0,0 +1,91 @@
+"""Performance benchmarks. Not collected by the test runner, run them as modules, e.g.
+
+    python -m tests.benchmarks.login_load
+
+``tests.benchmarks.suite`` runs the main API paths against a stored baseline and fails on regressions.
+"""
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List, Sequence, Type
+
+from flask import Flask
+from werkzeug.serving import make_server
+
+from src.app import create_app
+from src.config import Config, TestConfig
+from src.endpoints.auth.model import User
+from src.extensions import database, write_behind
+
+BENCH_PASSWORD = '#1Bench1234'
+
+
+def bench_config(**overrides) -> Type[Config]:
+    """TestConfig variant using its own database file so benchmarks never touch the test database."""
+    db_path = os.path.join(TestConfig.PROJECT_ROOT, 'bench.dev.db')
+    attrs = dict(DB_PATH=db_path,
+                 SQLALCHEMY_DATABASE_URI=f'sqlite:///{db_path}?check_same_thread=False',
+                 TESTING=False,
+                 DEBUG=False,
+                 RATELIMIT_ENABLED=False)
+    attrs.update(overrides)
+    return type('BenchConfig', (TestConfig,), attrs)
+
+
+@contextmanager
+def bench_app(config: Type[Config]) -> Iterator[Flask]:
+    app = create_app(config)
+    with app.app_context():
+        database.create_all()
+    try:
+        yield app
+    finally:
+        with app.app_context():
+            write_behind.shutdown()
+            database.session.remove()
+            database.drop_all()
+        if os.path.exists(config.DB_PATH):
+            os.remove(config.DB_PATH)
+
+
+def seed_users(app: Flask, count: int, password: str = BENCH_PASSWORD) -> List[str]:
+    """Insert ``count`` users sharing one precomputed password hash."""
+    with app.app_context():
+        prototype = User(email='prototype@bench.test')
+        prototype.set_password(password)
+        emails = [f'user{i}@bench.test' for i in range(count)]
+        database.session.add_all(User(email=email, password_hash=prototype.password_hash, display_name=email)
+                                 for email in emails)
+        database.session.commit()
+    return emails
+
+
+@contextmanager
+def serve(app: Flask) -> Iterator[str]:
+    """Run ``app`` on a threaded local WSGI server, yield its base url."""
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_port}'
+    finally:
+        server.shutdown()
+        thread.join()
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summary(samples: Sequence[float]) -> str:
+    """Latency summary in milliseconds."""
+    return (f'n={len(samples)} '
+            f'p50={percentile(samples, 50) * 1000:.1f}ms '
+            f'p90={percentile(samples, 90) * 1000:.1f}ms '
+            f'p99={percentile(samples, 99) * 1000:.1f}ms')
@@ -0,0 +1,90 @@
+"""Concurrent login throughput served over WSGI (one thread per client) versus ASGI (``asgi.py`` adapter).
+
+Under ASGI the sync login and, like ``asgi.py`` serves it, the async one (``ASYNC_VIEWS``) are measured.
+Every mode calls the app in-process, so the numbers compare the serving models rather than an HTTP stack.
+The lookup cache is disabled to make every login reach the database.
+
+    python -m tests.benchmarks.asgi_login --duration 5 --clients 32
+"""
+import argparse
+import asyncio
+import threading
+import time
+from collections import Counter
+from typing import List, Tuple
+
+from src.asgi import ThreadedWsgiToAsgi
+from src.config import Config
+from tests.base import asgi_request
+from . import BENCH_PASSWORD, bench_app, bench_config, seed_users, summary
+
+LOGIN_URL = '/api/v1/auth/login'
+
+
+def run_wsgi(app, emails: List[str], duration: float, clients: int) -> Tuple[List[float], Counter]:
+    samples, statuses = [], Counter()
+    deadline = time.perf_counter() + duration
+
+    def client(index: int):
+        test_client = app.test_client()
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = test_client.post(LOGIN_URL, json=dict(email=emails[index % len(emails)],
+                                                             password=BENCH_PASSWORD))
+            samples.append(time.perf_counter() - started)
+            statuses[response.status_code] += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, statuses
+
+
+async def run_asgi(app, emails: List[str], duration: float, clients: int) -> Tuple[List[float], Counter]:
+    asgi_app = ThreadedWsgiToAsgi(app)
+    samples, statuses = [], Counter()
+    deadline = time.perf_counter() + duration
+
+    async def client(index: int):
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            status, _, _ = await asgi_request(asgi_app, 'POST', LOGIN_URL,
+                                              dict(email=emails[index % len(emails)], password=BENCH_PASSWORD))
+            samples.append(time.perf_counter() - started)
+            statuses[status] += 1
+
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    return samples, statuses
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--duration', type=float, default=5)
+    arg_parser.add_argument('--clients', type=int, default=32)
+    arg_parser.add_argument('--iterations', type=int, default=Config.PASSWORD_HASH_ITERATIONS)
+    arg_parser.add_argument('--workers', type=int, default=Config.HASHING_WORKERS)
+    args = arg_parser.parse_args()
+
+    for mode, async_views in (('wsgi', False), ('asgi', False), ('asgi, async views', True)):
+        config = bench_config(HASHING_EXECUTOR='thread',
+                              HASHING_WORKERS=args.workers,
+                              HASHING_QUEUE_SIZE=args.clients,
+                              HASHING_QUEUE_TIMEOUT=30,
+                              PASSWORD_HASH_ITERATIONS=args.iterations,
+                              LOOKUP_CACHE_ENABLED=False,
+                              ASYNC_VIEWS=async_views)
+        with bench_app(config) as app:
+            emails = seed_users(app, args.clients)
+            if mode == 'wsgi':
+                samples, statuses = run_wsgi(app, emails, args.duration, args.clients)
+            else:
+                samples, statuses = asyncio.run(run_asgi(app, emails, args.duration, args.clients))
+            print(f'{mode}: {len(samples) / args.duration:.1f} logins/s, statuses {dict(statuses)}')
+            print(f'    {summary(samples)}')
+            app.extensions['password_hasher'].shutdown()
+
+
+if __name__ == '__main__':
+    main()
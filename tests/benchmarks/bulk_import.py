@@ -0,0 +1,53 @@
+"""User import cost: per-row CRUDMixin.create versus bulk_create / bulk_upsert.
+
+    python -m tests.benchmarks.bulk_import --rows 10000
+"""
+import argparse
+import time
+
+from src.endpoints.auth.model import User
+from src.extensions import database
+from . import bench_app, bench_config
+
+
+def make_rows(rows: int, password_hash: str, prefix: str) -> list:
+    return [dict(email=f'{prefix}{i}@bench.test', password_hash=password_hash, display_name=f'{prefix} {i}')
+            for i in range(rows)]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--rows', type=int, default=10000)
+    arg_parser.add_argument('--chunk-size', type=int, default=None)
+    args = arg_parser.parse_args()
+
+    with bench_app(bench_config()) as app, app.app_context():
+        prototype = User(email='prototype@bench.test')
+        prototype.set_password('#1Bench1234')
+
+        def per_row(rows):
+            for row in rows:
+                User.create(**row)
+
+        scenarios = (
+            ('per-row create', per_row),
+            ('bulk_create', lambda rows: User.bulk_create(rows, args.chunk_size)),
+            ('bulk_upsert (insert)', lambda rows: User.bulk_upsert(rows, args.chunk_size)),
+        )
+        for index, (name, run) in enumerate(scenarios):
+            rows = make_rows(args.rows, prototype.password_hash, f'import{index}-')
+            started = time.perf_counter()
+            run(rows)
+            elapsed = time.perf_counter() - started
+            print(f'{name:<22} {args.rows} rows in {elapsed:.2f}s ({args.rows / elapsed:.0f} rows/s)')
+
+        rows = make_rows(args.rows, prototype.password_hash, 'import2-')
+        started = time.perf_counter()
+        User.bulk_upsert(rows, args.chunk_size)
+        elapsed = time.perf_counter() - started
+        print(f'{"bulk_upsert (update)":<22} {args.rows} rows in {elapsed:.2f}s ({args.rows / elapsed:.0f} rows/s)')
+        database.session.remove()
+
+
+if __name__ == '__main__':
+    main()
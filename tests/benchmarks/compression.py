@@ -0,0 +1,48 @@
+"""CPU cost of compressing the response envelope versus the bytes it saves, per encoding and body size.
+
+    python -m tests.benchmarks.compression --rows 1 10 100 1000 10000
+
+Each line gives the body size, the CPU time of one compression, the compressed size and the bytes saved per
+millisecond of CPU: an encoding is worth its cost on a body size when that rate beats what the bytes cost to
+send. ``br`` and ``zstd`` are only measured when ``brotli`` and ``zstandard`` are installed.
+"""
+import argparse
+import time
+from http import HTTPStatus
+
+from src.extensions.compression import ENCODERS
+from src.extensions.serialization import StdlibJSONProvider
+from .serialization import make_body
+
+LEVELS = dict(gzip=(1, 6, 9), deflate=(1, 6), br=(1, 4, 11), zstd=(1, 3, 9))
+
+
+def cpu_cost(encode, body: bytes, level: int, min_time: float) -> tuple:
+    """Mean CPU seconds per call and the compressed size."""
+    calls, size, started = 0, 0, time.process_time()
+    while time.process_time() - started < min_time:
+        size = len(encode(body, level))
+        calls += 1
+    return (time.process_time() - started) / calls, size
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--rows', type=int, nargs='+', default=[1, 10, 100, 1000, 10000])
+    arg_parser.add_argument('--min-time', type=float, default=0.5)
+    args = arg_parser.parse_args()
+
+    dumps = StdlibJSONProvider(sort_keys=True).dumps
+    for rows in args.rows:
+        body = dumps(dict(status_code=HTTPStatus.OK, body=make_body(rows), additional_information={}))
+        print(f'rows={rows} body={len(body)} bytes')
+        for encoding, encode in ENCODERS.items():
+            for level in LEVELS[encoding]:
+                seconds, size = cpu_cost(encode, body, level, args.min_time)
+                saved = len(body) - size
+                print(f'    {encoding + ":" + str(level):<10} {seconds * 1000:>9.3f} ms cpu {size:>10} bytes '
+                      f'{size / len(body):>6.1%} of body {saved / 1024 / (seconds * 1000):>9.1f} KiB saved/ms')
+
+
+if __name__ == '__main__':
+    main()
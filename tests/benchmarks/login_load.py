@@ -0,0 +1,98 @@
+"""Login p99 under mixed login / user listing load, with inline hashing versus the bounded hashing pool.
+
+    python -m tests.benchmarks.login_load --duration 10 --login-clients 16 --other-clients 8
+"""
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from http import HTTPStatus
+from typing import Dict, List
+
+from flask_jwt_extended import create_access_token
+
+from src.config import Config
+from src.endpoints.auth.model import User
+from . import BENCH_PASSWORD, bench_app, bench_config, seed_users, serve, summary
+
+
+def request(url: str, payload: dict = None, token: str = None) -> int:
+    data = json.dumps(payload).encode() if payload is not None else None
+    headers = {'Content-Type': 'application/json'}
+    if token is not None:
+        headers['Authorization'] = f'Bearer {token}'
+    req = urllib.request.Request(url, data=data, headers=headers)
+    try:
+        with urllib.request.urlopen(req) as resp:
+            resp.read()
+            return resp.status
+    except urllib.error.HTTPError as e:
+        e.read()
+        return e.code
+
+
+def run_load(base_url: str, emails: List[str], token: str, duration: float,
+             login_clients: int, other_clients: int) -> Dict[str, List[float]]:
+    """Latencies of successful requests per kind, fails when any request got another status."""
+    samples = defaultdict(list)
+    statuses = defaultdict(int)
+    deadline = time.perf_counter() + duration
+
+    def client(kind: str, index: int):
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            if kind == 'login':
+                email = emails[index % len(emails)]
+                status = request(f'{base_url}/api/v1/auth/login', dict(email=email, password=BENCH_PASSWORD))
+            else:
+                status = request(f'{base_url}/api/v1/auth/users', token=token)
+            elapsed = time.perf_counter() - started
+            statuses[f'{kind}:{status}'] += 1
+            if status == HTTPStatus.OK:
+                samples[kind].append(elapsed)
+
+    threads = [threading.Thread(target=client, args=('login', i)) for i in range(login_clients)]
+    threads += [threading.Thread(target=client, args=('other', i)) for i in range(other_clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    print(f'    statuses: {dict(statuses)}')
+    failed = {key: count for key, count in statuses.items() if not key.endswith(f':{HTTPStatus.OK:d}')}
+    if failed:
+        raise RuntimeError(f'Requests failed, the latencies would not measure the endpoints: {failed}')
+    return samples
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--duration', type=float, default=10)
+    arg_parser.add_argument('--login-clients', type=int, default=16)
+    arg_parser.add_argument('--other-clients', type=int, default=8)
+    arg_parser.add_argument('--iterations', type=int, default=Config.PASSWORD_HASH_ITERATIONS)
+    arg_parser.add_argument('--workers', type=int, default=Config.HASHING_WORKERS)
+    args = arg_parser.parse_args()
+
+    for executor in ('inline', 'thread', 'process'):
+        config = bench_config(HASHING_EXECUTOR=executor,
+                              HASHING_WORKERS=args.workers,
+                              PASSWORD_HASH_ITERATIONS=args.iterations)
+        with bench_app(config) as app:
+            emails = seed_users(app, args.login_clients)
+            with app.app_context():
+                User.create(email='admin@bench.test', password_hash='x', is_admin=True)
+                token = create_access_token('admin@bench.test')
+            with serve(app) as base_url:
+                print(f'hashing executor: {executor}')
+                samples = run_load(base_url, emails, token, args.duration, args.login_clients, args.other_clients)
+            app.extensions['password_hasher'].shutdown()
+        print(f'    login: {summary(samples["login"])}')
+        print(f'    other: {summary(samples["other"])}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Per-login latency of the sync ``auth.login`` view versus its async variant (``ASYNC_VIEWS``), both over WSGI.
+
+Under WSGI Flask runs an async view on an event loop (and thread) of its own per request, and the asyncio
+engine opens a new connection for each of them; the sync view reuses the pooled engine. This is why only the
+ASGI entrypoint serves the async variant. The hashing cost defaults to a low value so that the per-request
+overhead is what gets measured.
+
+    python -m tests.benchmarks.login_view --requests 500
+"""
+import argparse
+import time
+from http import HTTPStatus
+from typing import List
+
+from flask import Flask
+
+from . import BENCH_PASSWORD, bench_app, bench_config, seed_users, summary
+
+LOGIN_URL = '/api/v1/auth/login'
+
+
+def run(app: Flask, url: str, emails: List[str], requests: int) -> List[float]:
+    client, samples = app.test_client(), []
+    for index in range(requests):
+        started = time.perf_counter()
+        response = client.post(url, json=dict(email=emails[index % len(emails)], password=BENCH_PASSWORD))
+        samples.append(time.perf_counter() - started)
+        assert response.status_code == HTTPStatus.OK, response.get_data(as_text=True)
+    return samples
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--requests', type=int, default=500)
+    arg_parser.add_argument('--users', type=int, default=50)
+    arg_parser.add_argument('--iterations', type=int, default=1000)
+    args = arg_parser.parse_args()
+
+    for name, async_views in (('sync view', False), ('async view', True)):
+        config = bench_config(HASHING_EXECUTOR='thread', PASSWORD_HASH_ITERATIONS=args.iterations,
+                              LOOKUP_CACHE_ENABLED=False, ASYNC_VIEWS=async_views)
+        with bench_app(config) as app:
+            emails = seed_users(app, args.users)
+            run(app, LOGIN_URL, emails, min(20, args.requests))
+            samples = run(app, LOGIN_URL, emails, args.requests)
+            print(f'{name}: {len(samples) / sum(samples):.1f} logins/s')
+            print(f'    {summary(samples)}')
+            app.extensions['password_hasher'].shutdown()
+
+
+if __name__ == '__main__':
+    main()
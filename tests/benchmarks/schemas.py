@@ -0,0 +1,50 @@
+"""Dump and load throughput of the auth schemas: a new schema per call versus shared instances and the fast path.
+
+    python -m tests.benchmarks.schemas --rows 1 100 10000
+"""
+import argparse
+import time
+from typing import Callable
+
+from src.endpoints.auth.model import User
+from src.endpoints.auth.schema import LoginSpec, UserSchema
+from src.extensions import schema_registry
+from . import BENCH_PASSWORD, bench_app, bench_config
+
+
+def throughput(call: Callable[[], object], min_time: float) -> float:
+    calls, started = 0, time.perf_counter()
+    while time.perf_counter() - started < min_time:
+        call()
+        calls += 1
+    return calls / (time.perf_counter() - started)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--rows', type=int, nargs='+', default=[1, 100, 10000])
+    arg_parser.add_argument('--min-time', type=float, default=1.0)
+    args = arg_parser.parse_args()
+
+    with bench_app(bench_config()) as app, app.app_context():
+        shared = schema_registry.get(UserSchema)
+        for rows in args.rows:
+            users = [User(email=f'user{i}@bench.test', display_name=f'User number {i}') for i in range(rows)]
+            candidates = dict(new_schema=lambda: UserSchema().dump(users, many=True),
+                              shared_schema=lambda: shared.dump(users, many=True),
+                              registry_fast_path=lambda: schema_registry.dump(UserSchema, users, many=True))
+            print(f'dump {rows} rows')
+            for name, call in candidates.items():
+                per_second = throughput(call, args.min_time)
+                print(f'    {name:<20} {per_second:12.1f} calls/s {per_second * rows:14.0f} rows/s')
+
+        payload = dict(email='user0@bench.test', password=BENCH_PASSWORD)
+        login_spec = LoginSpec()
+        print('load LoginSpec')
+        for name, call in dict(new_schema=lambda: LoginSpec().load(payload),
+                               shared_schema=lambda: login_spec.load(payload)).items():
+            print(f'    {name:<20} {throughput(call, args.min_time):12.1f} calls/s')
+
+
+if __name__ == '__main__':
+    main()
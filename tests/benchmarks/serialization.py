@@ -0,0 +1,61 @@
+"""Serialize throughput of the response envelope for large list bodies, per JSON provider.
+
+    python -m tests.benchmarks.serialization --rows 100 1000 10000
+"""
+import argparse
+import datetime
+import decimal
+import time
+import uuid
+from http import HTTPStatus
+
+from flask import make_response
+
+from src.app import create_app
+from src.extensions.serialization import OrjsonProvider, StdlibJSONProvider, orjson
+from . import bench_config
+
+
+def make_body(rows: int) -> list:
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return [dict(id=uuid.uuid4(),
+                 email=f'user{i}@bench.test',
+                 display_name=f'User number {i}',
+                 balance=decimal.Decimal(i) / 100,
+                 active=bool(i % 2),
+                 created=now - datetime.timedelta(minutes=i)) for i in range(rows)]
+
+
+def throughput(dumps, envelope: dict, min_time: float) -> tuple:
+    calls, size, started = 0, 0, time.perf_counter()
+    while time.perf_counter() - started < min_time:
+        size = len(dumps(envelope))
+        calls += 1
+    elapsed = time.perf_counter() - started
+    return calls / elapsed, size * calls / elapsed / 2 ** 20
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--rows', type=int, nargs='+', default=[100, 1000, 10000])
+    arg_parser.add_argument('--min-time', type=float, default=1.0)
+    args = arg_parser.parse_args()
+
+    app = create_app(bench_config())
+    candidates = dict(flask_make_response=lambda envelope: make_response(envelope, HTTPStatus.OK).get_data(),
+                      stdlib=StdlibJSONProvider(sort_keys=True).dumps)
+    if orjson is not None:
+        candidates['orjson'] = OrjsonProvider(sort_keys=True).dumps
+        candidates['orjson_unsorted'] = OrjsonProvider(sort_keys=False).dumps
+
+    with app.test_request_context():
+        for rows in args.rows:
+            envelope = dict(status_code=HTTPStatus.OK, body=make_body(rows), additional_information={})
+            print(f'rows={rows}')
+            for name, dumps in candidates.items():
+                calls_per_sec, mb_per_sec = throughput(dumps, envelope, args.min_time)
+                print(f'    {name:<20} {calls_per_sec:>10.1f} calls/s {mb_per_sec:>8.1f} MiB/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Cold start time of a fresh interpreter importing the app and calling ``create_app``, plus an import-time report.
+
+    python -m tests.benchmarks.startup --runs 10 --top 15
+"""
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from . import percentile
+
+STARTUP_SCRIPT = '''
+import time
+started = time.perf_counter()
+from src.app import create_app
+from src.config import TestConfig
+imported = time.perf_counter()
+create_app(TestConfig)
+print(imported - started, time.perf_counter() - imported)
+'''
+
+
+def run_python(*args: str) -> subprocess.CompletedProcess:
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return subprocess.run([sys.executable, *args], cwd=root, capture_output=True, text=True, check=True)
+
+
+def cold_starts(runs: int) -> Tuple[List[float], List[float]]:
+    imports, creates = [], []
+    for _ in range(runs):
+        imported, created = run_python('-c', STARTUP_SCRIPT).stdout.split()
+        imports.append(float(imported) * 1000)
+        creates.append(float(created) * 1000)
+    return imports, creates
+
+
+def import_report(top: int) -> List[Tuple[str, float, int]]:
+    """``(top-level package, self ms summed over its modules, module count)`` from ``-X importtime``."""
+    stderr = run_python('-X', 'importtime', '-c', STARTUP_SCRIPT).stderr
+    packages: Dict[str, List[float]] = defaultdict(list)
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        packages[name.strip().split('.')[0]].append(int(self_us) / 1000)
+    ranked = sorted(packages.items(), key=lambda item: sum(item[1]), reverse=True)
+    return [(name, sum(self_ms), len(self_ms)) for name, self_ms in ranked[:top]]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--runs', type=int, default=10)
+    arg_parser.add_argument('--top', type=int, default=15)
+    args = arg_parser.parse_args()
+
+    imports, creates = cold_starts(args.runs)
+    totals = [imported + created for imported, created in zip(imports, creates)]
+    print(f'cold start over {args.runs} runs (ms)')
+    for label, samples in (('import', imports), ('create_app', creates), ('total', totals)):
+        print(f'  {label:<10} p50={percentile(samples, 50):8.1f}  max={max(samples):8.1f}')
+
+    print(f'\nslowest imports by top-level package (ms)\n  {"package":<30} {"self":>8} {"modules":>8}')
+    for name, self_ms, modules in import_report(args.top):
+        print(f'  {name:<30} {self_ms:8.1f} {modules:8}')
+
+
+if __name__ == '__main__':
+    main()
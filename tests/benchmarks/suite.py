@@ -0,0 +1,217 @@
+"""Benchmark suite, throughput and latency percentiles of the main API paths compared against a baseline.
+
+Scenarios run in-process with the Flask test client, or over HTTP against a local threaded WSGI server with
+``--server``. Password hashing uses ``--iterations`` (the test config cost by default) so the numbers track
+the app rather than PBKDF2. A scenario that answers with an unexpected status fails the run, and so does one
+whose throughput dropped, or whose p99 grew, by more than ``--threshold`` against the stored baseline.
+Baselines are machine specific: record one on the machine that compares against it.
+
+    python -m tests.benchmarks.suite --save-baseline
+    python -m tests.benchmarks.suite --threshold 0.2
+    python -m tests.benchmarks.suite --server --clients 8 --scenarios login_success login_failure
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import nullcontext
+from http import HTTPStatus
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from flask import Flask
+
+from src.common import response_template
+from src.config import TestConfig
+from src.endpoints.auth.model import User
+from src.endpoints.auth.schema import UserSchema
+from src.extensions import schema_registry
+from . import BENCH_PASSWORD, bench_app, bench_config, percentile, seed_users, serve
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+LOGIN_URL = '/api/v1/auth/login'
+
+Request = Callable[[int], int]
+
+
+class Scenario(NamedTuple):
+    name: str
+    expected_status: int
+    # builds the per-client request function once the app is seeded
+    make_request: Callable[[Flask, List[str], Optional[str]], Request]
+
+
+def _post(app: Flask, base_url: Optional[str], path: str, payload: Callable[[int], dict]) -> Request:
+    """Request function POSTing ``payload(client_index)`` to ``path`` and returning the status code."""
+    if base_url is None:
+        local = threading.local()
+
+        def in_process(index: int) -> int:
+            if not hasattr(local, 'client'):
+                local.client = app.test_client()
+            return local.client.post(path, json=payload(index)).status_code
+
+        return in_process
+
+    def over_http(index: int) -> int:
+        request = urllib.request.Request(f'{base_url}{path}', data=json.dumps(payload(index)).encode(),
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code
+
+    return over_http
+
+
+def login_success(app: Flask, emails: List[str], base_url: Optional[str]) -> Request:
+    return _post(app, base_url, LOGIN_URL, lambda index: dict(email=emails[index % len(emails)],
+                                                              password=BENCH_PASSWORD))
+
+
+def login_failure(app: Flask, emails: List[str], base_url: Optional[str]) -> Request:
+    return _post(app, base_url, LOGIN_URL, lambda index: dict(email=emails[index % len(emails)],
+                                                              password=BENCH_PASSWORD + 'wrong'))
+
+
+def validation_error(app: Flask, emails: List[str], base_url: Optional[str]) -> Request:
+    return _post(app, base_url, LOGIN_URL, lambda index: dict(email='not-an-email'))
+
+
+def serialization(app: Flask, emails: List[str], base_url: Optional[str]) -> Request:
+    """``response_template`` of a page of users, always in-process (no endpoint renders only that)."""
+    with app.app_context():
+        users = User.query.limit(100).all()
+        body = schema_registry.dump(UserSchema, users, many=True)
+
+    def render(index: int) -> int:
+        with app.test_request_context():
+            response = response_template(body, HTTPStatus.OK, next_cursor=None)
+            response.get_data()
+            return response.status_code
+
+    return render
+
+
+SCENARIOS = [
+    Scenario('login_success', HTTPStatus.OK, login_success),
+    Scenario('login_failure', HTTPStatus.UNAUTHORIZED, login_failure),
+    Scenario('validation_error', HTTPStatus.BAD_REQUEST, validation_error),
+    Scenario('serialization', HTTPStatus.OK, serialization),
+]
+
+
+def measure(request: Request, clients: int, duration: float, warmup: float) -> Dict[str, Any]:
+    samples: List[float] = []
+    statuses: Dict[int, int] = {}
+    lock = threading.Lock()
+    started = time.perf_counter()
+    measure_from, deadline = started + warmup, started + warmup + duration
+
+    def client(index: int):
+        local_samples, local_statuses = [], {}
+        while True:
+            began = time.perf_counter()
+            if began >= deadline:
+                break
+            status = request(index)
+            if began >= measure_from:
+                local_samples.append(time.perf_counter() - began)
+                local_statuses[status] = local_statuses.get(status, 0) + 1
+        with lock:
+            samples.extend(local_samples)
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return dict(requests=len(samples),
+                throughput=round(len(samples) / duration, 1),
+                p50_ms=round(percentile(samples, 50) * 1000, 3),
+                p90_ms=round(percentile(samples, 90) * 1000, 3),
+                p99_ms=round(percentile(samples, 99) * 1000, 3),
+                statuses=statuses)
+
+
+def regressions(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+                threshold: float) -> List[str]:
+    """Human readable regressions of ``results`` against ``baseline``, empty when there are none."""
+    found = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['throughput'] < base['throughput'] * (1 - threshold):
+            found.append(f'{name}: throughput {result["throughput"]}/s, baseline {base["throughput"]}/s')
+        if result['p99_ms'] > base['p99_ms'] * (1 + threshold):
+            found.append(f'{name}: p99 {result["p99_ms"]}ms, baseline {base["p99_ms"]}ms')
+    return found
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--scenarios', nargs='+', choices=[scenario.name for scenario in SCENARIOS],
+                            default=[scenario.name for scenario in SCENARIOS])
+    arg_parser.add_argument('--users', type=int, default=1000)
+    arg_parser.add_argument('--clients', type=int, default=4)
+    arg_parser.add_argument('--duration', type=float, default=3)
+    arg_parser.add_argument('--warmup', type=float, default=0.5)
+    arg_parser.add_argument('--iterations', type=int, default=TestConfig.PASSWORD_HASH_ITERATIONS)
+    arg_parser.add_argument('--server', action='store_true', help='run over HTTP against a local WSGI server')
+    arg_parser.add_argument('--baseline', default=BASELINE_PATH)
+    arg_parser.add_argument('--save-baseline', action='store_true')
+    arg_parser.add_argument('--threshold', type=float, default=0.25,
+                            help='allowed relative throughput drop / p99 increase')
+    args = arg_parser.parse_args()
+
+    config = bench_config(PASSWORD_HASH_ITERATIONS=args.iterations, HASHING_QUEUE_SIZE=max(32, args.clients))
+    results, failures = {}, []
+    with bench_app(config) as app:
+        emails = seed_users(app, args.users)
+        with serve(app) if args.server else nullcontext() as base_url:
+            for scenario in SCENARIOS:
+                if scenario.name not in args.scenarios:
+                    continue
+                result = measure(scenario.make_request(app, emails, base_url),
+                                 args.clients, args.duration, args.warmup)
+                results[scenario.name] = result
+                print(f'{scenario.name:<18} {result["throughput"]:>10.1f}/s  p50={result["p50_ms"]:.2f}ms '
+                      f'p90={result["p90_ms"]:.2f}ms p99={result["p99_ms"]:.2f}ms  statuses {result["statuses"]}')
+                unexpected = set(result['statuses']) - {scenario.expected_status}
+                if unexpected:
+                    failures.append(f'{scenario.name}: unexpected statuses {sorted(unexpected)}, '
+                                    f'expected {scenario.expected_status}')
+        app.extensions['password_hasher'].shutdown()
+
+    # in-process and over-HTTP numbers are kept apart in the baseline file
+    mode = 'server' if args.server else 'in_process'
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baselines = json.load(baseline_file)
+    if args.save_baseline and not failures:
+        baselines[mode] = dict(baselines.get(mode, {}), **results)
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump(baselines, baseline_file, indent=2, sort_keys=True)
+        print(f'{mode} baseline saved to {args.baseline}')
+    elif mode in baselines:
+        failures += regressions(results, baselines[mode], args.threshold)
+    else:
+        print(f'no {mode} baseline in {args.baseline}, record one with --save-baseline')
+
+    for failure in failures:
+        print(f'FAIL {failure}')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+import asyncio
+import json
+from http import HTTPStatus
+from io import BytesIO
+from unittest import TestCase
+
+import asgiref
+from asgiref.wsgi import WsgiToAsgiInstance
+
+from src.asgi import ThreadedWsgiToAsgi
+from src.config import TestConfig
+from src.endpoints.auth.model import User
+from src.endpoints.auth.resource import login, login_async
+from src.extensions.async_engine import async_database_uri
+from tests.base import BaseTest, asgi_request
+
+
+class AsyncViewsConfig(TestConfig):
+    ASYNC_VIEWS = True
+    RATELIMIT_ENABLED = False
+
+
+class TestAsgi(BaseTest):
+    config = AsyncViewsConfig
+    password = '#1Test1234'
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.asgi_app = ThreadedWsgiToAsgi(cls.app)
+        with cls.app.app_context():
+            for i in range(4):
+                user = User.create(save=False, email=f'async{i}@test.test')
+                user.set_password(cls.password)
+                user.save()
+
+    def login(self, email: str, password: str = password):
+        return asgi_request(self.asgi_app, 'POST', '/api/v1/auth/login', dict(email=email, password=password))
+
+    def test_async_login_is_served(self):
+        self.assertIs(self.app.view_functions['auth.login'], login_async)
+
+    def test_concurrent_logins(self):
+        async def logins():
+            return await asyncio.gather(*(self.login(f'async{i}@test.test', self.password if i % 2 else 'wrong')
+                                          for i in range(4)))
+
+        results = asyncio.run(logins())
+        self.assertEqual([status for status, _, _ in results],
+                         [HTTPStatus.UNAUTHORIZED, HTTPStatus.OK, HTTPStatus.UNAUTHORIZED, HTTPStatus.OK])
+        status, headers, body = results[1]
+        self.assertIn('access_token', json.loads(body)['additional_information'])
+        self.assertIn('hash;', headers['server-timing'])
+
+    def test_login_through_async_engine(self):
+        async def logins():
+            return await asyncio.gather(*(self.login(f'async{i}@test.test') for i in range(4)))
+
+        self.app.config['LOOKUP_CACHE_ENABLED'] = False
+        try:
+            results = asyncio.run(logins())
+        finally:
+            self.app.config['LOOKUP_CACHE_ENABLED'] = True
+        for i, (status, headers, body) in enumerate(results):
+            self.assertEqual(status, HTTPStatus.OK)
+            self.assertEqual(json.loads(body)['body']['email'], f'async{i}@test.test')
+            self.assertIn('db;', headers['server-timing'])
+
+    def test_sync_views_keep_working(self):
+        status, _, body = asyncio.run(asgi_request(self.asgi_app, 'GET', '/api/v1/auth/users'))
+        self.assertEqual(status, HTTPStatus.UNAUTHORIZED)
+
+    def test_async_login_under_wsgi(self):
+        response = self.client.post('/api/v1/auth/login', json=dict(email='async1@test.test', password=self.password))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+
+class TestSyncViews(BaseTest):
+
+    def test_sync_login_is_served_by_default(self):
+        self.assertIs(self.app.view_functions['auth.login'], login)
+
+
+class TestAsyncDatabaseUri(TestCase):
+
+    def test_async_drivers(self):
+        self.assertEqual(async_database_uri('sqlite:////tmp/test.db'), 'sqlite+aiosqlite:////tmp/test.db')
+        self.assertEqual(async_database_uri('postgresql+psycopg2://user:secret@db:5432/app?charset=utf8mb4'),
+                         'postgresql+asyncpg://user:secret@db:5432/app')
+        with self.assertRaises(ValueError):
+            async_database_uri('mysql://user@db/app')
+
+
+class TestAsgirefInternals(TestCase):
+    """``_ThreadedWsgiToAsgiInstance`` copies asgiref's WSGI loop, these are the internals it depends on."""
+
+    def test_pinned_version(self):
+        self.assertEqual(asgiref.__version__, '3.5.0', 're-check src/asgi.py against the new WsgiToAsgiInstance')
+
+    def test_instance_internals(self):
+        instance = WsgiToAsgiInstance(None)
+        self.assertFalse(instance.response_started)
+        instance.scope = dict(type='http', method='GET', path='/', query_string=b'', http_version='1.1',
+                              headers=[(b'content-type', b'text/plain')])
+        environ = instance.build_environ(instance.scope, BytesIO())
+        self.assertEqual(environ['PATH_INFO'], '/')
+        self.assertEqual(environ['CONTENT_TYPE'], 'text/plain')
+        instance.start_response('200 OK', [('Content-Length', '2')])
+        self.assertEqual(instance.response_start, dict(type='http.response.start', status=200,
+                                                       headers=[(b'content-length', b'2')]))
+        self.assertEqual(instance.response_content_length, 2)
@@ -0,0 +1,108 @@
+import gzip
+import zlib
+from http import HTTPStatus
+from unittest.mock import patch
+
+from flask import Response
+from werkzeug.datastructures import Accept
+from werkzeug.http import parse_accept_header
+
+from src.common import response_template, stream_response_template
+from src.endpoints.auth.model import User
+from src.extensions.compression import ENCODERS, negotiate
+from tests.base import BaseTest, admin_headers
+
+LARGE_BODY = [dict(index=i, text='compressible ' * 10) for i in range(50)]
+
+
+class TestCompression(BaseTest):
+    url = '/api/v1/auth/users'
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.app.add_url_rule('/compression/large', 'large', lambda: response_template(LARGE_BODY, HTTPStatus.OK))
+        cls.app.add_url_rule('/compression/small', 'small', lambda: response_template('small', HTTPStatus.OK))
+        cls.app.add_url_rule('/compression/stream', 'stream',
+                             lambda: stream_response_template(LARGE_BODY, HTTPStatus.OK))
+        cls.app.add_url_rule('/compression/encoded', 'encoded',
+                             lambda: Response(gzip.compress(b'{}' * 1000), mimetype='application/json',
+                                              headers={'Content-Encoding': 'gzip'}))
+        with cls.app.app_context():
+            for i in range(30):
+                User.create(email=f'compressed{i}@test.test', password_hash='x', display_name=f'User {i}')
+            cls.headers = admin_headers()
+
+    def get(self, url: str, accept_encoding: str = None, headers: dict = None, etag: str = None):
+        headers = dict(headers or {})
+        if accept_encoding is not None:
+            headers['Accept-Encoding'] = accept_encoding
+        if etag is not None:
+            headers['If-None-Match'] = etag
+        return self.client.get(url, headers=headers)
+
+    def test_negotiate(self):
+        def choose(header: str):
+            return negotiate(parse_accept_header(header, Accept), ('br', 'gzip', 'deflate'))
+
+        self.assertEqual(choose('gzip, deflate, br'), 'br')
+        self.assertEqual(choose('deflate, gzip'), 'gzip')
+        self.assertEqual(choose('gzip;q=0.5, deflate'), 'deflate')
+        self.assertEqual(choose('*'), 'br')
+        self.assertIsNone(choose('gzip;q=0, identity'))
+        self.assertIsNone(choose(''))
+
+    def test_gzip_and_deflate(self):
+        plain = self.get('/compression/large')
+        self.assertNotIn('Content-Encoding', plain.headers)
+        self.assertIn('Accept-Encoding', plain.headers['Vary'])
+
+        for encoding, decompress in (('gzip', gzip.decompress), ('deflate', zlib.decompress)):
+            response = self.get('/compression/large', encoding)
+            self.assertEqual(response.headers['Content-Encoding'], encoding)
+            self.assertEqual(decompress(response.get_data()), plain.get_data())
+            self.assertEqual(int(response.headers['Content-Length']), len(response.get_data()))
+            self.assertLess(len(response.get_data()), len(plain.get_data()) / 4)
+            self.assertIn('compress', response.headers['Server-Timing'])
+
+    def test_preferred_encoding(self):
+        response = self.get('/compression/large', '*')
+        self.assertEqual(response.headers['Content-Encoding'],
+                         next(name for name in self.app.config['COMPRESSION_ALGORITHMS'] if name in ENCODERS))
+
+    def test_skipped_responses(self):
+        for url in ('/compression/small', '/compression/stream', '/compression/encoded'):
+            response = self.get(url, 'deflate')
+            self.assertNotEqual(response.headers.get('Content-Encoding'), 'deflate', url)
+        self.assertNotIn('Accept-Encoding', self.get('/compression/small', 'gzip').headers.get('Vary', ''))
+
+    def test_cached_response_etag_and_bytes(self):
+        encode_calls = []
+
+        def counting_gzip(body: bytes, level: int) -> bytes:
+            encode_calls.append(len(body))
+            return gzip.compress(body, level, mtime=0)
+
+        with patch.dict(ENCODERS, gzip=counting_gzip):
+            plain = self.get(self.url, headers=self.headers)
+            first = self.get(self.url, 'gzip', headers=self.headers)
+            second = self.get(self.url, 'gzip', headers=self.headers)
+
+        etag = plain.headers['ETag']
+        self.assertEqual(first.headers['ETag'], etag[:-1] + '-gzip"')
+        self.assertEqual(second.get_data(), first.get_data())
+        self.assertEqual(gzip.decompress(second.get_data()), plain.get_data())
+        self.assertEqual(len(encode_calls), 1)
+
+        not_modified = self.get(self.url, 'gzip', etag=first.headers['ETag'], headers=self.headers)
+        self.assertEqual(not_modified.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertEqual(not_modified.headers['ETag'], first.headers['ETag'])
+        self.assertEqual(self.get(self.url, etag=etag, headers=self.headers).status_code,
+                         HTTPStatus.NOT_MODIFIED)
+
+    def test_disabled(self):
+        self.app.config['COMPRESSION_ENABLED'] = False
+        try:
+            self.assertNotIn('Content-Encoding', self.get('/compression/large', 'gzip').headers)
+        finally:
+            self.app.config['COMPRESSION_ENABLED'] = True
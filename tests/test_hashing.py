@@ -0,0 +1,75 @@
+import asyncio
+import threading
+from http import HTTPStatus
+
+from src.endpoints.auth.model import User
+from src.extensions.hashing import HashingPool, HashingPoolExhausted
+from tests.base import BaseTest
+
+
+class TestHashingPool(BaseTest):
+
+    def occupy(self, pool: HashingPool) -> threading.Event:
+        started, release = threading.Event(), threading.Event()
+
+        def blocking_job():
+            started.set()
+            release.wait(5)
+
+        threading.Thread(target=pool.run, args=(blocking_job,), daemon=True).start()
+        self.assertTrue(started.wait(5))
+        return release
+
+    def test_configured_cost_is_used(self):
+        with self.app.app_context():
+            user = User(email='cost@test.test')
+            user.set_password('#1Test1234')
+            self.assertTrue(user.password_hash.startswith('pbkdf2:sha256:1000$'))
+            self.assertTrue(user.check_password('#1Test1234'))
+            self.assertFalse(user.check_password('#1Test12345'))
+
+    def test_queue_bound_rejects(self):
+        pool = HashingPool('thread', workers=1, queue_size=0, queue_timeout=0, retry_after=3)
+        release = self.occupy(pool)
+        try:
+            with self.assertRaises(HashingPoolExhausted) as ctx:
+                pool.run(sum, (1, 2))
+            self.assertEqual(ctx.exception.retry_after, 3)
+        finally:
+            release.set()
+            pool.shutdown()
+        self.assertEqual(pool.run(sum, (1, 2)), 3)
+
+    def test_async_queue_bound_rejects(self):
+        pool = HashingPool('thread', workers=1, queue_size=0, queue_timeout=0.02, retry_after=3)
+        release = self.occupy(pool)
+        try:
+            with self.assertRaises(HashingPoolExhausted):
+                asyncio.run(pool.run_async(sum, (1, 2)))
+        finally:
+            release.set()
+        try:
+            self.assertEqual(asyncio.run(pool.run_async(sum, (1, 2))), 3)
+        finally:
+            pool.shutdown()
+
+    def test_login_back_pressure(self):
+        with self.app.app_context():
+            user = User.create(save=False, email='busy@test.test')
+            user.set_password('#1Test1234')
+            user.save()
+
+        original = self.app.extensions['password_hasher']
+        pool = self.app.extensions['password_hasher'] = HashingPool('thread', workers=1, queue_size=0,
+                                                                    queue_timeout=0, retry_after=3)
+        release = self.occupy(pool)
+        try:
+            response = self.client.post('/api/v1/auth/login', json=dict(email='busy@test.test', password='#1Test1234'))
+        finally:
+            release.set()
+            pool.shutdown()
+            self.app.extensions['password_hasher'] = original
+
+        self.assertEqual(response.status_code, HTTPStatus.SERVICE_UNAVAILABLE)
+        self.assertEqual(response.headers.get('Retry-After'), '3')
+        self.assertEqual(response.get_json(force=True).get('status_code'), HTTPStatus.SERVICE_UNAVAILABLE)
@@ -0,0 +1,75 @@
+from http import HTTPStatus
+
+from src.endpoints.auth.model import User
+from tests.base import BaseTest, admin_headers
+
+
+class TestResponseCache(BaseTest):
+    url = '/api/v1/auth/users'
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        with cls.app.app_context():
+            User.create(email='cached@test.test', password_hash='x')
+            cls.headers = admin_headers()
+            cls.other_headers = admin_headers('other@test.test')
+
+    def get(self, headers: dict = None, etag: str = None, query: str = ''):
+        headers = dict(headers or self.headers)
+        if etag is not None:
+            headers['If-None-Match'] = etag
+        return self.client.get(self.url + query, headers=headers)
+
+    def test_etag_and_not_modified(self):
+        first = self.get(query='?limit=5')
+        self.assertEqual(first.status_code, HTTPStatus.OK)
+        etag = first.headers['ETag']
+        self.assertIn('Authorization', first.headers['Vary'])
+
+        cached = self.get(query='?limit=5')
+        self.assertEqual(cached.get_data(), first.get_data())
+        self.assertEqual(cached.headers['ETag'], etag)
+        self.assertNotIn('db', cached.headers['Server-Timing'])
+
+        not_modified = self.get(etag=etag, query='?limit=5')
+        self.assertEqual(not_modified.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertEqual(not_modified.get_data(), b'')
+        self.assertNotIn('db', not_modified.headers['Server-Timing'])
+
+        other_query = self.get(etag=etag, query='?limit=5&fields=email')
+        self.assertEqual(other_query.status_code, HTTPStatus.OK)
+        self.assertNotEqual(other_query.headers['ETag'], etag)
+
+    def test_identity_is_part_of_key(self):
+        self.get(query='?limit=6')
+        response = self.get(self.other_headers, query='?limit=6')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn('db', response.headers['Server-Timing'])
+
+    def test_invalidated_by_save_and_delete(self):
+        etag = self.get(query='?limit=7').headers['ETag']
+        with self.app.app_context():
+            User.create(email='new@test.test', password_hash='x')
+        response = self.get(etag=etag, query='?limit=7')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn('new@test.test', response.get_data(as_text=True))
+
+        etag = response.headers['ETag']
+        with self.app.app_context():
+            User.get('new@test.test').delete()
+        response = self.get(etag=etag, query='?limit=7')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotIn('new@test.test', response.get_data(as_text=True))
+
+    def test_errors_not_cached(self):
+        self.assertEqual(self.get(query='?limit=0').status_code, HTTPStatus.BAD_REQUEST)
+        response = self.get(query='?limit=0')
+        self.assertNotIn('ETag', response.headers)
+
+    def test_disabled(self):
+        self.app.config['RESPONSE_CACHE_ENABLED'] = False
+        try:
+            self.assertNotIn('ETag', self.get().headers)
+        finally:
+            self.app.config['RESPONSE_CACHE_ENABLED'] = True
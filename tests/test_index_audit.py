@@ -0,0 +1,112 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from src.app import create_app
+from src.config import TestConfig
+from src.endpoints.auth.model import User
+from src.extensions import database
+from src.extensions.index_audit import IndexInfo, audit, parse_echo_log, parse_query_log, redundant_indexes, \
+    write_migration
+
+QUERY_LOG_PATH = os.path.join(TestConfig.PROJECT_ROOT, 'test.queries.jsonl')
+
+ECHO_OUTPUT = '''2026-01-01 10:00:00,000 INFO sqlalchemy.engine.Engine BEGIN (implicit)
+2026-01-01 10:00:00,001 INFO sqlalchemy.engine.Engine SELECT user.email AS user_email
+FROM user
+WHERE user.display_name = ?
+2026-01-01 10:00:00,001 INFO sqlalchemy.engine.Engine [generated in 0.00010s] ('someone',)
+2026-01-01 10:00:00,002 INFO sqlalchemy.engine.Engine SELECT user.email AS user_email
+FROM user
+WHERE user.display_name = ?
+2026-01-01 10:00:00,002 INFO sqlalchemy.engine.Engine [cached since 0.001s ago] ('other',)
+2026-01-01 10:00:00,003 INFO sqlalchemy.engine.Engine COMMIT
+'''
+
+
+class QueryLogConfig(TestConfig):
+    QUERY_LOG_PATH = QUERY_LOG_PATH
+
+
+class TestIndexAudit(TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.app = create_app(QueryLogConfig)
+        with cls.app.app_context():
+            database.create_all()
+            # the index User.email declared next to its primary key before
+            database.session.execute('CREATE INDEX ix_user_email ON user (email)')
+            database.session.commit()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        with cls.app.app_context():
+            database.drop_all()
+            os.remove(TestConfig.DB_PATH)
+        if os.path.exists(QUERY_LOG_PATH):
+            os.remove(QUERY_LOG_PATH)
+
+    def test_redundant_indexes(self):
+        indexes = [IndexInfo('t', 'pk', ('a',), True, True),
+                   IndexInfo('t', 'ix_a', ('a',), False),
+                   IndexInfo('t', 'ix_b_c', ('b', 'c'), False),
+                   IndexInfo('t', 'ix_b', ('b',), False),
+                   IndexInfo('t', 'uq_c', ('c',), True),
+                   IndexInfo('t', 'ix_c_b', ('c', 'b'), True)]
+        self.assertEqual([(index.name, covered_by.name) for index, covered_by in redundant_indexes(indexes)],
+                         [('ix_a', 'pk'), ('ix_b', 'ix_b_c')])
+
+    def test_parse_echo_log(self):
+        statements = list(parse_echo_log(ECHO_OUTPUT.splitlines(keepends=True)))
+        self.assertEqual([logged.parameters for logged in statements], [('someone',), ('other',)])
+        self.assertEqual(statements[0].statement,
+                         'SELECT user.email AS user_email\nFROM user\nWHERE user.display_name = ?')
+        self.assertEqual(list(parse_query_log(ECHO_OUTPUT.splitlines())), statements)
+
+    def test_audit_query_log(self):
+        with self.app.app_context():
+            for name in ('a', 'b', 'c'):
+                User.query.filter_by(display_name=name).all()
+            User.query.get('someone@test.test')
+
+        with open(QUERY_LOG_PATH) as log_file:
+            statements = list(parse_query_log(log_file))
+        with self.app.app_context(), database.engine.connect() as connection:
+            report = audit(connection, database.Model.metadata, statements)
+
+        hottest = report.plans[0]
+        self.assertEqual(hottest.stats.count, 3)
+        self.assertEqual([scan.table for scan in hottest.scans], ['user'])
+        self.assertEqual(report.missing, [IndexInfo('user', 'ix_user_display_name', ('display_name',), False)])
+        self.assertEqual([(index.name, covered_by.primary) for index, covered_by in report.redundant],
+                         [('ix_user_email', True)])
+        self.assertEqual(report.model_redundant, [])
+
+        directory = tempfile.mkdtemp()
+        try:
+            shutil.copy(os.path.join(TestConfig.PROJECT_ROOT, 'migrations', 'script.py.mako'), directory)
+            with open(write_migration(directory, report)) as migration:
+                script = migration.read()
+        finally:
+            shutil.rmtree(directory)
+        self.assertIn("op.drop_index('ix_user_email', table_name='user')", script)
+        self.assertIn("op.create_index('ix_user_display_name', 'user', ['display_name'], unique=False)", script)
+        self.assertIn('down_revision = None', script)
+
+    def test_cli(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.log', delete=False) as echo_log:
+            echo_log.write(ECHO_OUTPUT)
+        try:
+            result = self.app.test_cli_runner().invoke(args=['internal', 'index-audit', '--log', echo_log.name])
+        finally:
+            os.remove(echo_log.name)
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('2x: SELECT user.email AS user_email FROM user WHERE user.display_name = ?', result.output)
+        self.assertIn('sequential scan of user: SCAN user', result.output)
+        self.assertIn('missing index ix_user_display_name on user(display_name)', result.output)
+        self.assertIn('redundant index ix_user_email on user(email), covered by the primary key(email)',
+                      result.output)
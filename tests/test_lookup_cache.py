@@ -0,0 +1,102 @@
+from contextlib import contextmanager
+from typing import List
+
+from sqlalchemy import event
+
+from src.endpoints.auth.model import User
+from src.extensions import cache, database
+from src.extensions.lookup_cache import lookup_key
+from tests.base import BaseTest
+
+
+class TestLookupCache(BaseTest):
+
+    @contextmanager
+    def count_queries(self) -> List[str]:
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        engine = database.get_engine(self.app)
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+    def test_hit_skips_database(self):
+        with self.app.app_context():
+            User.create(email='hit@test.test', password_hash='hash', display_name='hit')
+
+        with self.app.app_context():
+            self.assertEqual(User.get('hit@test.test').display_name, 'hit')
+        with self.app.app_context(), self.count_queries() as statements:
+            user = User.get('hit@test.test')
+            self.assertEqual(user.display_name, 'hit')
+            self.assertEqual(user.password_hash, 'hash')
+            self.assertIs(user, User.get('hit@test.test'))
+        self.assertEqual(statements, [])
+
+    def test_miss_is_cached_until_created(self):
+        with self.app.app_context(), self.count_queries() as statements:
+            self.assertIsNone(User.get('miss@test.test'))
+            self.assertIsNone(User.get('miss@test.test'))
+            self.assertEqual(len(statements), 1)
+
+            User.create(email='miss@test.test', password_hash='hash')
+        with self.app.app_context():
+            self.assertIsNotNone(User.get('miss@test.test'))
+
+    def test_update_and_delete_invalidate(self):
+        with self.app.app_context():
+            User.create(email='change@test.test', password_hash='hash', display_name='before')
+            User.get('change@test.test')
+
+        with self.app.app_context():
+            User.get('change@test.test').update(display_name='after')
+        with self.app.app_context():
+            self.assertEqual(User.get('change@test.test').display_name, 'after')
+
+        with self.app.app_context():
+            User.get('change@test.test').delete()
+        with self.app.app_context():
+            self.assertIsNone(User.get('change@test.test'))
+
+    def test_hit_keeps_unflushed_changes(self):
+        with self.app.app_context():
+            User.create(email='pending@test.test', password_hash='hash', display_name='old')
+            User.get('pending@test.test')
+
+        with self.app.app_context():
+            user = User.get('pending@test.test')
+            user.display_name = 'new'
+            self.assertIs(User.get('pending@test.test'), user)
+            self.assertEqual(user.display_name, 'new')
+            database.session.commit()
+
+            queried = User.query.filter_by(email='pending@test.test').one()
+            queried.display_name = 'newer'
+            self.assertIs(User.get('pending@test.test'), queried)
+            self.assertEqual(queried.display_name, 'newer')
+            database.session.commit()
+        with self.app.app_context():
+            self.assertEqual(User.query.get('pending@test.test').display_name, 'newer')
+
+    def test_invalidated_on_commit_only(self):
+        key = lookup_key(User, 'deferred@test.test')
+        with self.app.app_context():
+            User.create(email='deferred@test.test', password_hash='hash', display_name='before')
+            User.get('deferred@test.test')
+
+            user = User.get('deferred@test.test')
+            user.update(commit=False, display_name='after')
+            self.assertIsNotNone(cache.get(key))
+            database.session.rollback()
+            self.assertIsNotNone(cache.get(key))
+
+            user.update(commit=False, display_name='after')
+            database.session.commit()
+            self.assertIsNone(cache.get(key))
+        with self.app.app_context():
+            self.assertEqual(User.get('deferred@test.test').display_name, 'after')
@@ -0,0 +1,59 @@
+from http import HTTPStatus
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import create_engine, exc
+from sqlalchemy.pool import QueuePool
+
+from src.endpoints.auth.model import User
+from src.extensions import database
+from src.extensions.pool_metrics import InstrumentedPoolMixin, instrumented_pool_class, pool_status
+from tests.base import BaseTest, admin_headers
+
+
+class TestPoolMetrics(BaseTest):
+
+    def test_engine_pool_is_instrumented(self):
+        with self.app.app_context():
+            self.assertIsInstance(database.engine.pool, InstrumentedPoolMixin)
+
+    def test_timeouts_and_in_use(self):
+        engine = create_engine('sqlite://', poolclass=instrumented_pool_class(QueuePool),
+                               pool_size=1, max_overflow=0, pool_timeout=0.01)
+        connection = engine.connect()
+        self.assertEqual(pool_status(engine.pool)['in_use'], 1)
+        with self.assertRaises(exc.TimeoutError):
+            engine.connect()
+        connection.close()
+
+        status = pool_status(engine.pool)
+        self.assertEqual(status['pool_class'], 'QueuePool')
+        self.assertEqual(status['checkouts'], 1)
+        self.assertEqual(status['timeouts'], 1)
+        self.assertEqual(status['in_use'], 0)
+        self.assertEqual(status['peak_in_use'], 1)
+        self.assertGreaterEqual(status['wait_ms']['max'], 10)
+        engine.dispose()
+
+    def test_internal_endpoint(self):
+        self.assertEqual(self.client.get('/api/v1/internal/pool').status_code, HTTPStatus.UNAUTHORIZED)
+        with self.app.app_context():
+            User.create(email='user@test.test', password_hash='x')
+            user_headers = dict(Authorization=f'Bearer {create_access_token("user@test.test")}')
+        self.assertEqual(self.client.get('/api/v1/internal/pool', headers=user_headers).status_code,
+                         HTTPStatus.FORBIDDEN)
+
+        with self.app.app_context():
+            User.query.get('nobody@test.test')
+            headers = admin_headers()
+        response = self.client.get('/api/v1/internal/pool', headers=headers)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        default = response.get_json()['body']['default']
+        self.assertGreaterEqual(default['checkouts'], 1)
+        self.assertEqual(default['timeouts'], 0)
+
+        self.app.config['INTERNAL_ENDPOINTS_ENABLED'] = False
+        try:
+            self.assertEqual(self.client.get('/api/v1/internal/pool', headers=headers).status_code,
+                             HTTPStatus.NOT_FOUND)
+        finally:
+            self.app.config['INTERNAL_ENDPOINTS_ENABLED'] = True
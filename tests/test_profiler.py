@@ -0,0 +1,72 @@
+import threading
+from http import HTTPStatus
+
+from src.extensions.profiler import PROFILE_ID_HEADER, PROFILE_TOKEN_HEADER, make_profile_token
+from tests.base import BaseTest, admin_headers
+
+
+class TestRequestProfiler(BaseTest):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        with cls.app.app_context():
+            cls.headers = admin_headers()
+            cls.token = make_profile_token()
+
+        def fail():
+            raise RuntimeError('profiled failure')
+
+        cls.app.add_url_rule('/profiler/fail', 'profiler_fail', fail)
+
+    def tearDown(self) -> None:
+        super().tearDown()
+        self.app.config['PROFILER_SAMPLE_RATE'] = 0.0
+
+    def login(self, headers: dict = None):
+        return self.client.post('/api/v1/auth/login', json=dict(email='nobody@test.test', password='#1Test1234'),
+                                headers=headers)
+
+    def test_unsampled_request(self):
+        self.assertNotIn(PROFILE_ID_HEADER, self.login().headers)
+        self.assertNotIn(PROFILE_ID_HEADER, self.login({PROFILE_TOKEN_HEADER: self.token + 'x'}).headers)
+
+    def test_signed_header_profiles_request(self):
+        response = self.login({PROFILE_TOKEN_HEADER: self.token})
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+        profile_id = response.headers[PROFILE_ID_HEADER]
+
+        response = self.client.get(f'/api/v1/internal/profiles/{profile_id}', headers=self.headers)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        profile = response.get_json()['body']
+        self.assertEqual(profile['endpoint'], 'auth.login')
+        self.assertEqual(profile['path'], '/api/v1/auth/login')
+        self.assertTrue(profile['stacks'])
+        for line in profile['stacks'].splitlines():
+            stack, count = line.rsplit(' ', 1)
+            self.assertGreater(int(count), 0)
+            self.assertTrue(stack)
+
+    def test_sample_rate(self):
+        self.app.config['PROFILER_SAMPLE_RATE'] = 1.0
+        self.assertIn(PROFILE_ID_HEADER, self.login().headers)
+
+    def test_unknown_profile(self):
+        response = self.client.get('/api/v1/internal/profiles/unknown', headers=self.headers)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_token_command(self):
+        result = self.app.test_cli_runner().invoke(args=['internal', 'profile-token'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertNotIn(PROFILE_ID_HEADER, self.login({PROFILE_TOKEN_HEADER: 'bogus'}).headers)
+        self.assertIn(PROFILE_ID_HEADER, self.login({PROFILE_TOKEN_HEADER: result.output.strip()}).headers)
+
+    def test_sampler_stopped_when_view_raises(self):
+        # a debug app keeps the failed request's context (and defers its teardown) for inspection
+        self.app.config['PRESERVE_CONTEXT_ON_EXCEPTION'] = False
+        try:
+            with self.assertRaises(RuntimeError):
+                self.client.get('/profiler/fail', headers={PROFILE_TOKEN_HEADER: self.token})
+        finally:
+            self.app.config['PRESERVE_CONTEXT_ON_EXCEPTION'] = None
+        self.assertFalse([thread for thread in threading.enumerate() if thread.name == 'request-profiler'])
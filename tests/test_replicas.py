@@ -0,0 +1,173 @@
+import asyncio
+import os
+from http import HTTPStatus
+from unittest import TestCase
+
+from flask_jwt_extended import create_access_token
+from werkzeug.security import generate_password_hash
+
+from src.app import create_app
+from src.config import TestConfig
+from src.endpoints.auth.model import User
+from src.extensions import async_database, database, write_behind
+
+REPLICA_PATH = os.path.join(TestConfig.PROJECT_ROOT, 'test.replica.db')
+
+
+class ReplicaConfig(TestConfig):
+    SQLALCHEMY_BINDS = dict(replica=f'sqlite:///{REPLICA_PATH}?check_same_thread=False')
+    SQLALCHEMY_REPLICA_BINDS = ('replica',)
+    LOOKUP_CACHE_ENABLED = False
+    RATELIMIT_ENABLED = False
+
+
+class ReplicaBase(TestCase):
+    config = ReplicaConfig
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.app = create_app(cls.config)
+        cls.client = cls.app.test_client()
+
+        with cls.app.app_context():
+            database.create_all(bind=None)
+            database.Model.metadata.create_all(database.get_engine(bind='replica'))
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        with cls.app.app_context():
+            write_behind.shutdown()
+            database.drop_all(bind=None)
+            asyncio.run(async_database.dispose())
+        for path in (TestConfig.DB_PATH, REPLICA_PATH):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def setUp(self) -> None:
+        with self.app.app_context():
+            for bind in (None, 'replica'):
+                with database.get_engine(bind=bind).begin() as connection:
+                    connection.execute(User.__table__.delete())
+            self.app.extensions['replicas'].check(force=True)
+
+    def insert(self, bind, **row):
+        with self.app.app_context():
+            with database.get_engine(bind=bind).begin() as connection:
+                connection.execute(User.__table__.insert(), dict(dict(password_hash='x'), **row))
+
+
+class TestReplicaRouting(ReplicaBase):
+
+    def test_reads_go_to_replica(self):
+        self.insert(None, email='read@test.test', display_name='primary')
+        self.insert('replica', email='read@test.test', display_name='replica')
+        with self.app.app_context():
+            self.assertEqual(User.get('read@test.test').display_name, 'replica')
+            self.assertEqual(User.query.filter_by(display_name='replica').count(), 1)
+
+    def test_writes_go_to_primary_and_stick(self):
+        with self.app.app_context():
+            User.create(email='write@test.test', password_hash='x', display_name='new')
+            self.assertTrue(database.session().on_primary)
+            self.assertEqual(User.query.get('write@test.test').display_name, 'new')
+
+        with self.app.app_context():
+            self.assertIsNone(User.query.get('write@test.test'))
+            self.assertEqual(database.session.get_bind(mapper=None, clause=User.query.statement),
+                             database.get_engine(bind='replica'))
+
+    def test_writes_in_primary_reads_stick(self):
+        with self.app.app_context():
+            session = database.session()
+            with session.primary_reads():
+                self.assertIsNone(User.query.get('block@test.test'))
+                User.create(email='block@test.test', password_hash='x')
+            self.assertTrue(session.on_primary)
+            self.assertIsNotNone(User.query.filter_by(email='block@test.test').first())
+
+        with self.app.app_context():
+            with database.session().primary_reads():
+                User.query.get('block@test.test')
+            self.assertFalse(database.session().on_primary)
+
+    def test_locking_reads_go_to_primary(self):
+        self.insert(None, email='lock@test.test', display_name='primary')
+        with self.app.app_context():
+            self.assertEqual(User.query.with_for_update().get('lock@test.test').display_name, 'primary')
+
+    def test_use_primary(self):
+        self.insert(None, email='pinned@test.test', display_name='primary')
+        with self.app.app_context():
+            database.session().use_primary()
+            self.assertEqual(User.query.get('pinned@test.test').display_name, 'primary')
+
+    def test_lagging_replica_is_skipped(self):
+        self.insert(None, email='lag@test.test', display_name='primary')
+        self.insert('replica', email='lag@test.test', display_name='replica')
+        self.insert(None, email='admin@test.test', is_admin=True)
+        replicas = self.app.extensions['replicas']
+        replicas.lag_query = 'SELECT 60'
+        try:
+            replicas.check(force=True)
+            with self.app.app_context():
+                self.assertEqual(User.query.get('lag@test.test').display_name, 'primary')
+                self.assertEqual(self.client.get('/api/v1/internal/replicas', headers=dict(
+                    Authorization=f'Bearer {create_access_token("admin@test.test")}')).get_json()['body'],
+                    dict(max_lag=ReplicaConfig.SQLALCHEMY_REPLICA_MAX_LAG,
+                         replicas=dict(replica=dict(healthy=True, lag=60.0, error=None))))
+        finally:
+            replicas.lag_query = None
+            replicas.check(force=True)
+
+    def test_login_reads_from_replica(self):
+        login = dict(email='login@test.test', password='secret')
+        self.insert(None, email=login['email'], password_hash=generate_password_hash(login['password']))
+        self.assertEqual(self.client.post('/api/v1/auth/login', json=login).status_code, HTTPStatus.UNAUTHORIZED)
+
+        self.insert('replica', email=login['email'], password_hash=generate_password_hash(login['password']))
+        self.assertEqual(self.client.post('/api/v1/auth/login', json=login).status_code, HTTPStatus.OK)
+
+
+class CachedReplicaConfig(ReplicaConfig):
+    LOOKUP_CACHE_ENABLED = True
+
+
+class TestLookupCacheWithReplicas(ReplicaBase):
+    config = CachedReplicaConfig
+
+    def test_cache_filled_from_primary(self):
+        self.insert(None, email='cached@test.test', display_name='primary')
+        self.insert('replica', email='cached@test.test', display_name='stale')
+        with self.app.app_context():
+            self.assertEqual(User.get('cached@test.test').display_name, 'primary')
+            self.assertFalse(database.session().on_primary)
+            self.assertEqual(User.query.filter_by(display_name='stale').count(), 1)
+        with self.app.app_context():
+            self.assertEqual(User.get('cached@test.test').display_name, 'primary')
+
+    def test_async_cache_filled_from_primary(self):
+        self.insert(None, email='async@test.test', display_name='primary')
+        with self.app.app_context():
+            self.assertEqual(asyncio.run(User.get_async('async@test.test')).display_name, 'primary')
+
+
+class UnreachableReplicaConfig(ReplicaConfig):
+    SQLALCHEMY_BINDS = dict(replica=f'sqlite:///{REPLICA_PATH}', down='sqlite:////nonexistent/dir/replica.db')
+    SQLALCHEMY_REPLICA_BINDS = ('replica', 'down')
+
+
+class TestUnreachableReplica(ReplicaBase):
+    config = UnreachableReplicaConfig
+
+    def test_unreachable_replica_is_left_out(self):
+        status = self.app.extensions['replicas'].status()
+        self.assertFalse(status['down']['healthy'])
+        self.assertIn('OperationalError', status['down']['error'])
+        self.assertTrue(status['replica']['healthy'])
+
+        self.insert('replica', email='up@test.test', display_name='replica')
+        for _ in range(10):
+            with self.app.app_context():
+                self.assertEqual(User.query.get('up@test.test').display_name, 'replica')
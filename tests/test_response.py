@@ -4,16 +4,17 @@ from unittest import TestCase
 from flask import Response
 
 from src.app import create_app
-from src.common import response_template
+from src.common import response_template, stream_response_template
 from src.config import TestConfig
 
 
 class TestResponse(TestCase):
 
-    def setUp(self) -> None:
-        super().setUp()
-        self.app = create_app(TestConfig)
-        self.client = self.app.test_client()
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.app = create_app(TestConfig)
+        cls.client = cls.app.test_client()
 
     def test_message_response(self):
         response_message = 'test_message'
@@ -56,3 +57,33 @@ class TestResponse(TestCase):
                 self.assertTrue(item in response_list)
             self.assertTrue(resp_dict['body'] == response_list)
             self.assertTrue(resp.status_code == HTTPStatus.OK)
+
+    def test_stream_response_matches_buffered(self):
+        for rows in (0, 1, 3, 4, 10):
+            response_list = [dict(index=i, name=f'row {i}') for i in range(rows)]
+
+            with self.app.test_request_context():
+                buffered = response_template(response_list, HTTPStatus.OK, cursor='abc').get_json()
+                resp = stream_response_template(iter(response_list), HTTPStatus.OK, chunk_size=3, cursor='abc')
+                self.assertTrue(resp.is_streamed)
+                self.assertEqual(resp.status_code, HTTPStatus.OK)
+                self.assertEqual(resp.mimetype, 'application/json')
+                self.assertEqual(resp.get_json(), buffered)
+
+    def test_stream_response_is_lazy(self):
+        consumed = []
+
+        def rows():
+            for i in range(5):
+                consumed.append(i)
+                yield i
+
+        with self.app.test_request_context():
+            resp = stream_response_template(rows(), HTTPStatus.OK, serializer=lambda i: dict(value=i * 2), chunk_size=2)
+            self.assertEqual(consumed, [])
+            chunks = iter(resp.response)
+            next(chunks)
+            next(chunks)
+            self.assertEqual(consumed, [0, 1])
+            self.assertEqual(b''.join(chunks)[-2:], b']}')
+            self.assertEqual(consumed, [0, 1, 2, 3, 4])
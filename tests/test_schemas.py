@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+
+from marshmallow import Schema, fields, post_dump
+
+from src.endpoints.auth.model import User
+from src.endpoints.auth.schema import LoginSpec, UserSchema
+from src.extensions import schema_registry
+from src.extensions.schemas import CompiledDumper
+from tests.base import BaseTest
+
+
+class HookSchema(Schema):
+    name = fields.String()
+
+    @post_dump
+    def upper(self, data, **kwargs):
+        return {key: value.upper() for key, value in data.items()}
+
+
+class MixedSchema(Schema):
+    name = fields.String(data_key='userName')
+    count = fields.Integer()
+    created = fields.DateTime()
+
+
+class TestSchemaRegistry(BaseTest):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.users = [User(email=f'user{i}@test.test', display_name=f'User {i}' if i % 2 else None) for i in range(5)]
+
+    def test_instances_are_shared(self):
+        with self.app.app_context():
+            self.assertIs(schema_registry.get(LoginSpec), schema_registry.get(LoginSpec))
+            self.assertIs(schema_registry.get(UserSchema, only=['email', 'display_name']),
+                          schema_registry.get(UserSchema, only=('display_name', 'email')))
+            self.assertIsNot(schema_registry.get(UserSchema), schema_registry.get(UserSchema, only=['email']))
+
+    def test_only_is_normalized(self):
+        with self.app.app_context():
+            registry = self.app.extensions['schema_registry']
+            size = len(registry)
+            for repeat in range(1, 5):
+                schema_registry.dump(UserSchema, self.users, many=True, only=['email'] * repeat)
+            self.assertLessEqual(len(registry), size + 1)
+            with self.assertRaises(ValueError):
+                schema_registry.get(UserSchema, only=['email', 'no_such_field'])
+
+    def test_fast_dump_matches_marshmallow(self):
+        with self.app.app_context():
+            self.assertIsNotNone(CompiledDumper.compile(UserSchema()))
+            self.assertEqual(schema_registry.dump(UserSchema, self.users[1]), UserSchema().dump(self.users[1]))
+            self.assertEqual(schema_registry.dump(UserSchema, self.users, many=True),
+                             UserSchema().dump(self.users, many=True))
+            self.assertEqual(schema_registry.dump(UserSchema, self.users, many=True, only=['email']),
+                             UserSchema(only=['email']).dump(self.users, many=True))
+
+    def test_unexpected_value_types_go_through_fields(self):
+        row = SimpleNamespace(name=5, count='7', created=None)
+        dumper = CompiledDumper.compile(Schema.from_dict(dict(name=fields.String(), count=fields.Integer()))())
+        self.assertEqual(dumper.dump_one(row), dict(name='5', count=7))
+
+    def test_transforming_schemas_are_not_compiled(self):
+        self.assertIsNone(CompiledDumper.compile(HookSchema()))
+        self.assertIsNone(CompiledDumper.compile(MixedSchema()))
+        with self.app.app_context():
+            row = SimpleNamespace(name='name')
+            self.assertEqual(schema_registry.dump(HookSchema, row), dict(name='NAME'))
+
+    def test_fast_dump_disabled(self):
+        self.app.config['SCHEMA_FAST_DUMP'] = False
+        try:
+            with self.app.app_context():
+                self.app.extensions['schema_registry'].clear()
+                self.assertEqual(schema_registry.dump(UserSchema, self.users, many=True),
+                                 UserSchema().dump(self.users, many=True))
+                self.assertTrue(all(dumper is None for _, dumper in self.app.extensions['schema_registry'].values()))
+        finally:
+            self.app.config['SCHEMA_FAST_DUMP'] = True
+            self.app.extensions['schema_registry'].clear()
@@ -0,0 +1,54 @@
+import datetime
+import decimal
+import json
+import uuid
+from http import HTTPStatus
+from unittest import TestCase, skipIf
+
+from src.app import create_app
+from src.common import response_template
+from src.config import TestConfig
+from src.extensions.serialization import JSONProvider, OrjsonProvider, StdlibJSONProvider, orjson
+
+
+class TestSerialization(TestCase):
+    payload = dict(created=datetime.datetime(2022, 3, 1, 12, 30, 15, 250, tzinfo=datetime.timezone.utc),
+                   day=datetime.date(2022, 3, 1),
+                   id=uuid.UUID('12345678-1234-5678-1234-567812345678'),
+                   amount=decimal.Decimal('10.25'),
+                   nested=[dict(name='ünicode', value=None, ok=True)])
+    expected = dict(created='2022-03-01T12:30:15.000250+00:00',
+                    day='2022-03-01',
+                    id='12345678-1234-5678-1234-567812345678',
+                    amount='10.25',
+                    nested=[dict(name='ünicode', value=None, ok=True)])
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.app = create_app(TestConfig)
+
+    def test_stdlib_provider(self):
+        self.assertEqual(json.loads(StdlibJSONProvider().dumps(self.payload)), self.expected)
+
+    @skipIf(orjson is None, 'orjson is not installed')
+    def test_orjson_provider_matches_stdlib(self):
+        for sort_keys in (True, False):
+            self.assertEqual(OrjsonProvider(sort_keys).dumps(self.payload),
+                             StdlibJSONProvider(sort_keys).dumps(self.payload))
+
+    def test_provider_must_implement_dumps(self):
+        with self.assertRaises(TypeError):
+            JSONProvider()
+
+    def test_auto_provider(self):
+        expected = OrjsonProvider if orjson is not None else StdlibJSONProvider
+        self.assertIsInstance(self.app.extensions['json_provider'], expected)
+
+    def test_response_template_uses_provider(self):
+        with self.app.app_context():
+            resp = response_template([self.payload], HTTPStatus.OK, page=1)
+            self.assertEqual(resp.mimetype, 'application/json')
+            self.assertEqual(resp.get_json(), dict(status_code=HTTPStatus.OK,
+                                                   body=[self.expected],
+                                                   additional_information=dict(page=1)))
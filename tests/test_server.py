@@ -0,0 +1,171 @@
+import http.client
+import json
+import os
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import List
+from unittest import TestCase
+
+from src.app import create_app, shutdown_app
+from src.config import TestConfig
+from src.extensions import database
+from src.server import read_health
+from tests.base import admin_headers
+
+SECRET_KEY = 'prefork-server-test'
+
+
+def create_test_app():
+    """Factory of the workers started by these tests."""
+    app = create_app(TestConfig)
+    app.add_url_rule('/slow', 'slow', lambda: (time.sleep(float(os.getenv('SLOW_SECONDS', '0.5'))), 'done')[1])
+    app.add_url_rule('/hashing-workers', 'hashing_workers', lambda: os.environ['VDASHBOARD_HASHING_WORKERS'])
+    return app
+
+
+def record_shutdown(app):
+    """Shutdown hook of the workers started by these tests."""
+    shutdown_app(app)
+    with open(os.environ['SHUTDOWN_LOG'], 'a') as log:
+        log.write(f'{os.getpid()}\n')
+
+
+def broken_app():
+    raise RuntimeError('cannot boot')
+
+
+class TestPreforkServer(TestCase):
+
+    def setUp(self) -> None:
+        self.health_dir = tempfile.mkdtemp()
+        self.log = tempfile.NamedTemporaryFile('w+', suffix='.log')
+        self.shutdown_log = tempfile.NamedTemporaryFile('w+', suffix='.log')
+        self.master = None
+
+    def tearDown(self) -> None:
+        if self.master is not None and self.master.poll() is None:
+            self.master.send_signal(signal.SIGQUIT)
+            self.master.wait(10)
+        self.log.close()
+        self.shutdown_log.close()
+        shutil.rmtree(self.health_dir, ignore_errors=True)
+
+    def start(self, *args: str, factory: str = 'tests.test_server:create_test_app', workers: int = 2,
+              wait: bool = True):
+        env = dict(os.environ, VDASHBOARD_SECRET_KEY=SECRET_KEY, SHUTDOWN_LOG=self.shutdown_log.name)
+        env.pop('VDASHBOARD_HASHING_WORKERS', None)
+        self.master = subprocess.Popen([sys.executable, '-m', 'src.server', '--factory', factory,
+                                        '--bind', '127.0.0.1:0', '--workers', str(workers), '--heartbeat', '0.1',
+                                        '--graceful-timeout', '5', '--health-dir', self.health_dir, *args],
+                                       cwd=TestConfig.PROJECT_ROOT, env=env, stderr=self.log)
+        self.port = int(self.wait_for(lambda: re.search(r'Listening at http://127\.0\.0\.1:(\d+)', self.output()))[1])
+        if wait:
+            self.wait_for(lambda: len(self.ready()) == workers)
+
+    def output(self) -> str:
+        self.log.seek(0)
+        return self.log.read()
+
+    def wait_for(self, condition, timeout: float = 20):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            result = condition()
+            if result:
+                return result
+            time.sleep(0.05)
+        self.fail(f'timed out, server output:\n{self.output()}')
+
+    def ready(self) -> List[dict]:
+        return [worker for worker in read_health(self.health_dir) if worker['status'] == 'ready']
+
+    def request(self, path: str, headers: dict = None):
+        connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=10)
+        try:
+            connection.request('GET', path, headers=headers or {})
+            response = connection.getresponse()
+            return response.status, response.read()
+        finally:
+            connection.close()
+
+    def test_recycles_workers_and_reports_health(self):
+        self.start('--max-requests', '3')
+        first_pids = {worker['pid'] for worker in self.ready()}
+        for _ in range(8):
+            self.assertEqual(self.request('/api/v1/missing')[0], 404)
+        self.wait_for(lambda: len(self.ready()) == 2 and {w['pid'] for w in self.ready()} - first_pids)
+
+        token_app = create_app(type('TokenConfig', (TestConfig,), dict(SECRET_KEY=SECRET_KEY)))
+        with token_app.app_context():
+            database.create_all()
+            headers = admin_headers()
+        try:
+            status, body = self.request('/api/v1/internal/workers', headers)
+        finally:
+            with token_app.app_context():
+                database.drop_all()
+            os.remove(TestConfig.DB_PATH)
+        self.assertEqual(status, 200)
+        workers = json.loads(body)['body']
+        self.assertEqual(len(workers), 2)
+        for worker in workers:
+            self.assertEqual(worker['generation'], 1)
+            self.assertEqual(worker['max_requests'], 3)
+            self.assertLess(worker['heartbeat_age'], 5)
+            self.assertIn(worker['status'], ('ready', 'stopping'))
+
+    def test_reload_without_downtime(self):
+        self.start()
+        first_pids = {worker['pid'] for worker in self.ready()}
+        failures, statuses, stop = [], [], threading.Event()
+
+        def load():
+            while not stop.is_set():
+                try:
+                    statuses.append(self.request('/api/v1/missing')[0])
+                except OSError as e:
+                    failures.append(e)
+
+        client = threading.Thread(target=load)
+        client.start()
+        try:
+            self.master.send_signal(signal.SIGHUP)
+            self.wait_for(lambda: (len(read_health(self.health_dir)) == 2
+                                   and all(w['generation'] == 2 and w['status'] == 'ready'
+                                           for w in read_health(self.health_dir))))
+        finally:
+            stop.set()
+            client.join()
+        self.assertFalse({worker['pid'] for worker in self.ready()} & first_pids)
+        self.assertEqual(failures, [])
+        self.assertTrue(statuses)
+        self.assertEqual(set(statuses), {404})
+
+    def test_graceful_shutdown_finishes_requests(self):
+        self.start('--shutdown', 'tests.test_server:record_shutdown', workers=1)
+        pid = self.ready()[0]['pid']
+        result = []
+        slow = threading.Thread(target=lambda: result.append(self.request('/slow')))
+        slow.start()
+        self.wait_for(lambda: any(worker['in_flight'] for worker in read_health(self.health_dir)))
+        self.master.send_signal(signal.SIGTERM)
+        slow.join(10)
+        self.assertEqual(result, [(200, b'done')])
+        self.assertEqual(self.master.wait(10), 0)
+        self.assertEqual(os.listdir(self.health_dir), [])
+        self.shutdown_log.seek(0)
+        self.assertEqual(self.shutdown_log.read(), f'{pid}\n')
+
+    def test_hashing_workers_split_between_workers(self):
+        self.start(workers=2)
+        self.assertEqual(self.request('/hashing-workers'), (200, str(max(1, (os.cpu_count() or 1) // 2)).encode()))
+
+    def test_boot_failure_stops_master(self):
+        self.start(factory='tests.test_server:broken_app', wait=False)
+        self.assertEqual(self.master.wait(20), 1)
+        self.assertIn('failed to boot', self.output())
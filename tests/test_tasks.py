@@ -0,0 +1,90 @@
+import threading
+
+from src.endpoints.auth.model import User
+from src.extensions import task_queue
+from src.extensions.tasks import RedisBackend
+from tests.base import BaseTest
+
+attempts = []
+attempts_lock = threading.Lock()
+
+
+@task_queue.task
+def create_user(email: str):
+    User.create(email=email, password_hash='x', display_name='from task')
+
+
+@task_queue.task(retries=2, backoff=0.01)
+def flaky(key: str, failures: int):
+    with attempts_lock:
+        attempts.append(key)
+        if attempts.count(key) <= failures:
+            raise RuntimeError(f'attempt {attempts.count(key)} of {key} failed')
+
+
+class StubRedis:
+    """The list commands of a Redis client that ``RedisBackend.work`` uses."""
+
+    def __init__(self, *messages):
+        self.lists = dict(tasks=list(messages))
+        self.drained = threading.Event()
+
+    def register_script(self, script):
+        return lambda keys, args: 0
+
+    def brpop(self, key, timeout):
+        queue = self.lists.get(key)
+        if not queue:
+            self.drained.set()
+            return None
+        return key, queue.pop()
+
+    def lpush(self, key, value):
+        self.lists.setdefault(key, []).insert(0, value)
+
+
+class TestTaskQueue(BaseTest):
+
+    def setUp(self) -> None:
+        attempts.clear()
+
+    def test_task_runs_with_app_context(self):
+        with self.app.app_context():
+            create_user.delay('task@test.test')
+            self.assertTrue(task_queue.join(timeout=5))
+            self.assertEqual(User.query.get('task@test.test').display_name, 'from task')
+
+    def test_direct_call_is_synchronous(self):
+        flaky('direct', 0)
+        self.assertEqual(attempts, ['direct'])
+
+    def test_retries_with_backoff(self):
+        with self.app.app_context():
+            flaky.delay('twice', 2)
+            self.assertTrue(task_queue.join(timeout=5))
+        self.assertEqual(attempts, ['twice'] * 3)
+
+    def test_gives_up_after_retries(self):
+        with self.app.app_context(), self.assertLogs(self.app.logger, 'ERROR') as logs:
+            flaky.delay('always', 10)
+            self.assertTrue(task_queue.join(timeout=5))
+        self.assertEqual(attempts, ['always'] * 3)
+        self.assertIn('failed after 3 attempts', logs.output[-1])
+
+    def test_arguments_must_be_json(self):
+        with self.app.app_context(), self.assertRaises(TypeError):
+            create_user.delay(object())
+
+    def test_unknown_task_is_dropped(self):
+        with self.assertLogs(self.app.logger, 'ERROR'):
+            task_queue.execute(self.app, '{"id": "1", "task": "missing", "args": [], "kwargs": {}, "attempt": 0}')
+
+    def test_worker_dead_letters_malformed_messages(self):
+        job = '{"id": "2", "task": "%s", "args": ["worker"], "kwargs": {"failures": 0}, "attempt": 0}' % flaky.name
+        client = StubRedis(job, b'{"id": "1"}', b'not json')
+        backend = RedisBackend(client, lambda message: task_queue.execute(self.app, message), logger=self.app.logger)
+        with self.assertLogs(self.app.logger, 'ERROR') as logs:
+            backend.work(client.drained)
+        self.assertEqual(client.lists['tasks:dead'], [b'{"id": "1"}', b'not json'])
+        self.assertEqual(len(logs.output), 2)
+        self.assertEqual(attempts, ['worker'])
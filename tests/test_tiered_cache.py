@@ -0,0 +1,114 @@
+import os
+import time
+import uuid
+from http import HTTPStatus
+from unittest import TestCase
+
+from flask_caching.backends import SimpleCache
+
+from src.app import create_app
+from src.config import TestConfig
+from src.extensions import cache, database
+from src.extensions.tiered_cache import LocalPubSub, LocalTier, TieredCache
+from tests.base import admin_headers
+
+
+class TestTieredCache(TestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.remote = SimpleCache()
+        self.pubsub = LocalPubSub(f'test-{uuid.uuid4().hex}')
+        self.worker = TieredCache(self.remote, self.pubsub)
+        self.other_worker = TieredCache(self.remote, self.pubsub)
+
+    def tearDown(self) -> None:
+        super().tearDown()
+        self.pubsub.close()
+
+    def test_read_through(self):
+        self.assertIsNone(self.worker.get('key'))
+        self.worker.set('key', dict(value=1))
+        self.assertEqual(self.worker.get('key'), dict(value=1))
+        self.assertEqual(self.worker.get('key'), dict(value=1))
+
+        self.remote.set('key', 'changed behind the local tier')
+        self.assertEqual(self.worker.get('key'), dict(value=1))
+        self.assertEqual(self.worker.stats()['local_hits'], 2)
+        self.assertEqual(self.worker.stats()['remote_hits'], 1)
+        self.assertEqual(self.worker.stats()['remote_misses'], 1)
+
+    def test_cached_values_are_copies(self):
+        self.worker.set('key', dict(value=1))
+        self.worker.get('key')['value'] = 2
+        self.assertEqual(self.worker.get('key'), dict(value=1))
+
+    def test_writes_invalidate_other_workers(self):
+        self.worker.set('key', 1)
+        self.worker.set('other', 1)
+        self.assertEqual(self.other_worker.get_many('key', 'other'), [1, 1])
+
+        invalidations = self.other_worker.stats()['invalidations']
+        self.worker.set('key', 2)
+        self.worker.delete('other')
+        self.assertEqual(self.other_worker.get_many('key', 'other'), [2, None])
+        self.assertEqual(self.other_worker.stats()['invalidations'], invalidations + 2)
+        self.assertEqual(self.worker.stats()['invalidations'], 0)
+
+        self.other_worker.get('key')
+        self.worker.clear()
+        self.assertEqual(len(self.other_worker.local), 0)
+        self.assertIsNone(self.other_worker.get('key'))
+
+    def test_local_timeout(self):
+        worker = TieredCache(self.remote, self.pubsub, local_timeout=0.01)
+        worker.set('key', 1)
+        worker.get('key')
+        self.remote.set('key', 2)
+        time.sleep(0.02)
+        self.assertEqual(worker.get('key'), 2)
+
+    def test_local_tier_bounds(self):
+        tier = LocalTier(max_items=3, max_bytes=100)
+        for key in 'abc':
+            tier.set(key, b'x' * 10, 60)
+        tier.get('a')
+        tier.set('d', b'x' * 10, 60)
+        self.assertIsNone(tier.get('b'))
+        self.assertIsNotNone(tier.get('a'))
+
+        tier.set('large', b'x' * 80, 60)
+        self.assertLessEqual(tier.size, 100)
+        self.assertIsNotNone(tier.get('large'))
+        tier.set('too large', b'x' * 101, 60)
+        self.assertIsNone(tier.get('too large'))
+
+
+class TestTieredCacheBackend(TestCase):
+
+    def test_selected_by_cache_type(self):
+        config = type('TieredConfig', (TestConfig,), dict(CACHE_TYPE='src.extensions.tiered_cache.TieredCache',
+                                                          TIERED_CACHE_REMOTE='flask_caching.backends.SimpleCache',
+                                                          TIERED_CACHE_PUBSUB='local',
+                                                          TIERED_CACHE_CHANNEL=f'test-{uuid.uuid4().hex}'))
+        app = create_app(config)
+        with app.app_context():
+            self.assertIsInstance(cache.cache, TieredCache)
+            self.assertIsInstance(cache.cache.remote, SimpleCache)
+            cache.set('key', 'value')
+            self.assertEqual(cache.get('key'), 'value')
+            self.assertEqual(cache.get('key'), 'value')
+            database.create_all()
+            headers = admin_headers()
+
+        try:
+            response = app.test_client().get('/api/v1/internal/cache', headers=headers)
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            stats = response.get_json()['body']
+            self.assertEqual(stats['backend'], 'TieredCache')
+            self.assertEqual(stats['local_hits'], 1)
+        finally:
+            with app.app_context():
+                database.drop_all()
+                cache.cache.pubsub.close()
+            os.remove(TestConfig.DB_PATH)
@@ -0,0 +1,83 @@
+from http import HTTPStatus
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import exc, text
+
+from src.endpoints.auth.model import User
+from src.extensions import database
+from src.extensions.profiler import PROFILE_TOKEN_HEADER, make_profile_token
+from tests.base import BaseTest, admin_headers
+
+
+class TestRequestTiming(BaseTest):
+    email = 'timing@test.test'
+    password = '#1Test1234'
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        with cls.app.app_context():
+            user = User.create(save=False, email=cls.email)
+            user.set_password(cls.password)
+            user.save()
+            cls.headers = dict(Authorization=f'Bearer {create_access_token(cls.email)}')
+            cls.admin_headers = admin_headers()
+
+    @staticmethod
+    def server_timing(response) -> dict:
+        metrics = {}
+        for metric in response.headers['Server-Timing'].split(', '):
+            name, duration, *_ = metric.split(';')
+            metrics[name] = float(duration[len('dur='):])
+        return metrics
+
+    def test_login_phases(self):
+        response = self.client.post('/api/v1/auth/login', json=dict(email=self.email, password=self.password))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        metrics = self.server_timing(response)
+        self.assertTrue({'args', 'hash', 'serialize', 'total'} <= set(metrics))
+        self.assertLessEqual(metrics['hash'], metrics['total'])
+
+    def test_db_phase(self):
+        response = self.client.get('/api/v1/auth/users', headers=self.admin_headers)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(set(self.server_timing(response)), {'args', 'db', 'serialize', 'total'})
+        self.assertIn('db;dur=', response.headers['Server-Timing'])
+        # the admin check and the page
+        self.assertIn('desc="2 queries"', response.headers['Server-Timing'])
+
+    def test_error_response_is_timed(self):
+        response = self.client.get('/api/v1/missing')
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.assertEqual(set(self.server_timing(response)), {'serialize', 'total'})
+
+    def test_histograms_route(self):
+        for _ in range(3):
+            self.client.post('/api/v1/auth/login', json=dict(email=self.email, password='wrong'))
+
+        response = self.client.get('/api/v1/internal/timings', headers=self.admin_headers)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        login = response.get_json()['body']['auth.login']
+        self.assertGreaterEqual(login['count'], 3)
+        self.assertEqual(login['buckets']['le_inf'], login['count'])
+        self.assertLessEqual(login['p50_ms'], login['p99_ms'])
+        self.assertIn('hash', login['phase_mean_ms'])
+
+    def test_header_only_for_debug_or_internal_callers(self):
+        with self.app.app_context():
+            token = make_profile_token()
+        self.app.debug = False
+        try:
+            self.assertNotIn('Server-Timing', self.client.get('/api/v1/missing').headers)
+            response = self.client.get('/api/v1/missing', headers={PROFILE_TOKEN_HEADER: token})
+            self.assertIn('total;dur=', response.headers['Server-Timing'])
+            response = self.client.get('/api/v1/missing', headers={PROFILE_TOKEN_HEADER: token + 'x'})
+            self.assertNotIn('Server-Timing', response.headers)
+        finally:
+            self.app.debug = True
+
+    def test_failed_query_is_not_left_pending(self):
+        with self.app.app_context(), database.engine.connect() as connection:
+            with self.assertRaises(exc.OperationalError):
+                connection.execute(text('SELECT * FROM missing_table'))
+            self.assertEqual(connection.info['_query_started'], {})
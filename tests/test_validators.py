@@ -0,0 +1,82 @@
+import io
+import json
+import random
+import re
+import time
+
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from src.extensions.validators import EMAIL_MAX_LENGTH, BoundedRequest, is_email, is_password
+from tests.base import BaseTest
+
+# unambiguous (hence backtracking-free) spellings of the rules, the reference for the fuzzing below
+EMAIL_REFERENCE = re.compile(r'[A-Za-z0-9]+(?:[._-][A-Za-z0-9]+)*@[A-Za-z0-9-]+(?:\.[A-Za-z]{2,})+')
+PASSWORD_REFERENCE = re.compile(r'(?=\S{6,20}\Z)(?=.*?\d)(?=.*?[a-z])(?=.*?[A-Z])(?=.*?[^A-Za-z\s0-9])')
+
+ADVERSARIAL_EMAILS = ('a' * 100000 + '!',
+                      'a.' * 50000 + '@',
+                      'a' * 60 + '@' + 'b-' * 50000,
+                      'a@b' + '.cd' * 50000 + '.',
+                      '@' * 100000)
+ADVERSARIAL_PASSWORDS = ('aA1' * 50000, 'aA1!' * 5 + ' ', ' ' * 100000)
+
+
+class TestValidators(BaseTest):
+
+    def test_email(self):
+        for email in ('test@test.test', 'first.last@mail.example.com', 'a-b_c.d@sub-domain.io', 'X9@y.ZZ'):
+            self.assertTrue(is_email(email), email)
+        for email in ('test@test', 'test@test.t', 'test@@test.test', 'a..b@test.test', '.a@test.test',
+                      'a.@test.test', 'a@test.c0m', 'a@.test', 'a b@test.test', 'é@test.test', '',
+                      'a' * EMAIL_MAX_LENGTH + '@test.test'):
+            self.assertFalse(is_email(email), email)
+
+    def test_password(self):
+        for password in ('#1Password', 'aB3$aB', 'aB3$' * 5, 'aB٣aBc'):
+            self.assertTrue(is_password(password), password)
+        for password in ('#1password', '#1PASSWORD', '#Password', '1Password', 'aB3$a', 'aB3$' * 5 + 'x',
+                         '#1 Password', '#1Password\n'):
+            self.assertFalse(is_password(password), password)
+
+    def test_fuzz_against_reference(self):
+        rng = random.Random(23)
+        alphabet = 'aZ9.-_@ !é'
+        for _ in range(20000):
+            value = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 14)))
+            self.assertEqual(is_email(value), bool(EMAIL_REFERENCE.fullmatch(value)), value)
+            self.assertEqual(is_password(value), bool(PASSWORD_REFERENCE.match(value)), value)
+
+    def test_adversarial_inputs_run_in_bounded_time(self):
+        for validator, values in ((is_email, ADVERSARIAL_EMAILS), (is_password, ADVERSARIAL_PASSWORDS)):
+            for value in values:
+                started = time.perf_counter()
+                self.assertFalse(validator(value))
+                self.assertLess(time.perf_counter() - started, 0.05, value[:20])
+
+    def test_oversized_fields_are_rejected_before_validation(self):
+        client = self.app.test_client()
+        for email in ADVERSARIAL_EMAILS:
+            started = time.perf_counter()
+            response = client.post('/api/v1/auth/login', json=dict(email=email, password='x'))
+            self.assertLess(time.perf_counter() - started, 0.5)
+            self.assertEqual(response.status_code, 400)
+        response = client.post('/api/v1/auth/login', json=dict(email='a' * 300, password='x' * 200))
+        self.assertEqual(response.json['error'], dict(email=['Longer than maximum length 254.'],
+                                                      password=['Longer than maximum length 128.']))
+
+    def test_oversized_body(self):
+        body = json.dumps(dict(email='test@test.test', password='x' * self.app.config['MAX_CONTENT_LENGTH']))
+        response = self.app.test_client().post('/api/v1/auth/login', data=body, content_type='application/json')
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(response.json['status_code'], 413)
+
+    def test_oversized_chunked_body(self):
+        limit = self.app.config['MAX_CONTENT_LENGTH']
+        for size, too_large in ((limit, False), (limit + 1, True)):
+            environ = {'REQUEST_METHOD': 'POST', 'wsgi.input': io.BytesIO(b'x' * size), 'wsgi.input_terminated': True}
+            with self.app.app_context():
+                request = BoundedRequest(environ)
+                if too_large:
+                    self.assertRaises(RequestEntityTooLarge, request.get_data)
+                else:
+                    self.assertEqual(len(request.get_data()), size)